@@ -2,8 +2,10 @@ from django.conf import settings
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
 from socialmedia.users.api.views import UserViewSet
-from socialmedia.newsfeed.api.views import StatusViewSet, CommentViewSet,\
-    UserRelationDetailViewSet, MywallDetailViewSet, NewsDetailViewSet
+from socialmedia.newsfeed.api.views import (
+    StatusViewSet, CommentViewSet, UserRelationDetailViewSet, MywallDetailViewSet, NewsDetailViewSet,
+    UploadSessionViewSet, TrendingViewSet, SearchViewSet, StreamViewSet,
+)
 
 if settings.DEBUG:
     router = DefaultRouter()
@@ -16,6 +18,10 @@ router.register("comment", CommentViewSet, basename="comment")
 router.register("userrelationdetail", UserRelationDetailViewSet, basename="userrelationdetail")
 router.register("mywall", MywallDetailViewSet, basename="mywall")
 router.register("news", NewsDetailViewSet, basename="news")
+router.register("uploads", UploadSessionViewSet, basename="upload")
+router.register("trending", TrendingViewSet, basename="trending")
+router.register("search", SearchViewSet, basename="search")
+router.register("stream", StreamViewSet, basename="stream")
 
 
 
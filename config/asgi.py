@@ -0,0 +1,38 @@
+"""
+ASGI config for SocialMedia project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Requests for the live feed stream (``socialmedia.newsfeed.stream``) are held
+open as server-sent events; everything else is handed to Django. In production
+this only serves the Procfile's ``stream`` process, which the proxy sends
+``/api/stream/`` to; the rest of the API stays on ``config.wsgi``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/dev/howto/deployment/asgi/
+
+"""
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# socialmedia directory.
+ROOT_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(ROOT_DIR / "socialmedia"))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+# This application object is used by any ASGI server configured to use this file.
+django_application = get_asgi_application()
+
+# Import after the Django application is set up, the stream uses the models.
+from socialmedia.newsfeed import stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == stream.PATH:
+        await stream.application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
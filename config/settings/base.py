@@ -74,6 +74,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -293,6 +294,25 @@ CELERY_TASK_TIME_LIMIT = 5 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 60
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-scheduler
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-schedule
+CELERY_BEAT_SCHEDULE = {
+    "newsfeed-trim-timelines": {
+        "task": "socialmedia.newsfeed.tasks.trim_timelines",
+        "schedule": 60 * 60,
+    },
+    "newsfeed-collect-media": {
+        "task": "socialmedia.newsfeed.tasks.collect_media",
+        "schedule": 60 * 60,
+    },
+    "newsfeed-flush-vote-counters": {
+        "task": "socialmedia.newsfeed.tasks.flush_vote_counters",
+        "schedule": env.int("NEWSFEED_VOTE_FLUSH_INTERVAL", default=10),
+    },
+    "newsfeed-compute-follow-suggestions": {
+        "task": "socialmedia.newsfeed.tasks.compute_follow_suggestions",
+        "schedule": 24 * 60 * 60,
+    },
+}
 # django-allauth
 # ------------------------------------------------------------------------------
 ACCOUNT_ALLOW_REGISTRATION = env.bool("DJANGO_ACCOUNT_ALLOW_REGISTRATION", True)
@@ -340,3 +360,54 @@ SPECTACULAR_SETTINGS = {
 }
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Number of statuses kept in each user's materialized home timeline.
+NEWSFEED_TIMELINE_LENGTH = env.int("NEWSFEED_TIMELINE_LENGTH", default=800)
+# Users with at least this many followers are pulled at read time instead of
+# being pushed into every follower's timeline.
+NEWSFEED_CELEBRITY_THRESHOLD = env.int("NEWSFEED_CELEBRITY_THRESHOLD", default=10000)
+# How long (seconds) the computed set of celebrity accounts is cached.
+NEWSFEED_CELEBRITY_CACHE_TIMEOUT = env.int("NEWSFEED_CELEBRITY_CACHE_TIMEOUT", default=300)
+# Buffer like/dislike deltas in the cache and let a beat task write them back.
+NEWSFEED_VOTE_WRITE_BEHIND = env.bool("NEWSFEED_VOTE_WRITE_BEHIND", default=False)
+# Storage for status/comment photos; content-addressed so duplicates are stored once.
+NEWSFEED_PHOTO_STORAGE = env(
+    "NEWSFEED_PHOTO_STORAGE", default="socialmedia.utils.content_storage.ContentAddressedFileSystemStorage"
+)
+# Seconds an unreferenced photo is kept before the media GC deletes it.
+NEWSFEED_MEDIA_GC_GRACE = env.int("NEWSFEED_MEDIA_GC_GRACE", default=24 * 60 * 60)
+# Lifetime (seconds) of a direct-to-storage upload session and its largest accepted file.
+NEWSFEED_UPLOAD_EXPIRY = env.int("NEWSFEED_UPLOAD_EXPIRY", default=15 * 60)
+NEWSFEED_UPLOAD_MAX_BYTES = env.int("NEWSFEED_UPLOAD_MAX_BYTES", default=20 * 1024 * 1024)
+# Seconds a serialized status/comment detail payload stays in the cache.
+NEWSFEED_PAYLOAD_CACHE_TIMEOUT = env.int("NEWSFEED_PAYLOAD_CACHE_TIMEOUT", default=5 * 60)
+# How many of the latest comments are embedded with each wall/news status.
+NEWSFEED_WALL_COMMENTS = env.int("NEWSFEED_WALL_COMMENTS", default=3)
+# Broker behind the /api/stream/ live updates; the in-process one only reaches
+# clients connected to the same process.
+NEWSFEED_PUBSUB_BACKEND = env(
+    "NEWSFEED_PUBSUB_BACKEND", default="socialmedia.newsfeed.pubsub.LocalBackend"
+)
+NEWSFEED_PUBSUB_URL = env("NEWSFEED_PUBSUB_URL", default="")
+# Seconds a ticket from /api/stream/ticket/ can still open the stream.
+NEWSFEED_STREAM_TICKET_MAX_AGE = env.int("NEWSFEED_STREAM_TICKET_MAX_AGE", default=60)
+# Largest number of votes or relation actions accepted by one bulk request.
+NEWSFEED_BULK_MAX_ITEMS = env.int("NEWSFEED_BULK_MAX_ITEMS", default=100)
+# ?order=ranked on the news feed: how many of the newest timeline statuses are
+# scored, how many of the best are kept and for how long (seconds) per viewer.
+NEWSFEED_RANKING_WINDOW = env.int("NEWSFEED_RANKING_WINDOW", default=2000)
+NEWSFEED_RANKING_TOP_K = env.int("NEWSFEED_RANKING_TOP_K", default=300)
+NEWSFEED_RANKING_CACHE_TIMEOUT = env.int("NEWSFEED_RANKING_CACHE_TIMEOUT", default=60)
+# Trending counters: bucket length (seconds), how many buckets the sliding window
+# spans and where they are kept (the in-process backend only sees this process).
+NEWSFEED_TRENDING_BUCKET = env.int("NEWSFEED_TRENDING_BUCKET", default=60 * 60)
+NEWSFEED_TRENDING_WINDOW = env.int("NEWSFEED_TRENDING_WINDOW", default=24)
+NEWSFEED_TRENDING_BACKEND = env(
+    "NEWSFEED_TRENDING_BACKEND", default="socialmedia.newsfeed.trending.LocalBackend"
+)
+NEWSFEED_TRENDING_URL = env("NEWSFEED_TRENDING_URL", default="")
+# Text search configuration used for the status/comment search vectors.
+NEWSFEED_SEARCH_CONFIG = env("NEWSFEED_SEARCH_CONFIG", default="english")
+# Follow suggestions: how many are stored per user and how many users' two-hop
+# scores the batch job computes at once.
+NEWSFEED_SUGGESTIONS_TOP_K = env.int("NEWSFEED_SUGGESTIONS_TOP_K", default=50)
+NEWSFEED_SUGGESTIONS_CHUNK = env.int("NEWSFEED_SUGGESTIONS_CHUNK", default=1000)
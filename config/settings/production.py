@@ -92,6 +92,7 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 # ------------------------------------------------------------------------------
 DEFAULT_FILE_STORAGE = "socialmedia.utils.storages.MediaRootS3Boto3Storage"
 MEDIA_URL = f"https://{aws_s3_domain}/media/"
+NEWSFEED_PHOTO_STORAGE = "socialmedia.utils.storages.ContentAddressedS3Boto3Storage"
 
 # EMAIL
 # ------------------------------------------------------------------------------
@@ -191,3 +192,7 @@ sentry_sdk.init(
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+NEWSFEED_PUBSUB_BACKEND = "socialmedia.newsfeed.pubsub.RedisBackend"
+NEWSFEED_PUBSUB_URL = env("NEWSFEED_PUBSUB_URL", default=env("REDIS_URL"))
+NEWSFEED_TRENDING_BACKEND = "socialmedia.newsfeed.trending.RedisBackend"
+NEWSFEED_TRENDING_URL = env("NEWSFEED_TRENDING_URL", default=env("REDIS_URL"))
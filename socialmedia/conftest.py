@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 
 from socialmedia.users.models import User
 from socialmedia.users.tests.factories import UserFactory
@@ -9,6 +10,13 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def user() -> User:
     return UserFactory()
@@ -0,0 +1,84 @@
+"""
+Batched votes and relation actions.
+
+Each item goes through the serializer of the matching single-item endpoint,
+so the rules and messages are the same, inside its own savepoint: a failing
+item is reported in the results and does not undo the others. That covers
+any API error (validation, permission, not found) and database errors, which
+are logged and reported without their details. What those
+serializers look up is fetched for the whole batch first, the targets with
+one ``in_bulk`` and the viewer's edges with one ``RelationResolver.load``.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import APIException, ValidationError
+
+from socialmedia.newsfeed import graph
+from socialmedia.newsfeed.models import Comment
+
+from .serializers import RELATION_ACTION_SERIALIZERS
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def _run(items, apply_one):
+    results = []
+    for index, item in enumerate(items):
+        try:
+            with transaction.atomic():
+                apply_one(item)
+        except APIException as exc:
+            results.append({"index": index, "status": "error", "errors": exc.detail})
+        except DatabaseError:
+            logger.exception("Bulk item %s failed", index)
+            results.append({"index": index, "status": "error", "errors": ["This item could not be saved."]})
+        else:
+            results.append({"index": index, "status": "success"})
+    return results
+
+
+def _authors(target):
+    authors = [target.user_id]
+    if isinstance(target, Comment):
+        authors.append(target.status.user_id if target.status else None)
+        authors.append(target.base_comment.user_id if target.base_comment else None)
+    return authors
+
+
+def apply_votes(request, queryset, serializer_class, items):
+    """Cast or withdraw each ``{"id", "up_vote", "down_vote"}`` in ``items``."""
+    targets = queryset.in_bulk({item["id"] for item in items})
+    graph.resolver_for(request).load({author for target in targets.values() for author in _authors(target)})
+    label = queryset.model._meta.verbose_name
+
+    def apply_one(item):
+        target = targets.get(item["id"])
+        if target is None:
+            raise ValidationError(f"This {label} does not exist.")
+        data = {"up_vote": item["up_vote"], "down_vote": item["down_vote"]}
+        serializer = serializer_class(target, data=data, partial=True, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    return _run(items, apply_one)
+
+
+def apply_relations(request, items):
+    """Run each ``{"action", "user2"}`` in ``items``, e.g. ``{"action": "follow", "user2": 7}``."""
+    users = User.objects.in_bulk({item["user2"] for item in items})
+    relations = graph.resolver_for(request).load(users)
+
+    def apply_one(item):
+        if item["user2"] not in users:
+            raise ValidationError("This user is not exist.")
+        serializer_class = RELATION_ACTION_SERIALIZERS[item["action"]]
+        serializer = serializer_class(data={"user2": item["user2"]}, context={"request": request, "users": users})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(serializer.validated_data)
+        # the edge changed, later items about the same user must see it
+        relations.forget(item["user2"])
+
+    return _run(items, apply_one)
@@ -0,0 +1,61 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from socialmedia.newsfeed import payloads
+
+
+class ConditionalGetMixin:
+    """
+    ETag / If-None-Match support for newsfeed viewsets.
+
+    A response's ETag is derived from the URL, the viewer and the payload
+    generation of every row it renders (see ``socialmedia.newsfeed.payloads``),
+    so it changes on updates, votes, comment counts and deletes, and list
+    ETags change whenever rows enter or leave the page. A matching request is
+    answered with 304 before anything is serialized; for lists that costs an
+    id-only page query and one cache round trip. Without a generation for
+    every row there is no ETag, and requests are always answered in full.
+    """
+    etag_model = None
+
+    def etag(self, request, object_ids):
+        generations = payloads.generations(self.etag_model, object_ids)
+        if any(generation is None for object_id, generation in generations):
+            return None
+        stamp = repr((request.build_absolute_uri(), request.user.id, generations))
+        return quote_etag(hashlib.sha1(stamp.encode()).hexdigest())
+
+    def respond_conditionally(self, request, object_ids, render):
+        tag = self.etag(request, object_ids)
+        if tag is None:
+            return render()
+        if tag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag})
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = tag
+        return response
+
+    def page_ids(self, queryset):
+        rows = queryset.select_related(None).prefetch_related(None).only("id", "created_at")
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return list(rows.values_list("id", flat=True))
+        return [row.id for row in page]
+
+    def list(self, request, *args, **kwargs):
+        object_ids = self.page_ids(self.filter_queryset(self.get_queryset()))
+        return self.respond_conditionally(
+            request, object_ids, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = str(kwargs[self.lookup_field])
+        if not lookup.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        return self.respond_conditionally(
+            request, [int(lookup)], lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
@@ -0,0 +1,107 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, LimitOffsetPagination
+
+
+class RelationCursorPagination(CursorPagination):
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    ordering = "-id"
+
+
+class UserStatsCursorPagination(RelationCursorPagination):
+    ordering = "-user_id"
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination over a compound key, newest first.
+
+    DRF's ``CursorPagination`` positions on the first ordering field only and
+    skips ties with an offset. Here the cursor carries every ordering column,
+    so each page is one range scan on the matching index no matter how deep
+    it is, and rows inserted meanwhile can't shift the page boundaries.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    ordering = ("-created_at", "-id")
+    separator = "|"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        fields = [name.lstrip("-") for name in self.ordering]
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self._decode_position(queryset.model, fields) if self.cursor else None
+
+        descending = self.ordering[0].startswith("-") != reverse
+        queryset = queryset.order_by(*[f"-{name}" if descending else name for name in fields])
+        if position is not None:
+            queryset = queryset.filter(self._beyond(fields, position, descending))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def _decode_position(self, model, fields):
+        values = (self.cursor.position or "").split(self.separator)
+        if len(values) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [model._meta.get_field(name).to_python(value) for name, value in zip(fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _beyond(fields, position, descending):
+        """Rows strictly past ``position`` in (field1, field2, ...) order."""
+        lookup = "lt" if descending else "gt"
+        condition = Q()
+        for index, name in enumerate(fields):
+            exact = {field: value for field, value in zip(fields[:index], position)}
+            condition |= Q(**exact, **{f"{name}__{lookup}": position[index]})
+        return condition
+
+    def _position_of(self, instance):
+        fields = [name.lstrip("-") for name in self.ordering]
+        values = []
+        for name in fields:
+            value = getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        return self.separator.join(values)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position_of(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position_of(self.page[0])))
+
+
+class RankedPagination(LimitOffsetPagination):
+    """Pages over the cached id list of the ranked news feed, which keeps its order between requests."""
+    default_limit = 20
+    max_limit = 100
+
+
+class SearchPagination(LimitOffsetPagination):
+    """Search results are ordered by rank, which no keyset cursor can follow."""
+    default_limit = 20
+    max_limit = 100
@@ -1,12 +1,15 @@
 from urllib import request
 
 from django.contrib.auth import get_user_model, models
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.db import transaction
+from django.db.models import Manager
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 import re
-from socialmedia.newsfeed.models import Status, StatusVoteTracker, Comment, CommentVoteTracker, UserRelationDetail
+from socialmedia.newsfeed.models import Status, Comment, FollowSuggestion, UploadSession, UserRelationDetail, UserStats
+from socialmedia.newsfeed import graph, images, stats, threads, uploads, vote_buffer, votes
 from socialmedia.users.api.serializers import UserDetailSerializer
 
 User = get_user_model()
@@ -14,23 +17,47 @@ User = get_user_model()
 
 class StatusDetailSerializer(serializers.ModelSerializer):
     user = serializers.CharField(source="user.username")
+    photo = serializers.SerializerMethodField()
 
     class Meta:
         model = Status
-        fields = ["id", "user", "status_photo", "status_text", "like", "dislike", "comments", "url"]
+        fields = ["id", "user", "status_photo", "photo", "status_text", "like", "dislike", "comments", "created_at",
+                  "url"]
 
         extra_kwargs = {
             "url": {"view_name": "api:status-detail", "lookup_field": "id"}
         }
 
+    def get_photo(self, obj):
+        return images.describe(obj)
+
+    def to_representation(self, instance):
+        return vote_buffer.overlay(Status, super().to_representation(instance))
+
+
+def claim_upload(serializer, attrs, photo_field):
+    """Swap a finished direct upload (``upload_key``) in as the photo."""
+    upload_key = attrs.pop("upload_key", None)
+    if upload_key is None:
+        return
+    if attrs.get(photo_field):
+        raise ValidationError("Send either a photo or an upload_key, not both.")
+    try:
+        attrs[photo_field] = uploads.claim(serializer.context['request'].user, upload_key)
+    except uploads.UploadUnavailable as error:
+        raise ValidationError(str(error))
+
 
 class StatusCreateSerializer(serializers.ModelSerializer):
+    upload_key = serializers.UUIDField(write_only=True, required=False, allow_null=True)
+
     class Meta:
         model = Status
-        fields = ["status_photo", "status_text","user"]
+        fields = ["status_photo", "upload_key", "status_text","user"]
         read_only_fields = ("user",)
 
     def validate(self, attrs):
+        claim_upload(self, attrs, "status_photo")
         if (attrs["status_photo"] == None) and (attrs["status_text"] == ""):
             value = False
         elif (attrs["status_photo"] != None) and (attrs["status_text"] == ""):
@@ -69,7 +96,8 @@ class StatusUpdateSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         instance.status_text = validated_data.get('status_text', instance.status_text)
-        instance.save()
+        # counters and renditions move under F() updates, don't write back stale values
+        instance.save(update_fields=['status_text'])
         return instance
 
 
@@ -81,11 +109,11 @@ class StatusVotesUpdateSerializer(serializers.ModelSerializer):
         fields = [ "up_vote", "down_vote"]
 
     def validate(self, attrs):
-        if self.instance.user == self.context['request'].user:
+        relations = graph.resolver_for(self.context['request'])
+        if self.instance.user_id == self.context['request'].user.id:
             raise ValidationError("You can not like or dislike your own status.")
 
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                 following_list=self.instance.user.id).exists()):
+        elif not relations.follows(self.instance.user_id):
             raise ValidationError("This status not exist/ because you do not follow the user of the status.")
 
         elif attrs['up_vote'] == attrs['down_vote'] == None:
@@ -94,86 +122,54 @@ class StatusVotesUpdateSerializer(serializers.ModelSerializer):
         elif attrs['up_vote'] == attrs['down_vote']:
             raise ValidationError("You can not like and dislike the status at same time.")
 
-        elif attrs['up_vote'] == True:
-            if not StatusVoteTracker.objects.filter(status=self.instance.id).exists():
-                self.instance.like += 1
-                # update status, user and vote in vote_tracker
-                b = StatusVoteTracker.objects.create(status=self.instance, user=self.context['request'].user, vote=True)
-                b.save()
-            else:
-                if not StatusVoteTracker.objects.filter(status=self.instance.id, user=self.context['request'].user).exists():
-                    self.instance.like += 1
-                    # update status, user and vote in vote_tracker
-                    b = StatusVoteTracker.objects.create(status=self.instance, user=self.context['request'].user, vote=True)
-                    b.save()
-                else:
-                    if StatusVoteTracker.objects.get(status=self.instance.id,user=self.context['request'].user).vote == True:
-                        raise ValidationError("You already liked the status.")
-                    elif StatusVoteTracker.objects.get(status=self.instance.id,user=self.context['request'].user).vote == False:
-                        self.instance.like += 1
-                        self.instance.dislike -= 1
-                        StatusVoteTracker.objects.filter(status=self.instance.id, user=self.context['request'].user).update(vote=True)
-
-        elif attrs['down_vote'] == True:
-            if not StatusVoteTracker.objects.filter(status=self.instance.id).exists():
-                self.instance.dislike += 1
-                # update status, user and vote in vote_tracker
-                b = StatusVoteTracker.objects.create(status=self.instance, user=self.context['request'].user, vote=False)
-                b.save()
-            else:
-                if not StatusVoteTracker.objects.filter(status=self.instance.id, user=self.context['request'].user).exists():
-                    self.instance.dislike += 1
-                    # update status, user and vote in vote_tracker
-                    b = StatusVoteTracker.objects.create(status=self.instance, user=self.context['request'].user, vote=False)
-                    b.save()
-                else:
-                    if StatusVoteTracker.objects.get(status=self.instance.id, user=self.context['request'].user).vote == False:
-                        raise ValidationError("You already disliked the status.")
-                    elif StatusVoteTracker.objects.get(status=self.instance.id,user=self.context['request'].user).vote == True:
-                        self.instance.dislike += 1
-                        self.instance.like -= 1
-                        StatusVoteTracker.objects.filter(status=self.instance.id, user=self.context['request'].user).update(vote=False)
-
-        elif attrs['up_vote'] == False:
-            if StatusVoteTracker.objects.get(status=self.instance.id,user=self.context['request'].user).vote == True:
-                StatusVoteTracker.objects.filter(status=self.instance.id,user=self.context['request'].user,vote=True).delete()
-                self.instance.like -= 1
-
-        elif attrs['down_vote'] == False:
-            if StatusVoteTracker.objects.get(status=self.instance.id,user=self.context['request'].user).vote == False:
-                StatusVoteTracker.objects.filter(status=self.instance.id,user=self.context['request'].user,vote=False).delete()
-                self.instance.dislike -= 1
-
         return attrs
 
     def update(self, instance, validated_data):
-        instance.like = validated_data.get('like', instance.like)
-        instance.dislike = validated_data.get('dislike', instance.dislike)
-        instance.save()
+        user_id = self.context['request'].user.id
+        if validated_data['up_vote'] == True:
+            if not votes.cast(instance, user_id, votes.LIKE):
+                raise ValidationError("You already liked the status.")
+        elif validated_data['down_vote'] == True:
+            if not votes.cast(instance, user_id, votes.DISLIKE):
+                raise ValidationError("You already disliked the status.")
+        elif validated_data['up_vote'] == False:
+            votes.withdraw(instance, user_id, votes.LIKE)
+        elif validated_data['down_vote'] == False:
+            votes.withdraw(instance, user_id, votes.DISLIKE)
         return instance
 
 
 class CommentDetailSerializer(serializers.ModelSerializer):
     user = serializers.CharField(source="user.username")
+    photo = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
-        fields = ["id", "status", "base_comment", "user", "comment_photo", "comment_text", "like", "dislike", "comments_on_comment", "url"]
+        fields = ["id", "status", "base_comment", "user", "comment_photo", "photo", "comment_text", "like", "dislike",
+                  "comments_on_comment", "depth", "descendants", "created_at", "url"]
 
         extra_kwargs = {
                     "url": {"view_name": "api:comment-detail", "lookup_field": "id"}
                 }
 
+    def get_photo(self, obj):
+        return images.describe(obj)
+
+    def to_representation(self, instance):
+        return vote_buffer.overlay(Comment, super().to_representation(instance))
+
 
 
 class CommentCreateSerializer(serializers.ModelSerializer):
+    upload_key = serializers.UUIDField(write_only=True, required=False, allow_null=True)
 
     class Meta:
         model = Comment
-        fields = ["status", "base_comment", "comment_photo", "comment_text","user"]
+        fields = ["status", "base_comment", "comment_photo", "upload_key", "comment_text","user"]
         read_only_fields = ("user",)
 
     def validate(self, attrs):
+        claim_upload(self, attrs, "comment_photo")
         if (attrs["status"] != None) and (attrs["base_comment"] != None):
             value = False
         elif (attrs["status"] == None) and (attrs["base_comment"] == None):
@@ -186,6 +182,9 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         if value == False:
             raise ValidationError("You are allowed to either comment on a Status or on a Comment")
 
+        if attrs["base_comment"] is not None and attrs["base_comment"].depth >= threads.MAX_DEPTH:
+            raise ValidationError(f"Replies can't be nested more than {threads.MAX_DEPTH} levels deep.")
+
         if (attrs["comment_photo"] == None) and (attrs["comment_text"] == ""):
             value = False
         elif (attrs["comment_photo"] != None) and (attrs["comment_text"] == ""):
@@ -206,26 +205,24 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         comment_text = validated_data.pop('comment_text')
         comment_photo = validated_data.pop('comment_photo')
 
+        request_user = self.context['request'].user
+        relations = graph.resolver_for(self.context['request'])
         if status == None:
-            if not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                      following_list=base_comment.user.id).exists()):
-                if not (self.context['request'].user.id == base_comment.user.id):
+            status = base_comment.status
+            relations.load([base_comment.user_id, status.user_id])
+            if not relations.follows(base_comment.user_id):
+                if not (request_user.id == base_comment.user_id):
                     raise ValidationError("This base_comment not exist/ because you do not follow the user of the base_comment.")
 
-            elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                      following_list=base_comment.status.user.id).exists()):
-                if not (self.context['request'].user.id == base_comment.status.user.id):
+            if not relations.follows(status.user_id):
+                if not (request_user.id == status.user_id):
                     raise ValidationError("This status not exist/ because you do not follow the user of the status.")
 
         else:
-            if not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                        following_list=status.user.id).exists()):
-                if not (self.context['request'].user.id == status.user.id):
+            if not relations.follows(status.user_id):
+                if not (request_user.id == status.user_id):
                     raise ValidationError("This status not exist/ because you do not follow the user of the status.")
 
-        if status == None:
-            status = Comment.objects.get(id=base_comment.id).status
-
         instance = Comment.objects.create(
             status=status,
             base_comment=base_comment,
@@ -249,7 +246,8 @@ class CommentUpdateSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         instance.comment_text = validated_data.get('comment_text', instance.comment_text)
-        instance.save()
+        # counters and the thread fields move under F() updates, don't write back stale values
+        instance.save(update_fields=['comment_text'])
         return instance
 
 
@@ -261,22 +259,26 @@ class CommentVotesUpdateSerializer(serializers.ModelSerializer):
         fields = [ "up_vote", "down_vote"]
 
     def validate(self, attrs):
-        if self.instance.user == self.context['request'].user:
+        request_user = self.context['request'].user
+        base_comment = self.instance.base_comment
+        status = self.instance.status
+        relations = graph.resolver_for(self.context['request']).load([
+            self.instance.user_id,
+            base_comment.user_id if base_comment else None,
+            status.user_id if status else None,
+        ])
+
+        if self.instance.user_id == request_user.id:
             raise ValidationError("You can not like or dislike your own comment.")
 
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                 following_list=self.instance.user.id).exists()):
+        elif not relations.follows(self.instance.user_id):
             raise ValidationError("This 'comment' is not exist(or you do not follow the user of the 'comment').")
 
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                        following_list=self.instance.base_comment.user.id).exists()):
-            if not (self.context['request'].user.id == self.instance.base_comment.user.id):
-                raise ValidationError("This 'base_comment' is not exist(or you do not follow the user of the 'base_comment').")
+        elif base_comment and base_comment.user_id != request_user.id and not relations.follows(base_comment.user_id):
+            raise ValidationError("This 'base_comment' is not exist(or you do not follow the user of the 'base_comment').")
 
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                        following_list=self.instance.status.user.id).exists()):
-            if not (self.context['request'].user.id == self.instance.status.user.id):
-                raise ValidationError("This 'status' is not exist(or you do not follow the user of the 'status').")
+        elif status and status.user_id != request_user.id and not relations.follows(status.user_id):
+            raise ValidationError("This 'status' is not exist(or you do not follow the user of the 'status').")
 
         elif attrs['up_vote'] == attrs['down_vote'] == None:
             raise ValidationError("Either like it or not.")
@@ -284,88 +286,96 @@ class CommentVotesUpdateSerializer(serializers.ModelSerializer):
         elif attrs['up_vote'] == attrs['down_vote']:
             raise ValidationError("You can not like and dislike the status at same time.")
 
-        elif attrs['up_vote'] == True:
-            if not CommentVoteTracker.objects.filter(comment=self.instance.id).exists():
-                self.instance.like += 1
-                # update status, user and vote in vote_tracker
-                b = CommentVoteTracker.objects.create(comment=self.instance, user=self.context['request'].user, vote=True)
-                b.save()
-            else:
-                if not CommentVoteTracker.objects.filter(comment=self.instance.id, user=self.context['request'].user).exists():
-                    self.instance.like += 1
-                    # update status, user and vote in vote_tracker
-                    b = CommentVoteTracker.objects.create(comment=self.instance, user=self.context['request'].user, vote=True)
-                    b.save()
-                else:
-                    if CommentVoteTracker.objects.get(comment=self.instance.id,user=self.context['request'].user).vote == True:
-                        raise ValidationError("You already liked the comment.")
-                    elif CommentVoteTracker.objects.get(comment=self.instance.id,user=self.context['request'].user).vote == False:
-                        self.instance.like += 1
-                        self.instance.dislike -= 1
-                        CommentVoteTracker.objects.filter(comment=self.instance.id, user=self.context['request'].user).update(vote=True)
-
-        elif attrs['down_vote'] == True:
-            if not CommentVoteTracker.objects.filter(comment=self.instance.id).exists():
-                self.instance.dislike += 1
-                # update status, user and vote in vote_tracker
-                b = CommentVoteTracker.objects.create(comment=self.instance, user=self.context['request'].user, vote=False)
-                b.save()
-            else:
-                if not CommentVoteTracker.objects.filter(comment=self.instance.id, user=self.context['request'].user).exists():
-                    self.instance.dislike += 1
-                    # update status, user and vote in vote_tracker
-                    b = CommentVoteTracker.objects.create(comment=self.instance, user=self.context['request'].user, vote=False)
-                    b.save()
-                else:
-                    if CommentVoteTracker.objects.get(comment=self.instance.id, user=self.context['request'].user).vote == False:
-                        raise ValidationError("You already disliked the comment.")
-                    elif CommentVoteTracker.objects.get(comment=self.instance.id,user=self.context['request'].user).vote == True:
-                        self.instance.dislike += 1
-                        self.instance.like -= 1
-                        CommentVoteTracker.objects.filter(comment=self.instance.id, user=self.context['request'].user).update(vote=False)
-
-        elif attrs['up_vote'] == False:
-            if CommentVoteTracker.objects.get(comment=self.instance.id,user=self.context['request'].user).vote == True:
-                CommentVoteTracker.objects.filter(comment=self.instance.id,user=self.context['request'].user,vote=True).delete()
-                self.instance.like -= 1
-
-        elif attrs['down_vote'] == False:
-            if CommentVoteTracker.objects.get(comment=self.instance.id,user=self.context['request'].user).vote == False:
-                CommentVoteTracker.objects.filter(comment=self.instance.id,user=self.context['request'].user,vote=False).delete()
-                self.instance.dislike -= 1
-
         return attrs
 
     def update(self, instance, validated_data):
-        instance.like = validated_data.get('like', instance.like)
-        instance.dislike = validated_data.get('dislike', instance.dislike)
-        instance.save()
+        user_id = self.context['request'].user.id
+        if validated_data['up_vote'] == True:
+            if not votes.cast(instance, user_id, votes.LIKE):
+                raise ValidationError("You already liked the comment.")
+        elif validated_data['down_vote'] == True:
+            if not votes.cast(instance, user_id, votes.DISLIKE):
+                raise ValidationError("You already disliked the comment.")
+        elif validated_data['up_vote'] == False:
+            votes.withdraw(instance, user_id, votes.LIKE)
+        elif validated_data['down_vote'] == False:
+            votes.withdraw(instance, user_id, votes.DISLIKE)
         return instance
 
 
+class BulkVoteItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    up_vote = serializers.BooleanField(allow_null=True, required=False, default=None)
+    down_vote = serializers.BooleanField(allow_null=True, required=False, default=None)
+
+
+class BulkVoteSerializer(serializers.Serializer):
+    votes = BulkVoteItemSerializer(many=True, allow_empty=False)
+
+    def validate_votes(self, value):
+        if len(value) > settings.NEWSFEED_BULK_MAX_ITEMS:
+            raise ValidationError(f"At most {settings.NEWSFEED_BULK_MAX_ITEMS} votes per request.")
+        return value
+
+
 #-----------------------------------------------------------------------------------
 
+class UploadSessionCreateSerializer(serializers.ModelSerializer):
+    content_type = serializers.ChoiceField(choices=sorted(uploads.CONTENT_TYPES))
+
+    class Meta:
+        model = UploadSession
+        fields = ["content_type"]
+
+
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="suggested_id")
+    username = serializers.CharField(source="suggested.username")
+    name = serializers.CharField(source="suggested.name")
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ["id", "username", "name", "score"]
+
+
+class UserStatsSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="user_id")
+    username = serializers.CharField(source="user.username")
+    no_of_status = serializers.IntegerField(source="statuses")
+    no_of_followings = serializers.IntegerField(source="followings")
+    no_of_followers = serializers.IntegerField(source="followers")
+    no_of_blocked_users = serializers.IntegerField(source="blocks")
+    no_of_req_rx = serializers.IntegerField(source="req_rx")
+    no_of_req_sent = serializers.IntegerField(source="req_sent")
+
+    class Meta:
+        model = UserStats
+        fields = ["id", "username", "no_of_status", "no_of_followings", "no_of_followers",
+                  "no_of_blocked_users", "no_of_req_rx", "no_of_req_sent"]
+
+
 class UserRelationDetailDetailSerializer(serializers.ModelSerializer):
     user = serializers.CharField(source="user.username")
     user_list = serializers.SerializerMethodField()
 
-    def get_user_list(self, obj):
-        user_list = []
-        for user in User.objects.all():
-            user_list.append(
-                {
-                    'id':user.id,
-                    'username':user.username,
-                    'no_of_status':Status.objects.filter(user=user.id).count(),
-                    'no_of_followings':UserRelationDetail.objects.filter(user=user.id).exclude(following_list=None).values_list('following_list', flat=True).count(),
-                    'no_of_followers':UserRelationDetail.objects.filter(user=user.id).exclude(follower_list=None).values_list('follower_list', flat=True).count(),
-                    'no_of_blocked_users': UserRelationDetail.objects.filter(user=user.id).exclude(block_list=None).values_list('block_list', flat=True).count(),
-                    'no_of_req_rx': UserRelationDetail.objects.filter(user=user.id).exclude(req_rx=None).values_list('req_rx', flat=True).count(),
-                    'no_of_req_sent': UserRelationDetail.objects.filter(user=user.id).exclude(req_sent=None).values_list('req_sent', flat=True).count(),
+    @staticmethod
+    def related_user_ids(obj):
+        return [
+            user_id for user_id in (
+                obj.user_id, obj.following_list_id, obj.follower_list_id,
+                obj.block_list_id, obj.req_rx_id, obj.req_sent_id,
+            ) if user_id is not None
+        ]
 
-                }
-            )
-        return user_list
+    def get_user_list(self, obj):
+        # stats of the users this row links, prefetched for the whole page by the viewset
+        user_ids = self.related_user_ids(obj)
+        user_stats = self.context.get('user_stats')
+        if user_stats is None:
+            user_stats = stats.for_users(user_ids)
+        return UserStatsSerializer(
+            [user_stats[user_id] for user_id in user_ids if user_id in user_stats], many=True
+        ).data
 
     class Meta:
         model = UserRelationDetail
@@ -376,6 +386,12 @@ class UserRelationDetailDetailSerializer(serializers.ModelSerializer):
         }
 
 
+def relation_user(serializer, user_id):
+    """The ``user2`` of a relation action; bulk requests preload them into the context."""
+    user = serializer.context.get('users', {}).get(user_id)
+    return user if user is not None else User.objects.get(id=user_id)
+
+
 class UserFollowSerializer(serializers.ModelSerializer):
     user2 = serializers.IntegerField(allow_null=False)
 
@@ -385,30 +401,23 @@ class UserFollowSerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
     def validate(self, attrs):
-        if (attrs["user2"] == self.context['request'].user):
+        relations = graph.resolver_for(self.context['request']).load([attrs["user2"]])
+        if (attrs["user2"] == self.context['request'].user.id):
             raise ValidationError("You can not follow yourself.")
-        elif (UserRelationDetail.objects.filter(user=attrs["user2"] ,block_list=self.context['request'].user.id).exists()):
+        elif relations.is_blocked_by(attrs["user2"]):
             raise ValidationError("You have been blocked by this user/ this user is not exist.")
-        elif (UserRelationDetail.objects.filter(user=self.context['request'].user.id ,block_list=attrs["user2"]).exists()):
+        elif relations.has_blocked(attrs["user2"]):
             raise ValidationError("You blocked this user.")
-        elif (UserRelationDetail.objects.filter(user=self.context['request'].user.id ,req_sent=attrs["user2"]).exists()):
+        elif relations.has_requested(attrs["user2"]):
             raise ValidationError("You already sent request to this user.")
 
         return attrs
 
     def save(self, validated_data):
         id = validated_data.pop('user2')
-        user2 = User.objects.get(id=id)
+        user2 = relation_user(self, id)
 
-        instance = UserRelationDetail.objects.create(
-            user=self.context['request'].user,
-            req_sent=user2,
-        )
-
-        UserRelationDetail.objects.create(
-            user=user2,
-            req_rx=self.context['request'].user,
-        )
+        instance = graph.send_request(self.context['request'].user, user2)
 
         return instance
 
@@ -422,34 +431,25 @@ class UserUnfollowSerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
     def validate(self, attrs):
-        if (attrs["user2"] == self.context['request'].user):
+        relations = graph.resolver_for(self.context['request']).load([attrs["user2"]])
+        if (attrs["user2"] == self.context['request'].user.id):
             raise ValidationError("You can not unfollow yourself.")
-        elif (UserRelationDetail.objects.filter(user=attrs["user2"] ,block_list=self.context['request'].user.id).exists()):
+        elif relations.is_blocked_by(attrs["user2"]):
             raise ValidationError("You have been blocked by this user/ this user is not exist.")
-        elif (UserRelationDetail.objects.filter(user=self.context['request'].user.id ,block_list=attrs["user2"]).exists()):
+        elif relations.has_blocked(attrs["user2"]):
             raise ValidationError("You blocked this user.")
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                following_list=attrs["user2"]).exists()):
+        elif not relations.follows(attrs["user2"]):
             raise ValidationError("You did not follow this user.")
 
         return attrs
 
     def save(self, validated_data):
         id = validated_data.pop('user2')
-        user2 = User.objects.get(id=id)
-
+        user2 = relation_user(self, id)
 
         instance = UserRelationDetail.objects.all()
 
-        UserRelationDetail.objects.filter(
-            user=self.context['request'].user,
-            following_list=user2,
-        ).delete()
-
-        UserRelationDetail.objects.filter(
-            user=user2,
-            follower_list=self.context['request'].user,
-        ).delete()
+        graph.unfollow(self.context['request'].user, user2)
 
         return instance
 
@@ -462,33 +462,25 @@ class UserRemoveFollowerSerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
     def validate(self, attrs):
-        if (attrs["user2"] == self.context['request'].user):
+        relations = graph.resolver_for(self.context['request']).load([attrs["user2"]])
+        if (attrs["user2"] == self.context['request'].user.id):
             raise ValidationError("You can not unfollow yourself.")
-        elif (UserRelationDetail.objects.filter(user=attrs["user2"] ,block_list=self.context['request'].user.id).exists()):
+        elif relations.is_blocked_by(attrs["user2"]):
             raise ValidationError("You have been blocked by this user/ this user is not exist.")
-        elif (UserRelationDetail.objects.filter(user=self.context['request'].user.id ,block_list=attrs["user2"]).exists()):
+        elif relations.has_blocked(attrs["user2"]):
             raise ValidationError("You blocked this user.")
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                                    follower_list=attrs["user2"]).exists()):
+        elif not relations.is_followed_by(attrs["user2"]):
             raise ValidationError("This user is not following you.")
 
         return attrs
 
     def save(self, validated_data):
         id = validated_data.pop('user2')
-        user2 = User.objects.get(id=id)
+        user2 = relation_user(self, id)
 
         instance = UserRelationDetail.objects.all()
 
-        UserRelationDetail.objects.filter(
-            user=self.context['request'].user,
-            follower_list=user2,
-        ).delete()
-
-        UserRelationDetail.objects.filter(
-            user=user2,
-            following_list=self.context['request'].user,
-        ).delete()
+        graph.unfollow(user2, self.context['request'].user)
 
         return instance
 
@@ -502,23 +494,21 @@ class UserBlockSerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
     def validate(self, attrs):
-        if (attrs["user2"] == self.context['request'].user):
+        relations = graph.resolver_for(self.context['request']).load([attrs["user2"]])
+        if (attrs["user2"] == self.context['request'].user.id):
             raise ValidationError("You can not block yourself.")
-        elif (UserRelationDetail.objects.filter(user=attrs["user2"] ,block_list=self.context['request'].user.id).exists()):
+        elif relations.is_blocked_by(attrs["user2"]):
             raise ValidationError("You have been blocked by this user/ this user is not exist.")
-        elif UserRelationDetail.objects.filter(user=self.context['request'].user.id, block_list=attrs["user2"]).exists():
+        elif relations.has_blocked(attrs["user2"]):
             raise ValidationError("You already blocked this user.")
 
         return attrs
 
     def save(self, validated_data):
         id = validated_data.pop('user2')
-        user2 = User.objects.get(id=id)
+        user2 = relation_user(self, id)
 
-        instance = UserRelationDetail.objects.create(
-            user=self.context['request'].user,
-            block_list=user2,
-        )
+        instance = graph.block(self.context['request'].user, user2)
 
         return instance
 
@@ -531,24 +521,21 @@ class UserUnblockSerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
     def validate(self, attrs):
-        if (attrs["user2"] == self.context['request'].user):
+        relations = graph.resolver_for(self.context['request']).load([attrs["user2"]])
+        if (attrs["user2"] == self.context['request'].user.id):
             raise ValidationError("You can not block yourself.")
-        elif (UserRelationDetail.objects.filter(user=attrs["user2"] ,block_list=self.context['request'].user.id).exists()):
+        elif relations.is_blocked_by(attrs["user2"]):
             raise ValidationError("You have been blocked by this user/ this user is not exist.")
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id,
-                                               block_list=attrs["user2"]).exists()):
+        elif not relations.has_blocked(attrs["user2"]):
             raise ValidationError("This user is not in blocked list.")
 
         return attrs
 
     def save(self, validated_data):
         id = validated_data.pop('user2')
-        user2 = User.objects.get(id=id)
+        user2 = relation_user(self, id)
 
-        UserRelationDetail.objects.filter(
-            user=self.context['request'].user,
-            block_list=user2,
-        ).delete()
+        graph.unblock(self.context['request'].user, user2)
 
         instance = UserRelationDetail.objects.all()
 
@@ -564,38 +551,23 @@ class UserRequestAcceptSerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
     def validate(self, attrs):
-        if (attrs["user2"] == self.context['request'].user):
+        relations = graph.resolver_for(self.context['request']).load([attrs["user2"]])
+        if (attrs["user2"] == self.context['request'].user.id):
             raise ValidationError("You can not accept request for yourself.")
-        elif (UserRelationDetail.objects.filter(user=attrs["user2"] ,block_list=self.context['request'].user.id).exists()):
+        elif relations.is_blocked_by(attrs["user2"]):
             raise ValidationError("You have been blocked by this user/ this user is not exist.")
-        elif (UserRelationDetail.objects.filter(user=self.context['request'].user.id ,block_list=attrs["user2"]).exists()):
+        elif relations.has_blocked(attrs["user2"]):
             raise ValidationError("You blocked this user.")
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id ,req_rx=attrs["user2"]).exists()):
+        elif not relations.is_requested_by(attrs["user2"]):
             raise ValidationError("You did not receive request from this user.")
 
         return attrs
 
     def save(self, validated_data):
         id = validated_data.pop('user2')
-        user2 = User.objects.get(id=id)
-
-        instance = UserRelationDetail.objects.create(
-            user=self.context['request'].user,
-            follower_list=user2,
-        )
-        UserRelationDetail.objects.filter(
-            user=self.context['request'].user,
-            req_rx=user2,
-        ).delete()
+        user2 = relation_user(self, id)
 
-        UserRelationDetail.objects.create(
-            user=user2,
-            following_list=self.context['request'].user,
-        )
-        UserRelationDetail.objects.filter(
-            user=user2,
-            req_sent=self.context['request'].user,
-        ).delete()
+        instance = graph.accept_request(self.context['request'].user, user2)
 
         return instance
 
@@ -609,44 +581,104 @@ class UserRequestDenySerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
     def validate(self, attrs):
-        if (attrs["user2"] == self.context['request'].user):
+        relations = graph.resolver_for(self.context['request']).load([attrs["user2"]])
+        if (attrs["user2"] == self.context['request'].user.id):
             raise ValidationError("You can not accept request for yourself.")
-        elif (UserRelationDetail.objects.filter(user=attrs["user2"] ,block_list=self.context['request'].user.id).exists()):
+        elif relations.is_blocked_by(attrs["user2"]):
             raise ValidationError("You have been blocked by this user/ this user is not exist.")
-        elif (UserRelationDetail.objects.filter(user=self.context['request'].user.id ,block_list=attrs["user2"]).exists()):
+        elif relations.has_blocked(attrs["user2"]):
             raise ValidationError("You blocked this user.")
-        elif not (UserRelationDetail.objects.filter(user=self.context['request'].user.id ,req_rx=attrs["user2"]).exists()):
+        elif not relations.is_requested_by(attrs["user2"]):
             raise ValidationError("You did not receive request from this user.")
 
         return attrs
 
     def save(self, validated_data):
         id = validated_data.pop('user2')
-        user2 = User.objects.get(id=id)
+        user2 = relation_user(self, id)
 
-        UserRelationDetail.objects.filter(
-            user=self.context['request'].user,
-            req_rx=user2,
-        ).delete()
-
-        UserRelationDetail.objects.filter(
-            user=user2,
-            req_sent=self.context['request'].user,
-        ).delete()
+        graph.deny_request(self.context['request'].user, user2)
 
         instance = UserRelationDetail.objects.all()
 
         return instance
 
 
+RELATION_ACTION_SERIALIZERS = {
+    'follow': UserFollowSerializer,
+    'unfollow': UserUnfollowSerializer,
+    'remove_follower': UserRemoveFollowerSerializer,
+    'block': UserBlockSerializer,
+    'unblock': UserUnblockSerializer,
+    'accept': UserRequestAcceptSerializer,
+    'deny': UserRequestDenySerializer,
+}
+
+
+class BulkRelationItemSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=list(RELATION_ACTION_SERIALIZERS))
+    user2 = serializers.IntegerField()
+
+
+class BulkRelationSerializer(serializers.Serializer):
+    operations = BulkRelationItemSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, value):
+        if len(value) > settings.NEWSFEED_BULK_MAX_ITEMS:
+            raise ValidationError(f"At most {settings.NEWSFEED_BULK_MAX_ITEMS} operations per request.")
+        return value
+
+
+def latest_comments(status_ids, limit):
+    """The newest ``limit`` comments of each status, newest first per status."""
+    if not status_ids:
+        return []
+    # a lateral join reads each status's comments off newsfeed_comment_status_time
+    # and stops after ``limit``, however many comments the status has
+    return Comment.objects.raw(
+        f"""
+        SELECT latest.* FROM unnest(%s::bigint[]) AS page(status_id)
+        CROSS JOIN LATERAL (
+            SELECT * FROM {Comment._meta.db_table} AS comment
+            WHERE comment.status_id = page.status_id
+            ORDER BY comment.created_at DESC, comment.id DESC
+            LIMIT %s
+        ) AS latest
+        ORDER BY latest.status_id, latest.created_at DESC, latest.id DESC
+        """,
+        [status_ids, limit],
+    )
+
+
+class MywallListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        statuses = list(data.all() if isinstance(data, Manager) else data)
+        latest = {status.id: [] for status in statuses}
+        for comment in latest_comments(list(latest), settings.NEWSFEED_WALL_COMMENTS):
+            latest[comment.status_id].append(comment)
+        for status in statuses:
+            status.wall_comments = latest[status.id]
+        return super().to_representation(statuses)
+
+
 class MywallSerializer(serializers.ModelSerializer):
     user = serializers.CharField(source="user.username")
 
     comment_list = serializers.SerializerMethodField()
+    photo = serializers.SerializerMethodField()
+
+    @staticmethod
+    def prefetch(queryset):
+        """Load authors in bulk; a page's latest comments are loaded by MywallListSerializer."""
+        return queryset.select_related('user')
 
     def get_comment_list(self, obj):
+        comments = getattr(obj, 'wall_comments', None)
+        if comments is None:
+            comments = obj.comment_set.order_by('-created_at', '-id')[:settings.NEWSFEED_WALL_COMMENTS]
         comment_list = []
-        for comment in Comment.objects.filter(status=obj.id):
+        for comment in comments:
             comment_list.append(
                 {
                     'id': comment.id,
@@ -660,17 +692,24 @@ class MywallSerializer(serializers.ModelSerializer):
                     'comments_on_comment': comment.comments_on_comment,
                 }
             )
-        print(comment_list)
-        return comment_list
+        return vote_buffer.overlay_many(Comment, comment_list)
+
+    def get_photo(self, obj):
+        return images.describe(obj)
 
     class Meta:
         model = Status
-        fields = ["id", "user", "status_photo", "status_text", "like", "dislike", "comments", "url", "comment_list"]
+        fields = ["id", "user", "status_photo", "photo", "status_text", "like", "dislike", "comments", "created_at",
+                  "url", "comment_list"]
+        list_serializer_class = MywallListSerializer
 
         extra_kwargs = {
             "url": {"view_name": "api:mywall-detail", "lookup_field": "id"}
         }
 
+    def to_representation(self, instance):
+        return vote_buffer.overlay(Status, super().to_representation(instance))
+
 
 
 
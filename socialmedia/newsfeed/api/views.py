@@ -1,5 +1,7 @@
 from attr import attrs
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
@@ -8,19 +10,29 @@ from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, UpdateModelMixin, CreateModelMixin, DestroyModelMixin
 from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny
 from .serializers import StatusCreateSerializer, StatusDetailSerializer, StatusUpdateSerializer, \
     StatusVotesUpdateSerializer, \
     CommentDetailSerializer, CommentCreateSerializer, CommentUpdateSerializer, CommentVotesUpdateSerializer, \
     UserFollowSerializer, UserUnfollowSerializer, UserBlockSerializer, UserUnblockSerializer, \
     UserRequestAcceptSerializer, UserRelationDetailDetailSerializer, UserRequestDenySerializer, \
-    UserRemoveFollowerSerializer, MywallSerializer
-from socialmedia.newsfeed.models import Status, Comment, UserRelationDetail
+    UserRemoveFollowerSerializer, MywallSerializer, UserStatsSerializer, UploadSessionCreateSerializer, \
+    BulkVoteSerializer, BulkRelationSerializer, FollowSuggestionSerializer
+from . import bulk
+from .conditional import ConditionalGetMixin
+from .pagination import KeysetCursorPagination, RankedPagination, RelationCursorPagination, SearchPagination, \
+    UserStatsCursorPagination
+from socialmedia.newsfeed.models import Status, Comment, UploadSession, UserRelationDetail, UserStats
+from socialmedia.newsfeed import payloads, ranking, search, stats, stream, suggestions, threads, timeline, trending, \
+    uploads
+from socialmedia.newsfeed.tasks import fan_out_status
 from rest_framework.exceptions import ValidationError
 
 User = get_user_model()
 
 
-class StatusViewSet(RetrieveModelMixin,
+class StatusViewSet(ConditionalGetMixin,
+                  RetrieveModelMixin,
                   ListModelMixin,
                   UpdateModelMixin,
                   DestroyModelMixin,
@@ -28,6 +40,8 @@ class StatusViewSet(RetrieveModelMixin,
                   GenericViewSet):
     queryset = Status.objects.all()
     lookup_field = "id"
+    etag_model = Status
+    pagination_class = KeysetCursorPagination
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -51,6 +65,7 @@ class StatusViewSet(RetrieveModelMixin,
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         obj = serializer.save(serializer.validated_data)
+        transaction.on_commit(lambda: fan_out_status.delay(obj.id))
         response_serializer = StatusDetailSerializer(obj, context={'request': request})
         return Response({"response": response_serializer.data, "status": "success"}, status=status.HTTP_201_CREATED)
 
@@ -64,6 +79,14 @@ class StatusViewSet(RetrieveModelMixin,
             raise NotFound("Status not found.")
         return obj
 
+    def retrieve(self, request, *args, **kwargs):
+        if not str(kwargs['id']).isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        object_id = int(kwargs['id'])
+        return self.respond_conditionally(request, [object_id], lambda: Response(payloads.read_through(
+            Status, object_id, request, lambda: self.get_serializer(self.get_object()).data
+        )))
+
     def update(self, request, *args, **kwargs):
         data_to_change = {'status_text': request.data.get("status_text")}
         obj = self.get_object()
@@ -92,8 +115,18 @@ class StatusViewSet(RetrieveModelMixin,
         self.perform_update(serializer)
         return Response({"response": serializer.data, "status": "success"}, status=status.HTTP_202_ACCEPTED)
 
+    @action(methods=["POST"], detail=False, url_path="bulk-vote")
+    def bulk_vote(self, request, *args, **kwargs):
+        serializer = BulkVoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk.apply_votes(
+            request, Status.objects.all(), StatusVotesUpdateSerializer, serializer.validated_data["votes"]
+        )
+        return Response({"response": results, "status": "success"}, status=status.HTTP_200_OK)
+
 
-class CommentViewSet(RetrieveModelMixin,
+class CommentViewSet(ConditionalGetMixin,
+                  RetrieveModelMixin,
                   ListModelMixin,
                   UpdateModelMixin,
                   DestroyModelMixin,
@@ -101,6 +134,8 @@ class CommentViewSet(RetrieveModelMixin,
                   GenericViewSet):
     queryset = Comment.objects.all()
     lookup_field = "id"
+    etag_model = Comment
+    pagination_class = KeysetCursorPagination
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -124,18 +159,6 @@ class CommentViewSet(RetrieveModelMixin,
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # increament comments number
-        if (serializer.data.serializer["status"].value != None) and (serializer.data.serializer["base_comment"].value == None):
-            comments = Status.objects.get(id=serializer.data.serializer["status"].value).comments
-            Status.objects.filter(id=serializer.data.serializer["status"].value).update(comments=comments+1)
-        elif (serializer.data.serializer["status"].value == None) and (serializer.data.serializer["base_comment"].value != None):
-            comment_track = Comment.objects.get(id=serializer.data.serializer['base_comment'].value).id
-            status_track=Comment.objects.get(id=comment_track).status.id
-            comments = Status.objects.get(id=status_track).comments
-            Status.objects.filter(id=status_track).update(comments=comments + 1)
-            comments_on_comment = Comment.objects.get(id=serializer.data.serializer["base_comment"].value).comments_on_comment
-            Comment.objects.filter(id=serializer.data.serializer["base_comment"].value).update(comments_on_comment=comments_on_comment + 1)
-
         obj = serializer.save(serializer.validated_data)
         response_serializer = CommentDetailSerializer(obj, context={'request': request})
         return Response({"response": response_serializer.data, "status": "success"}, status=status.HTTP_201_CREATED)
@@ -145,11 +168,19 @@ class CommentViewSet(RetrieveModelMixin,
 
     def get_object(self, *args, **kwargs):  # used in update
         self.queryset = self.get_queryset()
-        obj = self.queryset.filter(id=self.kwargs['id']).first()
+        obj = self.queryset.select_related('status', 'base_comment').filter(id=self.kwargs['id']).first()
         if not obj:
             raise NotFound("Comment not found.")
         return obj
 
+    def retrieve(self, request, *args, **kwargs):
+        if not str(kwargs['id']).isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        object_id = int(kwargs['id'])
+        return self.respond_conditionally(request, [object_id], lambda: Response(payloads.read_through(
+            Comment, object_id, request, lambda: self.get_serializer(self.get_object()).data
+        )))
+
     def update(self, request, *args, **kwargs):
         data_to_change = {'comment_text': request.data.get("comment_text")}
         obj = self.get_object()
@@ -160,29 +191,15 @@ class CommentViewSet(RetrieveModelMixin,
 
 
     def destroy(self, request, *args, **kwargs):
-
-        if (Comment.objects.get(id=kwargs["id"]).user != self.request.user) and \
-            (Status.objects.get(id=Comment.objects.get(id=kwargs['id']).status.id).user != self.request.user) and \
-            (Comment.objects.get(id=Comment.objects.get(id=kwargs['id']).base_comment.id).user != self.request.user):
-
+        comment_obj = self.get_object()
+        allowed = {comment_obj.user_id, comment_obj.status.user_id}
+        if comment_obj.base_comment:
+            allowed.add(comment_obj.base_comment.user_id)
+        if self.request.user.id not in allowed:
             raise ValidationError("You are not allowed to delete this comment.")
 
-        comment_obj = get_object_or_404(Comment, id=kwargs["id"])
-
-        # decrement comments number
-        statusinstance = Comment.objects.get(id=comment_obj.id).status
-        commentinstance = Comment.objects.get(id=comment_obj.id).base_comment
-
-
-
-        comments_on_comment = Comment.objects.get(id=commentinstance.id).comments_on_comment
-        Comment.objects.filter(id=commentinstance.id).update(comments_on_comment=comments_on_comment-1)
-
         comment_obj.delete()
 
-        comments = Status.objects.filter(comment__status=statusinstance).count()
-        Status.objects.filter(id=statusinstance.id).update(comments=comments)
-
         return Response(data={"status":"success"}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -198,7 +215,28 @@ class CommentViewSet(RetrieveModelMixin,
         self.perform_update(serializer)
         return Response({"response": serializer.data, "status": "success"}, status=status.HTTP_202_ACCEPTED)
 
-
+    @action(methods=["POST"], detail=False, url_path="bulk-vote")
+    def bulk_vote(self, request, *args, **kwargs):
+        serializer = BulkVoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk.apply_votes(
+            request,
+            Comment.objects.select_related("status", "base_comment"),
+            CommentVotesUpdateSerializer,
+            serializer.validated_data["votes"],
+        )
+        return Response({"response": results, "status": "success"}, status=status.HTTP_200_OK)
+
+    @action(detail=True)
+    def thread(self, request, *args, **kwargs):
+        max_depth = request.query_params.get("depth")
+        if max_depth is not None:
+            if not max_depth.isdigit():
+                raise ValidationError("depth must be a non-negative integer.")
+            max_depth = int(max_depth)
+        comments = threads.subtree(self.get_object(), max_depth).select_related('user')
+        serializer = CommentDetailSerializer(comments, many=True, context={'request': request})
+        return Response(status=status.HTTP_200_OK, data=serializer.data)
 
 
 
@@ -210,6 +248,8 @@ class UserRelationDetailViewSet(RetrieveModelMixin,
                   GenericViewSet):
     queryset = UserRelationDetail.objects.all()
     lookup_field = "id"
+    pagination_class = RelationCursorPagination
+    suggestions_limit = 20
 
     def get_serializer_class(self):
         if (
@@ -311,9 +351,39 @@ class UserRelationDetailViewSet(RetrieveModelMixin,
         response_serializer = UserRelationDetailDetailSerializer(obj, context={'request': request})
         return Response(data={"status":"success"}, status=status.HTTP_204_NO_CONTENT)
 
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk_relations(self, request, *args, **kwargs):
+        serializer = BulkRelationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk.apply_relations(request, serializer.validated_data["operations"])
+        return Response({"response": results, "status": "success"}, status=status.HTTP_200_OK)
+
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        serializer.context['user_stats'] = stats.for_users(
+            user_id for obj in page for user_id in UserRelationDetailDetailSerializer.related_user_ids(obj)
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, url_path="stats", pagination_class=UserStatsCursorPagination)
+    def user_stats(self, request, *args, **kwargs):
+        page = self.paginate_queryset(UserStats.objects.select_related('user'))
+        serializer = UserStatsSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, url_path="suggestions")
+    def follow_suggestions(self, request, *args, **kwargs):
+        limit = request.query_params.get("limit", str(self.suggestions_limit))
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValidationError("limit must be a positive integer.")
+        found = suggestions.for_user(request.user, min(int(limit), settings.NEWSFEED_SUGGESTIONS_TOP_K))
+        serializer = FollowSuggestionSerializer(found, many=True)
+        return Response({"response": serializer.data, "status": "success"}, status=status.HTTP_200_OK)
 
     def get_queryset(self, *args, **kwargs):  # used in get_object
-        return self.queryset.all()
+        return self.queryset.select_related('user')
 
     def get_object(self, *args, **kwargs):  # used in update
         self.queryset = self.get_queryset()
@@ -323,7 +393,8 @@ class UserRelationDetailViewSet(RetrieveModelMixin,
         return obj
 
 
-class MywallDetailViewSet(RetrieveModelMixin,
+class MywallDetailViewSet(ConditionalGetMixin,
+                  RetrieveModelMixin,
                   ListModelMixin,
                   UpdateModelMixin,
                   DestroyModelMixin,
@@ -332,6 +403,8 @@ class MywallDetailViewSet(RetrieveModelMixin,
 
     queryset = Status.objects.all()
     lookup_field = "id"
+    etag_model = Status
+    pagination_class = KeysetCursorPagination
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -340,10 +413,11 @@ class MywallDetailViewSet(RetrieveModelMixin,
             return MywallSerializer
 
     def get_queryset(self, *args, **kwargs): # used in get_object
-        return self.queryset.filter(user=self.request.user)
+        return MywallSerializer.prefetch(self.queryset.filter(user=self.request.user))
 
 
-class NewsDetailViewSet(RetrieveModelMixin,
+class NewsDetailViewSet(ConditionalGetMixin,
+                  RetrieveModelMixin,
                   ListModelMixin,
                   UpdateModelMixin,
                   DestroyModelMixin,
@@ -352,6 +426,8 @@ class NewsDetailViewSet(RetrieveModelMixin,
 
     queryset = Status.objects.all()
     lookup_field = "id"
+    etag_model = Status
+    pagination_class = KeysetCursorPagination
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -360,15 +436,143 @@ class NewsDetailViewSet(RetrieveModelMixin,
             return MywallSerializer
 
     def get_queryset(self, *args, **kwargs): # used in get_object
-        allowed = []
-        allowed.append(self.request.user.id)
-        following_list = UserRelationDetail.objects.filter(user=self.request.user.id).values_list('following_list', flat=True)
+        return MywallSerializer.prefetch(timeline.statuses_for(self.request.user))
+
+    delta_page_size = 50
+    max_delta_page_size = 200
+
+    def _id_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        if not value.isdigit():
+            raise ValidationError(f"{name} must be a positive integer.")
+        return int(value)
+
+    def list(self, request, *args, **kwargs):
+        order = request.query_params.get("order", "recent")
+        if order not in ("recent", "ranked"):
+            raise ValidationError("order must be 'recent' or 'ranked'.")
+        if order == "ranked":
+            return self.ranked(request)
+
+        since_id, max_id = self._id_param("since_id"), self._id_param("max_id")
+        if since_id is None and max_id is None:
+            return super().list(request, *args, **kwargs)
+
+        count = self._id_param("count") or self.delta_page_size
+        count = min(count, self.max_delta_page_size)
+        # one extra id tells whether the client has to poll again right away
+        ids = timeline.ids_between(request.user, since_id=since_id, max_id=max_id, limit=count + 1)
+        has_more = len(ids) > count
+        ids = ids[1:] if has_more and since_id is not None else ids[:count]
+
+        def render():
+            queryset = MywallSerializer.prefetch(Status.objects.filter(id__in=ids).order_by("-id"))
+            serializer = self.get_serializer(queryset, many=True)
+            return Response({
+                "results": serializer.data,
+                "newest_id": ids[0] if ids else since_id,
+                "oldest_id": ids[-1] if ids else max_id,
+                "has_more": has_more,
+            }, status=status.HTTP_200_OK)
+
+        return self.respond_conditionally(request, ids, render)
+
+    def ranked(self, request):
+        paginator = RankedPagination()
+        ids = paginator.paginate_queryset(ranking.ranked_ids(request.user), request, view=self)
+
+        def render():
+            statuses = MywallSerializer.prefetch(Status.objects.filter(id__in=ids)).in_bulk()
+            page = [statuses[status_id] for status_id in ids if status_id in statuses]
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
+        return self.respond_conditionally(request, ids, render)
+
+    @action(detail=False, methods=["GET"], url_path="new-count")
+    def new_count(self, request, *args, **kwargs):
+        since_id = self._id_param("since_id")
+        if since_id is None:
+            raise ValidationError("since_id is required.")
+        count = timeline.count_since(request.user, since_id)
+        return Response({"response": {"count": count, "capped": count >= timeline.timeline_length()},
+                         "status": "success"}, status=status.HTTP_200_OK)
+
+
+class TrendingViewSet(ListModelMixin,
+                  GenericViewSet):
 
-        for i in following_list:
-           allowed.append(i)
+    queryset = Status.objects.all()
+    serializer_class = MywallSerializer
+    default_limit = 20
+    max_limit = 100
+
+    def list(self, request, *args, **kwargs):
+        limit = request.query_params.get("limit", str(self.default_limit))
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValidationError("limit must be a positive integer.")
+        ids = trending.ids_for(request.user, min(int(limit), self.max_limit))
+        statuses = MywallSerializer.prefetch(Status.objects.filter(id__in=ids)).in_bulk()
+        serializer = self.get_serializer([statuses[status_id] for status_id in ids if status_id in statuses], many=True)
+        return Response({"response": serializer.data, "status": "success"}, status=status.HTTP_200_OK)
+
+
+class SearchViewSet(ListModelMixin,
+                  GenericViewSet):
 
-        return Status.objects.filter(user__in=allowed)
+    queryset = Status.objects.all()
+    pagination_class = SearchPagination
 
+    def get_serializer_class(self):
+        if self.request.query_params.get("type") == "comment":
+            return CommentDetailSerializer
+        return StatusDetailSerializer
 
+    def get_queryset(self, *args, **kwargs):
+        text = self.request.query_params.get("q", "").strip()
+        if not text:
+            raise ValidationError("q is required.")
+        kind = self.request.query_params.get("type", "status")
+        if kind == "status":
+            return search.statuses(self.request.user, text).select_related("user")
+        elif kind == "comment":
+            return search.comments(self.request.user, text).select_related("user")
+        raise ValidationError("type must be 'status' or 'comment'.")
 
 
+class StreamViewSet(GenericViewSet):
+
+    @action(methods=["POST"], detail=False)
+    def ticket(self, request, *args, **kwargs):
+        data = {"ticket": stream.ticket(request.user), "expires_in": settings.NEWSFEED_STREAM_TICKET_MAX_AGE}
+        return Response({"response": data, "status": "success"}, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionViewSet(CreateModelMixin,
+                  GenericViewSet):
+
+    queryset = UploadSession.objects.all()
+    lookup_field = "key"
+    serializer_class = UploadSessionCreateSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = uploads.open_session(request.user, serializer.validated_data["content_type"])
+        data = {
+            "upload_key": session.key,
+            "expires_at": session.expires_at,
+            "upload": uploads.target(session, request),
+        }
+        return Response({"response": data, "status": "success"}, status=status.HTTP_201_CREATED)
+
+    @action(methods=["PUT"], detail=True, url_path="content", authentication_classes=[], permission_classes=[AllowAny])
+    def content(self, request, *args, **kwargs):
+        # stand-in for the storage's presigned PUT when the backend can't presign
+        try:
+            uploads.receive(kwargs["key"], request.query_params.get("signature"), request.body)
+        except uploads.UploadUnavailable as error:
+            raise ValidationError(str(error))
+        return Response({"status": "success"}, status=status.HTTP_200_OK)
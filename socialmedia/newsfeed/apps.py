@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class NewsfeedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'socialmedia.newsfeed'
+
+    def ready(self):
+        import socialmedia.newsfeed.signals  # noqa F401
@@ -0,0 +1,33 @@
+"""
+Comment counters on statuses and comments.
+
+``Status.comments`` counts every comment in the status's threads and
+``Comment.comments_on_comment`` counts direct replies. Both are changed only
+here, from the Comment signal receivers, with ``F()`` deltas, so concurrent
+commenters never overwrite each other's increments.
+"""
+from django.db.models import F
+
+from socialmedia.newsfeed import payloads
+from socialmedia.newsfeed.models import Comment, Status
+
+
+def comment_added(comment):
+    payloads.invalidate(Status, comment.status_id)
+    payloads.invalidate(Comment, comment.base_comment_id)
+    Status.objects.filter(id=comment.status_id).update(comments=F('comments') + 1)
+    if comment.base_comment_id:
+        Comment.objects.filter(id=comment.base_comment_id).update(
+            comments_on_comment=F('comments_on_comment') + 1
+        )
+
+
+def subtree_removed(root):
+    """``root`` and its ``root.descendants`` replies were deleted together."""
+    payloads.invalidate(Status, root.status_id)
+    payloads.invalidate(Comment, root.base_comment_id)
+    Status.objects.filter(id=root.status_id).update(comments=F('comments') - (1 + root.descendants))
+    if root.base_comment_id:
+        Comment.objects.filter(id=root.base_comment_id).update(
+            comments_on_comment=F('comments_on_comment') - 1
+        )
@@ -0,0 +1,194 @@
+"""
+Social graph service.
+
+Relationships are stored as ``Relation`` edges keyed on (src, kind, dst), so
+every follow/block/request question is a single probe on a unique index.
+``UserRelationDetail`` rows are still written alongside the edges because the
+``/api/userrelationdetail/`` resource renders them, but nothing reads them to
+answer relationship questions any more.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from socialmedia.newsfeed import stats, timeline
+from socialmedia.newsfeed.models import Relation, UserRelationDetail
+
+
+def _edge_exists(src_id, dst_id, kind):
+    return Relation.objects.filter(src=src_id, kind=kind, dst=dst_id).exists()
+
+
+def is_following(src_id, dst_id):
+    return _edge_exists(src_id, dst_id, Relation.FOLLOW)
+
+
+def has_blocked(src_id, dst_id):
+    return _edge_exists(src_id, dst_id, Relation.BLOCK)
+
+
+def has_requested(src_id, dst_id):
+    return _edge_exists(src_id, dst_id, Relation.REQUEST)
+
+
+def is_blocked_either_way(user_id, other_id):
+    return Relation.objects.filter(
+        Q(src=user_id, dst=other_id) | Q(src=other_id, dst=user_id),
+        kind=Relation.BLOCK,
+    ).exists()
+
+
+def followers_of(user_id):
+    return Relation.objects.filter(dst=user_id, kind=Relation.FOLLOW).values_list('src', flat=True)
+
+
+def followees_of(user_id):
+    return Relation.objects.filter(src=user_id, kind=Relation.FOLLOW).values_list('dst', flat=True)
+
+
+def blocked_either_way(user_id):
+    """Ids of every user that ``user_id`` blocked or was blocked by."""
+    edges = Relation.objects.filter(
+        Q(src=user_id) | Q(dst=user_id), kind=Relation.BLOCK
+    ).values_list('src', 'dst')
+    return {dst if src == user_id else src for src, dst in edges}
+
+
+class RelationResolver:
+    """
+    Answers follow/block/request questions for one viewer from memory.
+
+    Edges between the viewer and the users passed to ``load`` are fetched in
+    a single query; asking about a user that was not loaded yet loads it.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._loaded = set()
+        self._edges = set()
+
+    def load(self, user_ids):
+        missing = {user_id for user_id in user_ids if user_id is not None} - self._loaded
+        missing.discard(self.user_id)
+        if missing:
+            self._edges.update(
+                Relation.objects.filter(
+                    Q(src=self.user_id, dst__in=missing) | Q(src__in=missing, dst=self.user_id)
+                ).values_list('src', 'kind', 'dst')
+            )
+            self._loaded |= missing
+        return self
+
+    def forget(self, user_id):
+        """Drop what is known about ``user_id`` after the graph changed."""
+        self._loaded.discard(user_id)
+        self._edges = {edge for edge in self._edges if user_id not in (edge[0], edge[2])}
+
+    def _outgoing(self, kind, other_id):
+        self.load([other_id])
+        return (self.user_id, kind, other_id) in self._edges
+
+    def _incoming(self, kind, other_id):
+        self.load([other_id])
+        return (other_id, kind, self.user_id) in self._edges
+
+    def follows(self, other_id):
+        return self._outgoing(Relation.FOLLOW, other_id)
+
+    def is_followed_by(self, other_id):
+        return self._incoming(Relation.FOLLOW, other_id)
+
+    def has_blocked(self, other_id):
+        return self._outgoing(Relation.BLOCK, other_id)
+
+    def is_blocked_by(self, other_id):
+        return self._incoming(Relation.BLOCK, other_id)
+
+    def is_blocked_either_way(self, other_id):
+        return self.has_blocked(other_id) or self.is_blocked_by(other_id)
+
+    def has_requested(self, other_id):
+        return self._outgoing(Relation.REQUEST, other_id)
+
+    def is_requested_by(self, other_id):
+        return self._incoming(Relation.REQUEST, other_id)
+
+
+def resolver_for(request):
+    """The ``RelationResolver`` memoized on ``request`` for its user."""
+    resolver = getattr(request, '_relation_resolver', None)
+    if resolver is None or resolver.user_id != request.user.id:
+        resolver = RelationResolver(request.user.id)
+        request._relation_resolver = resolver
+    return resolver
+
+
+@transaction.atomic
+def send_request(user, user2):
+    _, created = Relation.objects.get_or_create(src=user, dst=user2, kind=Relation.REQUEST)
+    instance, _ = UserRelationDetail.objects.get_or_create(user=user, req_sent=user2)
+    UserRelationDetail.objects.get_or_create(user=user2, req_rx=user)
+
+    if created:
+        stats.adjust(user.id, req_sent=1)
+        stats.adjust(user2.id, req_rx=1)
+    return instance
+
+
+def _drop_request(user, requester):
+    deleted, _ = Relation.objects.filter(src=requester, dst=user, kind=Relation.REQUEST).delete()
+    UserRelationDetail.objects.filter(user=user, req_rx=requester).delete()
+    UserRelationDetail.objects.filter(user=requester, req_sent=user).delete()
+
+    stats.adjust(user.id, req_rx=-deleted)
+    stats.adjust(requester.id, req_sent=-deleted)
+
+
+@transaction.atomic
+def accept_request(user, requester):
+    """``user`` accepts the follow request sent by ``requester``."""
+    _drop_request(user, requester)
+    _, created = Relation.objects.get_or_create(src=requester, dst=user, kind=Relation.FOLLOW)
+    instance, _ = UserRelationDetail.objects.get_or_create(user=user, follower_list=requester)
+    UserRelationDetail.objects.get_or_create(user=requester, following_list=user)
+
+    if created:
+        stats.adjust(user.id, followers=1)
+        stats.adjust(requester.id, followings=1)
+    timeline.add_followee(requester.id, user.id)
+    return instance
+
+
+@transaction.atomic
+def deny_request(user, requester):
+    _drop_request(user, requester)
+
+
+@transaction.atomic
+def unfollow(user, followee):
+    deleted, _ = Relation.objects.filter(src=user, dst=followee, kind=Relation.FOLLOW).delete()
+    UserRelationDetail.objects.filter(user=user, following_list=followee).delete()
+    UserRelationDetail.objects.filter(user=followee, follower_list=user).delete()
+
+    stats.adjust(user.id, followings=-deleted)
+    stats.adjust(followee.id, followers=-deleted)
+    timeline.remove_followee(user.id, followee.id)
+
+
+@transaction.atomic
+def block(user, user2):
+    _, created = Relation.objects.get_or_create(src=user, dst=user2, kind=Relation.BLOCK)
+    instance, _ = UserRelationDetail.objects.get_or_create(user=user, block_list=user2)
+
+    if created:
+        stats.adjust(user.id, blocks=1)
+    timeline.block(user.id, user2.id)
+    return instance
+
+
+@transaction.atomic
+def unblock(user, user2):
+    deleted, _ = Relation.objects.filter(src=user, dst=user2, kind=Relation.BLOCK).delete()
+    UserRelationDetail.objects.filter(user=user, block_list=user2).delete()
+
+    stats.adjust(user.id, blocks=-deleted)
+    timeline.unblock(user.id, user2.id)
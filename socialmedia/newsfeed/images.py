@@ -0,0 +1,177 @@
+"""
+Photo processing for statuses and comments.
+
+Uploads are stored as-is by the request; ``process`` runs later on a Celery
+worker. It applies the EXIF orientation, re-encodes the photo at a few sizes
+as WebP and JPEG (neither carries the original EXIF block), and records the
+dimensions and a blurhash placeholder on the row.
+
+Renditions go to the photo field's storage next to the originals, so they are
+content-addressed too and reference-counted through ``media`` like them.
+"""
+import math
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from socialmedia.newsfeed import media, payloads
+
+# name -> longest edge in pixels; smaller photos are never upscaled
+RENDITIONS = (
+    ('thumb', 320),
+    ('medium', 1080),
+    ('large', 2048),
+)
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+# Pillow built without libwebp can only write the JPEG renditions
+if not features.check('webp'):
+    FORMATS = FORMATS[1:]
+BLURHASH_COMPONENTS = (4, 3)
+
+
+def _storage(instance):
+    return instance._meta.get_field(instance.photo_field).storage
+
+
+def rendition_names(renditions):
+    """Stored file names in a ``photo_renditions`` value."""
+    return [
+        name
+        for entry in renditions.values()
+        for key, name in entry.items() if key not in ('width', 'height')
+    ]
+
+
+def process(instance):
+    """Build the renditions of ``instance``'s photo and store them on the row."""
+    photo = getattr(instance, instance.photo_field)
+    if not photo:
+        return False
+
+    with photo.open('rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = image.convert('RGB')
+
+    storage = _storage(instance)
+    renditions = {}
+    for name, edge in RENDITIONS:
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        entry = {'width': resized.width, 'height': resized.height}
+        for extension, pil_format, options in FORMATS:
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            entry[extension] = storage.save(f'renditions/{name}.{extension}', ContentFile(buffer.getvalue()))
+        renditions[name] = entry
+
+    rows = type(instance).objects.filter(id=instance.id)
+    with transaction.atomic():
+        previous = rows.select_for_update().values_list('photo_renditions', flat=True).first() or {}
+        # retain before releasing, a reprocessed photo keeps its identical files
+        for name in rendition_names(renditions):
+            media.retain(name)
+        for name in rendition_names(previous):
+            media.release(name)
+        rows.update(
+            photo_width=image.width,
+            photo_height=image.height,
+            photo_blurhash=blurhash(image),
+            photo_renditions=renditions,
+        )
+        payloads.invalidate(type(instance), instance.id)
+    return True
+
+
+def describe(instance):
+    """The photo metadata exposed by the read serializers, or None before processing."""
+    if not instance.photo_renditions:
+        return None
+    storage = _storage(instance)
+    return {
+        'width': instance.photo_width,
+        'height': instance.photo_height,
+        'blurhash': instance.photo_blurhash,
+        'renditions': {
+            name: {
+                'width': entry['width'],
+                'height': entry['height'],
+                **{
+                    extension: storage.url(entry[extension])
+                    for extension, _, _ in FORMATS if extension in entry
+                },
+            }
+            for name, entry in instance.photo_renditions.items()
+        },
+    }
+
+
+# Blurhash, see https://github.com/woltapp/blurhash/blob/master/Algorithm.md
+
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def _base83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - position)) % 83] for position in range(1, length + 1))
+
+
+def _to_linear(value):
+    value = value / 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _signed_sqrt(value):
+    return math.copysign(abs(value) ** 0.5, value)
+
+
+def blurhash(image, components=BLURHASH_COMPONENTS):
+    """Encode ``image`` (RGB) as a blurhash string; computed on a 32px thumbnail."""
+    x_components, y_components = components
+    small = image.copy()
+    small.thumbnail((32, 32))
+    width, height = small.size
+    pixels = [tuple(_to_linear(channel) for channel in pixel) for pixel in small.getdata()]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == j == 0 else 2
+            red = green = blue = 0.0
+            for y in range(height):
+                vertical = math.cos(math.pi * j * y / height)
+                for x in range(width):
+                    basis = normalisation * math.cos(math.pi * i * x / width) * vertical
+                    pixel = pixels[y * width + x]
+                    red += basis * pixel[0]
+                    green += basis * pixel[1]
+                    blue += basis * pixel[2]
+            scale = 1 / (width * height)
+            factors.append((red * scale, green * scale, blue * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        quantised_max = max(0, min(82, int(max(abs(value) for factor in ac for value in factor) * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        maximum = 1
+        result += _base83(0, 1)
+    result += _base83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+    for factor in ac:
+        red, green, blue = (
+            max(0, min(18, int(math.floor(_signed_sqrt(value / maximum) * 9 + 9.5)))) for value in factor
+        )
+        result += _base83(red * 19 * 19 + green * 19 + blue, 2)
+    return result
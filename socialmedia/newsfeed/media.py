@@ -0,0 +1,53 @@
+"""
+Reference counts for photo files.
+
+Photos are stored content-addressed (see ``socialmedia.utils.content_storage``),
+so one file can back many Status and Comment rows. ``MediaBlob.refs`` counts
+those rows; ``collect_garbage`` deletes files nobody has referenced for
+NEWSFEED_MEDIA_GC_GRACE seconds. The grace period covers an upload that
+found the file already stored just before it became unreferenced.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from socialmedia.newsfeed.models import MediaBlob, Status
+
+
+def retain(name):
+    if not name:
+        return
+    if not MediaBlob.objects.filter(name=name).update(refs=F('refs') + 1, released_at=None):
+        blob, created = MediaBlob.objects.get_or_create(name=name, defaults={'refs': 1})
+        if not created:
+            MediaBlob.objects.filter(id=blob.id).update(refs=F('refs') + 1, released_at=None)
+
+
+def release(name):
+    if not name:
+        return
+    MediaBlob.objects.filter(name=name).update(refs=F('refs') - 1)
+    MediaBlob.objects.filter(name=name, refs__lte=0, released_at__isnull=True).update(released_at=timezone.now())
+
+
+def collect_garbage():
+    """Delete photo files that have been unreferenced for the grace period. Returns how many."""
+    storage = Status._meta.get_field('status_photo').storage
+    cutoff = timezone.now() - timedelta(seconds=settings.NEWSFEED_MEDIA_GC_GRACE)
+    collected = 0
+    candidates = MediaBlob.objects.filter(refs__lte=0, released_at__lte=cutoff).values_list('id', flat=True)
+    for blob_id in list(candidates):
+        with transaction.atomic():
+            blob = (
+                MediaBlob.objects.select_for_update(skip_locked=True)
+                .filter(id=blob_id, refs__lte=0).first()
+            )
+            if blob is None:
+                continue
+            storage.delete(blob.name)
+            blob.delete()
+        collected += 1
+    return collected
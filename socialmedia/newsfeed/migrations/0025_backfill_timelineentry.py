@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Q
+
+
+def backfill_timelines(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Status = apps.get_model('newsfeed', 'Status')
+    TimelineEntry = apps.get_model('newsfeed', 'TimelineEntry')
+    UserRelationDetail = apps.get_model('newsfeed', 'UserRelationDetail')
+
+    for user_id in User.objects.values_list('id', flat=True).iterator():
+        followees = UserRelationDetail.objects.filter(
+            user=user_id, following_list__isnull=False
+        ).values_list('following_list', flat=True)
+        latest = (
+            Status.objects.filter(Q(user=user_id) | Q(user__in=followees))
+            .order_by('-id')
+            .values_list('id', flat=True)[:settings.NEWSFEED_TIMELINE_LENGTH]
+        )
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner_id=user_id, status_id=status_id) for status_id in latest],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0024_timelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.13 on 2026-10-18 20:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('newsfeed', '0025_backfill_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Relation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'follow'), (2, 'block'), (3, 'request')])),
+                ('dst', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='relations_in', to=settings.AUTH_USER_MODEL)),
+                ('src', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='relations_out', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='relation',
+            index=models.Index(fields=['dst', 'kind', 'src'], name='newsfeed_relation_dst_kind_src'),
+        ),
+        migrations.AddConstraint(
+            model_name='relation',
+            constraint=models.UniqueConstraint(fields=('src', 'kind', 'dst'), name='newsfeed_relation_src_kind_dst'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+FOLLOW = 1
+BLOCK = 2
+REQUEST = 3
+
+
+def copy_relations(apps, schema_editor):
+    Relation = apps.get_model('newsfeed', 'Relation')
+    UserRelationDetail = apps.get_model('newsfeed', 'UserRelationDetail')
+
+    # (column holding the other user, kind, whether the row's user is the edge source)
+    columns = [
+        ('following_list', FOLLOW, True),
+        ('follower_list', FOLLOW, False),
+        ('block_list', BLOCK, True),
+        ('req_sent', REQUEST, True),
+        ('req_rx', REQUEST, False),
+    ]
+    for column, kind, outgoing in columns:
+        rows = (
+            UserRelationDetail.objects.filter(**{f'{column}__isnull': False})
+            .values_list('user', column)
+            .iterator()
+        )
+        batch = []
+        for user_id, other_id in rows:
+            src, dst = (user_id, other_id) if outgoing else (other_id, user_id)
+            batch.append(Relation(src_id=src, dst_id=dst, kind=kind))
+            if len(batch) >= 1000:
+                Relation.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Relation.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0026_relation'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_relations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.13 on 2026-10-18 20:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('newsfeed', '0027_copy_userrelationdetail_to_relation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='users.user')),
+                ('statuses', models.IntegerField(default=0)),
+                ('followers', models.IntegerField(db_index=True, default=0)),
+                ('followings', models.IntegerField(default=0)),
+                ('blocks', models.IntegerField(default=0)),
+                ('req_rx', models.IntegerField(default=0)),
+                ('req_sent', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
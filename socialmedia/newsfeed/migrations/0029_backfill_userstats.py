@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.db.models import Count
+
+FOLLOW = 1
+BLOCK = 2
+REQUEST = 3
+
+
+def backfill_user_stats(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Relation = apps.get_model('newsfeed', 'Relation')
+    Status = apps.get_model('newsfeed', 'Status')
+    UserStats = apps.get_model('newsfeed', 'UserStats')
+
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id) for user_id in User.objects.values_list('id', flat=True)],
+        ignore_conflicts=True,
+    )
+
+    def apply(queryset, group_by, field):
+        for row in queryset.values(group_by).annotate(total=Count('id')).iterator():
+            UserStats.objects.filter(user_id=row[group_by]).update(**{field: row['total']})
+
+    apply(Status.objects.all(), 'user', 'statuses')
+    apply(Relation.objects.filter(kind=FOLLOW), 'dst', 'followers')
+    apply(Relation.objects.filter(kind=FOLLOW), 'src', 'followings')
+    apply(Relation.objects.filter(kind=BLOCK), 'src', 'blocks')
+    apply(Relation.objects.filter(kind=REQUEST), 'dst', 'req_rx')
+    apply(Relation.objects.filter(kind=REQUEST), 'src', 'req_sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0028_userstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.13 on 2026-10-18 20:52
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def dedupe_votes(apps, schema_editor):
+    """Keep the newest vote per (target, user) and recount like/dislike from the trackers."""
+    for tracker_name, target_name, fk in (
+        ('StatusVoteTracker', 'Status', 'status'),
+        ('CommentVoteTracker', 'Comment', 'comment'),
+    ):
+        Tracker = apps.get_model('newsfeed', tracker_name)
+        Target = apps.get_model('newsfeed', target_name)
+
+        duplicates = (
+            Tracker.objects.values(fk, 'user')
+            .annotate(rows=Count('id'), newest=Max('id'))
+            .filter(rows__gt=1)
+        )
+        for row in duplicates.iterator():
+            Tracker.objects.filter(**{fk: row[fk], 'user': row['user']}).exclude(id=row['newest']).delete()
+
+        touched = Tracker.objects.values(fk).annotate(
+            likes=Count('id', filter=Q(vote=True)),
+            dislikes=Count('id', filter=Q(vote=False)),
+        )
+        Target.objects.update(like=0, dislike=0)
+        for row in touched.iterator():
+            Target.objects.filter(id=row[fk]).update(like=row['likes'], dislike=row['dislikes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0029_backfill_userstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_votes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='commentvotetracker',
+            constraint=models.UniqueConstraint(fields=('comment', 'user'), name='newsfeed_commentvotetracker_comment_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='statusvotetracker',
+            constraint=models.UniqueConstraint(fields=('status', 'user'), name='newsfeed_statusvotetracker_status_user'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.13 on 2026-10-18 20:55
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0030_vote_tracker_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='status',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at', 'id'], name='newsfeed_comment_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='status',
+            index=models.Index(fields=['created_at', 'id'], name='newsfeed_status_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='status',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='newsfeed_status_user_created'),
+        ),
+    ]
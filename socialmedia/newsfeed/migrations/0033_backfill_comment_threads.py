@@ -0,0 +1,49 @@
+from django.db import migrations
+
+SEGMENT_WIDTH = 10
+BATCH_SIZE = 1000
+
+
+def backfill_threads(apps, schema_editor):
+    Comment = apps.get_model('newsfeed', 'Comment')
+
+    parents = dict(Comment.objects.values_list('id', 'base_comment_id').iterator())
+    paths = {}
+    descendants = dict.fromkeys(parents, 0)
+
+    def path_of(comment_id):
+        chain = []
+        while comment_id is not None and comment_id not in paths:
+            chain.append(comment_id)
+            comment_id = parents[comment_id]
+        prefix = paths[comment_id] if comment_id is not None else ''
+        for link in reversed(chain):
+            prefix += f'{link:0{SEGMENT_WIDTH}d}/'
+            paths[link] = prefix
+        return paths[chain[0]] if chain else prefix
+
+    for comment_id in parents:
+        path = path_of(comment_id)
+        for ancestor in path.split('/')[:-2]:
+            descendants[int(ancestor)] += 1
+
+    batch = []
+    for comment_id, path in paths.items():
+        batch.append(Comment(
+            id=comment_id, path=path, depth=path.count('/') - 1, descendants=descendants[comment_id],
+        ))
+        if len(batch) == BATCH_SIZE:
+            Comment.objects.bulk_update(batch, ['path', 'depth', 'descendants'])
+            batch = []
+    Comment.objects.bulk_update(batch, ['path', 'depth', 'descendants'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0032_comment_thread_path'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_threads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.13 on 2026-10-18 21:02
+
+from django.db import migrations, models
+import socialmedia.utils.content_storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0034_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refs', models.IntegerField(default=0)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='comment_photo',
+            field=models.ImageField(blank=True, null=True, storage=socialmedia.utils.content_storage.photo_storage, upload_to='upload_image/'),
+        ),
+        migrations.AlterField(
+            model_name='status',
+            name='status_photo',
+            field=models.ImageField(blank=True, null=True, storage=socialmedia.utils.content_storage.photo_storage, upload_to='upload_image/'),
+        ),
+    ]
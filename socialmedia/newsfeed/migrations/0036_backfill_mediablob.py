@@ -0,0 +1,32 @@
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def count_photo_references(apps, schema_editor):
+    Status = apps.get_model('newsfeed', 'Status')
+    Comment = apps.get_model('newsfeed', 'Comment')
+    MediaBlob = apps.get_model('newsfeed', 'MediaBlob')
+
+    refs = Counter()
+    for model, field in ((Status, 'status_photo'), (Comment, 'comment_photo')):
+        rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+        for name, count in rows.values_list(field).annotate(count=Count('id')).order_by():
+            refs[name] += count
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, refs=count) for name, count in refs.items()],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0035_mediablob'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_photo_references, migrations.RunPython.noop),
+    ]
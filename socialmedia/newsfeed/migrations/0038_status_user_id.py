@@ -0,0 +1,17 @@
+# Generated by Django 3.2.13 on 2026-10-18 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0037_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='status',
+            index=models.Index(fields=['user', 'id'], name='newsfeed_status_user_id'),
+        ),
+    ]
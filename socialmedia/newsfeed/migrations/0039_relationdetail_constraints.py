@@ -0,0 +1,64 @@
+# Generated by Django 3.2.13 on 2026-10-18 21:13
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+LIST_FIELDS = ('following_list', 'follower_list', 'block_list', 'req_rx', 'req_sent')
+
+
+def drop_duplicate_relation_details(apps, schema_editor):
+    UserRelationDetail = apps.get_model('newsfeed', 'UserRelationDetail')
+    for field in LIST_FIELDS:
+        duplicates = (
+            UserRelationDetail.objects.filter(**{f'{field}__isnull': False})
+            .values('user', field)
+            .annotate(rows=Count('id'), keep=Min('id'))
+            .filter(rows__gt=1)
+            .order_by()
+        )
+        for row in duplicates.iterator():
+            UserRelationDetail.objects.filter(user=row['user'], **{field: row[field]}).exclude(
+                id=row['keep']
+            ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0038_status_user_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='newsfeed_comment_status_time'),
+        ),
+        # the composite index above covers the single-column FK index
+        migrations.AlterField(
+            model_name='comment',
+            name='status',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='newsfeed.status'),
+        ),
+        migrations.RunPython(drop_duplicate_relation_details, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userrelationdetail',
+            constraint=models.UniqueConstraint(condition=models.Q(('following_list__isnull', False)), fields=('user', 'following_list'), name='newsfeed_relationdetail_user_following_list'),
+        ),
+        migrations.AddConstraint(
+            model_name='userrelationdetail',
+            constraint=models.UniqueConstraint(condition=models.Q(('follower_list__isnull', False)), fields=('user', 'follower_list'), name='newsfeed_relationdetail_user_follower_list'),
+        ),
+        migrations.AddConstraint(
+            model_name='userrelationdetail',
+            constraint=models.UniqueConstraint(condition=models.Q(('block_list__isnull', False)), fields=('user', 'block_list'), name='newsfeed_relationdetail_user_block_list'),
+        ),
+        migrations.AddConstraint(
+            model_name='userrelationdetail',
+            constraint=models.UniqueConstraint(condition=models.Q(('req_rx__isnull', False)), fields=('user', 'req_rx'), name='newsfeed_relationdetail_user_req_rx'),
+        ),
+        migrations.AddConstraint(
+            model_name='userrelationdetail',
+            constraint=models.UniqueConstraint(condition=models.Q(('req_sent__isnull', False)), fields=('user', 'req_sent'), name='newsfeed_relationdetail_user_req_sent'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.13 on 2026-10-18 21:21
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def fill_search_vectors(apps, schema_editor):
+    for model_name, field in (('Status', 'status_text'), ('Comment', 'comment_text')):
+        apps.get_model('newsfeed', model_name).objects.update(
+            search_vector=SearchVector(field, config=settings.NEWSFEED_SEARCH_CONFIG)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsfeed', '0040_timelineentry_owner_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='status',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='newsfeed_comment_search'),
+        ),
+        migrations.AddIndex(
+            model_name='status',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='newsfeed_status_search'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
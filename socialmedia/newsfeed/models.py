@@ -1,18 +1,48 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from socialmedia import users
+from socialmedia.utils.content_storage import photo_storage
 
 User = get_user_model()
 
 
-class Status(models.Model):
+class ProcessedPhoto(models.Model):
+    """Metadata and renditions written by socialmedia.newsfeed.images after upload."""
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_blurhash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class Status(ProcessedPhoto):
+    photo_field = 'status_photo'
+    text_field = 'status_text'
+
     user = models.ForeignKey('users.User', models.CASCADE)
-    status_photo = models.ImageField(upload_to="upload_image/",null=True, blank=True)
+    status_photo = models.ImageField(upload_to="upload_image/", storage=photo_storage, null=True, blank=True)
     status_text = models.CharField(max_length=255, null=True, blank=True)
     like = models.IntegerField(default=0)
     dislike = models.IntegerField(default=0)
     comments = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # status_text as a tsvector, kept up to date by socialmedia.newsfeed.search
+    search_vector = SearchVectorField(null=True, editable=False)
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='newsfeed_status_search'),
+            models.Index(fields=['created_at', 'id'], name='newsfeed_status_created_id'),
+            models.Index(fields=['user', 'created_at', 'id'], name='newsfeed_status_user_created'),
+            models.Index(fields=['user', 'id'], name='newsfeed_status_user_id'),
+        ]
 
 
 class StatusVoteTracker(models.Model):
@@ -20,16 +50,40 @@ class StatusVoteTracker(models.Model):
     user = models.ForeignKey('users.User', models.CASCADE)
     vote = models.BooleanField(null=False, blank=False)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'user'], name='newsfeed_statusvotetracker_status_user'),
+        ]
+
 
-class Comment(models.Model):
-    status = models.ForeignKey('Status', models.CASCADE, null=True, blank=True)
+class Comment(ProcessedPhoto):
+    photo_field = 'comment_photo'
+    text_field = 'comment_text'
+    # indexed by newsfeed_comment_status_time below
+    status = models.ForeignKey('Status', models.CASCADE, null=True, blank=True, db_index=False)
     base_comment = models.ForeignKey("self", models.CASCADE, null=True, blank=True)
     user = models.ForeignKey('users.User', models.CASCADE)
-    comment_photo = models.ImageField(upload_to="upload_image/", null=True, blank=True)
+    comment_photo = models.ImageField(upload_to="upload_image/", storage=photo_storage, null=True, blank=True)
     comment_text = models.CharField(max_length=255, null=True, blank=True)
     like = models.IntegerField(default=0)
     dislike = models.IntegerField(default=0)
     comments_on_comment = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Materialized thread path: one zero-padded id segment per ancestor, ending
+    # with the comment's own id. Maintained by socialmedia.newsfeed.threads.
+    path = models.CharField(max_length=1000, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    descendants = models.IntegerField(default=0, editable=False)
+    # comment_text as a tsvector, kept up to date by socialmedia.newsfeed.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='newsfeed_comment_search'),
+            models.Index(fields=['created_at', 'id'], name='newsfeed_comment_created_id'),
+            models.Index(fields=['status', 'created_at', 'id'], name='newsfeed_comment_status_time'),
+            models.Index(fields=['path'], name='newsfeed_comment_path', opclasses=['varchar_pattern_ops']),
+        ]
 
 
 class CommentVoteTracker(models.Model):
@@ -37,6 +91,11 @@ class CommentVoteTracker(models.Model):
     user = models.ForeignKey('users.User', models.CASCADE)
     vote = models.BooleanField(null=False,blank=False)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['comment', 'user'], name='newsfeed_commentvotetracker_comment_user'),
+        ]
+
 
 class UserRelationDetail(models.Model):
     user = models.ForeignKey('users.User', models.CASCADE, related_name='user', )
@@ -46,3 +105,91 @@ class UserRelationDetail(models.Model):
     req_rx = models.ForeignKey('users.User', models.CASCADE, related_name='req_rx', null=True, blank=True)
     req_sent  = models.ForeignKey('users.User', models.CASCADE, related_name='req_sent', null=True, blank=True)
 
+    class Meta:
+        # one row per (user, other user) in each list; the partial unique
+        # indexes also serve the (user, <list>) lookups in newsfeed.graph
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', field],
+                condition=models.Q(**{f'{field}__isnull': False}),
+                name=f'newsfeed_relationdetail_user_{field}',
+            )
+            for field in ('following_list', 'follower_list', 'block_list', 'req_rx', 'req_sent')
+        ]
+
+
+
+class TimelineEntry(models.Model):
+    # indexed by the (owner, status) unique constraint
+    owner = models.ForeignKey('users.User', models.CASCADE, related_name='timeline_entries', db_index=False)
+    status = models.ForeignKey('Status', models.CASCADE, related_name='timeline_entries')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'status'], name='newsfeed_timelineentry_owner_status'),
+        ]
+
+
+class Relation(models.Model):
+    FOLLOW = 1
+    BLOCK = 2
+    REQUEST = 3
+    KIND_CHOICES = [
+        (FOLLOW, 'follow'),
+        (BLOCK, 'block'),
+        (REQUEST, 'request'),
+    ]
+
+    src = models.ForeignKey('users.User', models.CASCADE, related_name='relations_out', db_index=False)
+    dst = models.ForeignKey('users.User', models.CASCADE, related_name='relations_in', db_index=False)
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['src', 'kind', 'dst'], name='newsfeed_relation_src_kind_dst'),
+        ]
+        indexes = [
+            models.Index(fields=['dst', 'kind', 'src'], name='newsfeed_relation_dst_kind_src'),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField('users.User', models.CASCADE, primary_key=True, related_name='stats')
+    statuses = models.IntegerField(default=0)
+    followers = models.IntegerField(default=0, db_index=True)
+    followings = models.IntegerField(default=0)
+    blocks = models.IntegerField(default=0)
+    req_rx = models.IntegerField(default=0)
+    req_sent = models.IntegerField(default=0)
+
+
+class FollowSuggestion(models.Model):
+    """A user ``user`` may want to follow; ``score`` of the people they follow already follow them."""
+    # indexed by newsfeed_suggestion_user_score
+    user = models.ForeignKey('users.User', models.CASCADE, related_name='follow_suggestions', db_index=False)
+    suggested = models.ForeignKey('users.User', models.CASCADE, related_name='+')
+    score = models.IntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-score'], name='newsfeed_suggestion_user_score'),
+        ]
+
+
+class MediaBlob(models.Model):
+    """A stored photo file and how many Status/Comment rows point at it."""
+    name = models.CharField(max_length=255, unique=True)
+    refs = models.IntegerField(default=0)
+    released_at = models.DateTimeField(null=True, blank=True)
+
+
+class UploadSession(models.Model):
+    """A photo the client uploads straight to storage before creating a status or comment."""
+    key = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey('users.User', models.CASCADE, related_name='upload_sessions')
+    name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    expires_at = models.DateTimeField()
+    claimed_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,124 @@
+"""
+Read-through cache of serialized status and comment payloads.
+
+A payload is stored with the object's generation number. Every change to the
+object bumps the generation once its transaction commits, so a payload that
+was being built while the change happened is never served afterwards. The
+payload and generation are fetched in one ``get_many`` round trip.
+
+Generations also feed the API's ETags, so they must never repeat. They are
+stored without a timeout, and a counter that is missing (never created, or
+evicted) is recreated from the current time in nanoseconds rather than from
+zero, which puts it past any value the lost counter could have reached.
+``None`` means the cache could not provide a generation at all.
+
+On a miss only the request that wins ``cache.add`` on the lock key builds the
+payload. Concurrent requests wait briefly for it instead of all querying
+Postgres at once.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = 'newsfeed:payload'
+LOCK_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+WAIT_STEPS = 20
+
+
+def _kind(model):
+    return model._meta.model_name
+
+
+def _payload_key(kind, object_id):
+    return f'{KEY_PREFIX}:{kind}:{object_id}'
+
+
+def _generation_key(kind, object_id):
+    return f'{KEY_PREFIX}:{kind}:{object_id}:gen'
+
+
+def _seed(keys):
+    """Create the missing generation counters ``keys``; returns what they hold now."""
+    for key in keys:
+        cache.add(key, time.time_ns(), None)
+    return cache.get_many(keys) or {}
+
+
+def _lookup(kind, object_id, origin):
+    payload_key, generation_key = _payload_key(kind, object_id), _generation_key(kind, object_id)
+    values = cache.get_many([payload_key, generation_key]) or {}
+    if generation_key not in values:
+        values.update(_seed([generation_key]))
+    generation = values.get(generation_key)
+    cached = values.get(payload_key)
+    if generation is not None and cached and cached[0] == generation and cached[1] == origin:
+        return generation, cached[2]
+    return generation, None
+
+
+def read_through(model, object_id, request, build):
+    """The cached payload of ``model`` ``object_id``, built with ``build()`` on a miss."""
+    kind = _kind(model)
+    # payloads hold absolute URLs, so they are only reused for the same origin
+    origin = request.build_absolute_uri('/')
+    generation, payload = _lookup(kind, object_id, origin)
+    if payload is not None:
+        return payload
+
+    lock_key = f'{_payload_key(kind, object_id)}:lock'
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        for _ in range(WAIT_STEPS):
+            time.sleep(WAIT_INTERVAL)
+            generation, payload = _lookup(kind, object_id, origin)
+            if payload is not None:
+                return payload
+    try:
+        payload = build()
+        if generation is not None:
+            cache.set(
+                _payload_key(kind, object_id),
+                (generation, origin, payload),
+                settings.NEWSFEED_PAYLOAD_CACHE_TIMEOUT,
+            )
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return payload
+
+
+def generations(model, object_ids):
+    """
+    ``[(object_id, generation), ...]`` for ``object_ids``, in one cache round
+    trip unless some counters have to be created. A generation is ``None`` if
+    the cache is unavailable.
+    """
+    kind = _kind(model)
+    keys = [_generation_key(kind, object_id) for object_id in object_ids]
+    found = cache.get_many(keys) or {}
+    missing = [key for key in keys if key not in found]
+    if missing:
+        found.update(_seed(missing))
+    return [(object_id, found.get(key)) for object_id, key in zip(object_ids, keys)]
+
+
+def _bump(kind, object_ids):
+    for object_id in object_ids:
+        key = _generation_key(kind, object_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, time.time_ns(), None):
+                cache.incr(key)
+    cache.delete_many([_payload_key(kind, object_id) for object_id in object_ids])
+
+
+def invalidate(model, *object_ids):
+    """Drop the cached payloads of ``object_ids`` once the current transaction commits."""
+    object_ids = [object_id for object_id in object_ids if object_id is not None]
+    if object_ids:
+        kind = _kind(model)
+        transaction.on_commit(lambda: _bump(kind, object_ids))
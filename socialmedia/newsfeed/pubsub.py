@@ -0,0 +1,126 @@
+"""
+Publish/subscribe layer behind the live feed stream.
+
+Write paths ``publish`` events once their transaction commits; the ASGI
+stream in ``socialmedia.newsfeed.stream`` subscribes each connection to its
+channels. NEWSFEED_PUBSUB_BACKEND picks the broker: Redis pub/sub when web
+processes are spread over several hosts, the in-process ``LocalBackend`` for
+tests and a single development server.
+
+Channels:
+
+* ``user:<id>`` -- statuses pushed into the user's home timeline;
+* ``author:<id>`` -- statuses of a celebrity, whose posts are pulled instead
+  of pushed (see ``socialmedia.newsfeed.timeline``);
+* ``status:<id>`` -- votes and comments on a status and its comments.
+"""
+import asyncio
+import functools
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'newsfeed:live:'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def author_channel(user_id):
+    return f'author:{user_id}'
+
+
+def status_channel(status_id):
+    return f'status:{status_id}'
+
+
+class LocalBackend:
+    """Broker for subscribers in this process; publishers may run on any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channels, message):
+        with self._lock:
+            targets = {entry for channel in channels for entry in self._subscribers.get(channel, ())}
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    async def subscribe(self, channels):
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(entry)
+        try:
+            while True:
+                yield await entry[1].get()
+        finally:
+            with self._lock:
+                for channel in channels:
+                    subscribers = self._subscribers.get(channel, set())
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        self._subscribers.pop(channel, None)
+
+
+class RedisBackend:
+    """Redis pub/sub at NEWSFEED_PUBSUB_URL, shared by every web process."""
+
+    def __init__(self, url=None):
+        import redis
+
+        self.url = url or settings.NEWSFEED_PUBSUB_URL
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish(self, channels, message):
+        pipeline = self.client.pipeline(transaction=False)
+        for channel in channels:
+            pipeline.publish(CHANNEL_PREFIX + channel, message)
+        pipeline.execute()
+
+    async def subscribe(self, channels):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(*[CHANNEL_PREFIX + channel for channel in channels])
+        try:
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    yield message['data'].decode()
+        finally:
+            await pubsub.close()
+            await client.close()
+
+
+@functools.lru_cache()
+def _load(path):
+    return import_string(path)()
+
+
+def backend():
+    return _load(settings.NEWSFEED_PUBSUB_BACKEND)
+
+
+def _send(channels, message):
+    try:
+        backend().publish(channels, message)
+    except Exception:
+        # live updates are best effort; the feed endpoints stay the source of truth
+        logger.exception('Could not publish to %d live channel(s)', len(channels))
+
+
+def publish(channels, event, data):
+    """Send ``event`` with ``data`` to ``channels`` once the current transaction commits."""
+    channels = list(channels)
+    if channels:
+        message = json.dumps({'event': event, 'data': data})
+        transaction.on_commit(lambda: _send(channels, message))
@@ -0,0 +1,58 @@
+"""
+Full-text search over statuses and comments.
+
+``search_vector`` holds the row's text as a tsvector (GIN indexed). ``index``
+refreshes it from the post_save signal whenever the text may have changed.
+Queries use websearch syntax (quoted phrases, ``or``, ``-word``), are ranked
+with ``ts_rank`` and only match rows the viewer may see. As in the newsfeed
+serializers, that means rows written by the viewer or by users they follow,
+never by users blocking them or blocked by them. The rules are subqueries
+inside the search query, so pagination and counts are done by Postgres.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Q
+
+from socialmedia.newsfeed.models import Comment, Relation, Status
+
+
+def vector(field):
+    return SearchVector(field, config=settings.NEWSFEED_SEARCH_CONFIG)
+
+
+def index(instance, update_fields=None):
+    """Recompute ``instance``'s search vector unless its text was left out of the save."""
+    if update_fields is not None and instance.text_field not in update_fields:
+        return
+    type(instance).objects.filter(id=instance.id).update(search_vector=vector(instance.text_field))
+
+
+def _visible(user, author):
+    """Q matching rows whose ``author`` lookup is a user ``user`` may read."""
+    followees = Relation.objects.filter(src=user.id, kind=Relation.FOLLOW).values('dst')
+    blocking = Relation.objects.filter(dst=user.id, kind=Relation.BLOCK).values('src')
+    blocked = Relation.objects.filter(src=user.id, kind=Relation.BLOCK).values('dst')
+    return (
+        (Q(**{author: user.id}) | Q(**{f'{author}__in': followees}))
+        & ~Q(**{f'{author}__in': blocking})
+        & ~Q(**{f'{author}__in': blocked})
+    )
+
+
+def _search(queryset, text):
+    query = SearchQuery(text, config=settings.NEWSFEED_SEARCH_CONFIG, search_type='websearch')
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', '-id')
+    )
+
+
+def statuses(user, text):
+    """Statuses matching ``text`` that ``user`` may see, best match first."""
+    return _search(Status.objects.filter(_visible(user, 'user')), text)
+
+
+def comments(user, text):
+    """Comments matching ``text`` whose author and status author ``user`` may see, best first."""
+    return _search(Comment.objects.filter(_visible(user, 'user'), _visible(user, 'status__user')), text)
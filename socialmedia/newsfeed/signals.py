@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from socialmedia.newsfeed import (
+    counters,
+    images,
+    media,
+    payloads,
+    pubsub,
+    search,
+    stats,
+    threads,
+    trending,
+)
+from socialmedia.newsfeed.models import Comment, Status, UserStats
+from socialmedia.newsfeed.tasks import process_photo
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Status)
+def count_created_status(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(instance.user_id, statuses=1)
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_save, sender=Comment)
+def handle_new_photo(sender, instance, created, **kwargs):
+    photo = getattr(instance, instance.photo_field)
+    if created and photo:
+        media.retain(photo.name)
+        model_name, instance_id = sender._meta.model_name, instance.id
+        transaction.on_commit(lambda: process_photo.delay(model_name, instance_id))
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_save, sender=Comment)
+def index_search_text(sender, instance, update_fields=None, **kwargs):
+    search.index(instance, update_fields)
+
+
+@receiver(post_delete, sender=Status)
+def count_deleted_status(sender, instance, **kwargs):
+    stats.adjust(instance.user_id, statuses=-1)
+
+
+@receiver(post_save, sender=Comment)
+def place_created_comment(sender, instance, created, **kwargs):
+    if created:
+        threads.place(instance)
+        counters.comment_added(instance)
+
+
+@receiver(post_save, sender=Comment)
+def publish_created_comment(sender, instance, created, **kwargs):
+    if created and instance.status_id:
+        pubsub.publish([pubsub.status_channel(instance.status_id)], 'comment', {
+            'id': instance.id,
+            'status': instance.status_id,
+            'base_comment': instance.base_comment_id,
+            'user': instance.user_id,
+        })
+
+
+@receiver(post_save, sender=Comment)
+def count_trending_comment(sender, instance, created, **kwargs):
+    if created:
+        trending.record(instance.status_id, trending.COMMENT_WEIGHT)
+
+
+@receiver(pre_delete, sender=Comment)
+def mark_deleting_comment(sender, instance, **kwargs):
+    threads.mark_deleting(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def shrink_comment_thread(sender, instance, **kwargs):
+    if threads.removed(instance):
+        counters.subtree_removed(instance)
+
+
+@receiver(post_delete, sender=Status)
+@receiver(post_delete, sender=Comment)
+def release_photo(sender, instance, **kwargs):
+    photo = getattr(instance, instance.photo_field)
+    if photo:
+        media.release(photo.name)
+    for name in images.rendition_names(instance.photo_renditions):
+        media.release(name)
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Status)
+@receiver(post_delete, sender=Comment)
+def invalidate_payload(sender, instance, **kwargs):
+    payloads.invalidate(sender, instance.id)
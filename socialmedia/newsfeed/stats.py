@@ -0,0 +1,28 @@
+"""
+Denormalized per-user counters.
+
+Every user gets a ``UserStats`` row when it is created. The graph service and
+the status signals adjust it with ``F()`` deltas inside the transaction that
+changes the underlying rows, so reading the counters never needs a COUNT.
+"""
+from django.db.models import F
+
+from socialmedia.newsfeed.models import UserStats
+
+
+def adjust(user_id, **deltas):
+    """Apply counter deltas, e.g. ``adjust(user.id, followers=1)``."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def for_users(user_ids):
+    """``{user_id: UserStats}`` for the given users, in one query."""
+    return {
+        stats.user_id: stats
+        for stats in UserStats.objects.filter(user_id__in=set(user_ids)).select_related('user')
+    }
@@ -0,0 +1,136 @@
+"""
+Server-sent events stream of live feed updates, served at ``/api/stream/``.
+
+A connection is subscribed to the viewer's timeline, the celebrities they
+follow and up to MAX_STATUSES statuses passed as ``?status=1,2,3`` (the ones
+on screen), and receives ``timeline``, ``vote`` and ``comment`` events as
+they are published by ``socialmedia.newsfeed.pubsub``.
+
+Browsers can't set headers on an EventSource, so the stream is opened with
+``?ticket=`` instead. A ticket is a signed user id with a timestamp, handed out
+by ``POST /api/stream/ticket/`` to an authenticated user. It expires after
+NEWSFEED_STREAM_TICKET_MAX_AGE seconds, so a URL that ends up in a log or
+proxy is of no use for long and never exposes the API token.
+
+This is a plain ASGI application. ``config.asgi`` routes the stream path here
+and everything else to Django; it runs as the separate ``stream`` process.
+"""
+import asyncio
+import json
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+
+from socialmedia.newsfeed import graph, pubsub, timeline
+from socialmedia.newsfeed.models import Status
+
+PATH = '/api/stream/'
+SIGNING_SALT = 'socialmedia.newsfeed.stream'
+MAX_STATUSES = 100
+# proxies drop connections that stay silent for too long
+KEEPALIVE_INTERVAL = 15
+
+
+def ticket(user):
+    """A short-lived ``?ticket=`` value that opens ``user``'s stream."""
+    return signing.dumps(user.id, salt=SIGNING_SALT)
+
+
+def _authenticate(request):
+    try:
+        user_id = signing.loads(
+            request.GET.get('ticket', ''), salt=SIGNING_SALT, max_age=settings.NEWSFEED_STREAM_TICKET_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(id=user_id, is_active=True).first()
+
+
+def _status_ids(request):
+    ids = [value for value in request.GET.get('status', '').split(',') if value.isdigit()]
+    return [int(value) for value in ids[:MAX_STATUSES]]
+
+
+def _channels_for(user, status_ids):
+    channels = [pubsub.user_channel(user.id)]
+    channels += [pubsub.author_channel(author_id) for author_id in timeline.pulled_followees(user.id)]
+    if status_ids:
+        visible = Status.objects.filter(
+            Q(user=user) | Q(user__in=graph.followees_of(user.id)), id__in=status_ids
+        ).values_list('id', flat=True)
+        channels += [pubsub.status_channel(status_id) for status_id in visible]
+    return channels
+
+
+@sync_to_async
+def _connect(scope):
+    request = ASGIRequest(scope, BytesIO())
+    user = _authenticate(request)
+    if user is None:
+        return None
+    return _channels_for(user, _status_ids(request))
+
+
+def _event(message):
+    message = json.loads(message)
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n".encode()
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _reject(send):
+    await send({
+        'type': 'http.response.start',
+        'status': 401,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': b'{"detail": "Invalid or expired stream ticket."}'})
+
+
+async def application(scope, receive, send):
+    channels = await _connect(scope)
+    if channels is None:
+        await _reject(send)
+        return
+
+    messages = pubsub.backend().subscribe(channels)
+    disconnected = asyncio.ensure_future(_disconnected(receive))
+    pending = None
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b': connected\n\n', 'more_body': True})
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(messages.__anext__())
+            done, _ = await asyncio.wait(
+                {pending, disconnected}, timeout=KEEPALIVE_INTERVAL, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnected in done:
+                break
+            if pending in done:
+                body, pending = _event(pending.result()), None
+            else:
+                body = b': keepalive\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        for task in (pending, disconnected):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*[task for task in (pending, disconnected) if task is not None], return_exceptions=True)
+        await messages.aclose()
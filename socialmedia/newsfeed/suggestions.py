@@ -0,0 +1,115 @@
+"""
+Friends-of-friends follow suggestions, served by ``/api/userrelationdetail/suggestions/``.
+
+``compute`` runs offline in the ``compute_follow_suggestions`` beat task. The
+follow edges are loaded into a sparse adjacency matrix A with one row and
+column per user that has any relation, so ``(A @ A)[u, v]`` is the number of
+people u follows who follow v. Rows are scored NEWSFEED_SUGGESTIONS_CHUNK
+users at a time. For each chunk, the users it already follows or has
+requested, itself, and anyone blocked either way are masked out, and the
+NEWSFEED_SUGGESTIONS_TOP_K best candidates are stored as ``FollowSuggestion``
+rows. Only one chunk of two-hop scores is held in memory at once, next to
+the edge matrices themselves.
+
+Reads drop suggestions the graph has overtaken since the last run (users now
+followed, requested or blocked).
+"""
+import itertools
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from socialmedia.newsfeed import graph
+from socialmedia.newsfeed.models import FollowSuggestion, Relation
+
+# Relation rows fetched per round trip while loading the edges
+EDGE_BATCH = 10000
+
+
+def _edges(kind):
+    """``(n, 2)`` int64 array of the ``(src, dst)`` pairs of every ``kind`` edge."""
+    rows = Relation.objects.filter(kind=kind).values_list('src', 'dst').order_by()
+    pairs = np.fromiter(itertools.chain.from_iterable(rows.iterator(chunk_size=EDGE_BATCH)), np.int64)
+    return pairs.reshape(-1, 2)
+
+
+def _matrix(edges, users):
+    """CSR matrix of ``edges`` with rows and columns at the positions of their ids in sorted ``users``."""
+    return sparse.csr_matrix(
+        (
+            np.ones(len(edges), dtype=np.int32),
+            (np.searchsorted(users, edges[:, 0]), np.searchsorted(users, edges[:, 1])),
+        ),
+        shape=(len(users), len(users)),
+    )
+
+
+def load_graph():
+    """``(users, adjacency, excluded)``: sorted user ids, follow matrix, and the pairs never suggested."""
+    follows, requests, blocks = (_edges(kind) for kind in (Relation.FOLLOW, Relation.REQUEST, Relation.BLOCK))
+    users = np.unique(np.concatenate([follows.ravel(), requests.ravel(), blocks.ravel()]))
+    adjacency = _matrix(follows, users)
+    blocked = _matrix(blocks, users)
+    excluded = (adjacency + _matrix(requests, users) + blocked + blocked.T).tocsr()
+    return users, adjacency, excluded
+
+
+def two_hop(adjacency, excluded, start, stop):
+    """Two-hop scores of rows ``start:stop`` without the row's own user and its ``excluded`` pairs."""
+    scores = (adjacency[start:stop] @ adjacency).tocsr()
+    mask = excluded[start:stop] + sparse.eye(stop - start, adjacency.shape[1], k=start, dtype=np.int32, format='csr')
+    scores = (scores - scores.multiply(mask > 0)).tocsr()
+    scores.eliminate_zeros()
+    return scores
+
+
+def top(columns, scores, k):
+    """``(column, score)`` of the ``k`` highest scores, best first; ties go to the lower column."""
+    # rows only hold the user's two-hop neighbourhood, so a full sort is cheap
+    # and, unlike argpartition, keeps the tie-break exact
+    order = np.lexsort((columns, -scores))[:k]
+    return zip(columns[order].tolist(), scores[order].tolist())
+
+
+def compute(chunk_size=None, top_k=None):
+    """Replace every user's FollowSuggestion rows; returns how many were stored."""
+    chunk_size = chunk_size or settings.NEWSFEED_SUGGESTIONS_CHUNK
+    top_k = top_k or settings.NEWSFEED_SUGGESTIONS_TOP_K
+    started = timezone.now()
+    users, adjacency, excluded = load_graph()
+    stored = 0
+    for start in range(0, len(users), chunk_size):
+        stop = min(start + chunk_size, len(users))
+        scores = two_hop(adjacency, excluded, start, stop)
+        rows = []
+        for offset in range(stop - start):
+            first, last = scores.indptr[offset], scores.indptr[offset + 1]
+            rows.extend(
+                FollowSuggestion(
+                    user_id=int(users[start + offset]), suggested_id=int(users[column]),
+                    score=score, computed_at=started,
+                )
+                for column, score in top(scores.indices[first:last], scores.data[first:last], top_k)
+            )
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user__in=users[start:stop].tolist()).delete()
+            FollowSuggestion.objects.bulk_create(rows, batch_size=1000)
+        stored += len(rows)
+    # users without any relation left aren't in this run's chunks
+    FollowSuggestion.objects.filter(computed_at__lt=started).delete()
+    return stored
+
+
+def for_user(user, limit):
+    """Up to ``limit`` of ``user``'s stored suggestions, best first, still valid in the current graph."""
+    followed = Relation.objects.filter(src=user.id, kind__in=[Relation.FOLLOW, Relation.REQUEST]).values('dst')
+    return (
+        FollowSuggestion.objects.filter(user=user.id)
+        .exclude(suggested__in=followed)
+        .exclude(suggested__in=graph.blocked_either_way(user.id))
+        .select_related('suggested')
+        .order_by('-score', 'suggested')[:limit]
+    )
@@ -0,0 +1,59 @@
+from config import celery_app
+from socialmedia.newsfeed import (
+    images,
+    media,
+    pubsub,
+    suggestions,
+    timeline,
+    uploads,
+    vote_buffer,
+)
+from socialmedia.newsfeed.models import Comment, Status
+
+
+@celery_app.task()
+def fan_out_status(status_id):
+    """Push a freshly created status into its followers' home timelines."""
+    status = Status.objects.filter(id=status_id).first()
+    if status is None:
+        return 0
+    recipients = timeline.push_status(status)
+    channels = [pubsub.user_channel(user_id) for user_id in recipients]
+    if status.user_id in timeline.celebrity_ids():
+        channels.append(pubsub.author_channel(status.user_id))
+    pubsub.publish(channels, 'timeline', {'id': status.id, 'user': status.user_id})
+    return len(recipients)
+
+
+@celery_app.task()
+def trim_timelines():
+    """Cap every home timeline at NEWSFEED_TIMELINE_LENGTH entries."""
+    return timeline.trim()
+
+
+@celery_app.task()
+def flush_vote_counters():
+    """Write like/dislike deltas buffered by NEWSFEED_VOTE_WRITE_BEHIND to the database."""
+    return vote_buffer.flush()
+
+
+@celery_app.task()
+def process_photo(model_name, instance_id):
+    """Build the resized, EXIF-free renditions of a status or comment photo."""
+    model = {'status': Status, 'comment': Comment}[model_name]
+    instance = model.objects.filter(id=instance_id).first()
+    if instance is None or not uploads.adopt(instance):
+        return False
+    return images.process(instance)
+
+
+@celery_app.task()
+def collect_media():
+    """Delete photo files no Status or Comment has referenced for NEWSFEED_MEDIA_GC_GRACE."""
+    return uploads.expire() + media.collect_garbage()
+
+
+@celery_app.task(soft_time_limit=55 * 60, time_limit=60 * 60)
+def compute_follow_suggestions():
+    """Recompute every user's friends-of-friends FollowSuggestion rows."""
+    return suggestions.compute()
@@ -0,0 +1,31 @@
+import pytest
+from rest_framework.test import APIClient
+
+from socialmedia.newsfeed.tests.factories import CommentFactory
+
+
+@pytest.fixture
+def client_for():
+    """Build an APIClient authenticated as the given user."""
+    def make(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+    return make
+
+
+@pytest.fixture
+def reply():
+    """Create a reply to a comment, on the same status."""
+    def make(parent):
+        return CommentFactory(status=parent.status, base_comment=parent)
+    return make
+
+
+@pytest.fixture
+def counts():
+    """Read a status or comment's (like, dislike) counters from the database."""
+    def read(obj):
+        obj.refresh_from_db(fields=["like", "dislike"])
+        return obj.like, obj.dislike
+    return read
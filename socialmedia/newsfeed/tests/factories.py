@@ -0,0 +1,48 @@
+from factory import Faker, SubFactory
+from factory.django import DjangoModelFactory
+
+from socialmedia.newsfeed import stats
+from socialmedia.newsfeed.models import Comment, Relation, Status, UserRelationDetail
+from socialmedia.users.tests.factories import UserFactory
+
+
+class StatusFactory(DjangoModelFactory):
+
+    user = SubFactory(UserFactory)
+    status_text = Faker("sentence")
+
+    class Meta:
+        model = Status
+
+
+class CommentFactory(DjangoModelFactory):
+
+    status = SubFactory(StatusFactory)
+    user = SubFactory(UserFactory)
+    comment_text = Faker("sentence")
+
+    class Meta:
+        model = Comment
+
+
+def follow(follower, followee):
+    """Store an accepted follow the way UserRequestAcceptSerializer does."""
+    UserRelationDetail.objects.create(user=follower, following_list=followee)
+    UserRelationDetail.objects.create(user=followee, follower_list=follower)
+    Relation.objects.create(src=follower, dst=followee, kind=Relation.FOLLOW)
+    stats.adjust(follower.id, followings=1)
+    stats.adjust(followee.id, followers=1)
+
+
+def block(user, blocked):
+    UserRelationDetail.objects.create(user=user, block_list=blocked)
+    Relation.objects.create(src=user, dst=blocked, kind=Relation.BLOCK)
+    stats.adjust(user.id, blocks=1)
+
+
+def request_follow(user, user2):
+    UserRelationDetail.objects.create(user=user, req_sent=user2)
+    UserRelationDetail.objects.create(user=user2, req_rx=user)
+    Relation.objects.create(src=user, dst=user2, kind=Relation.REQUEST)
+    stats.adjust(user.id, req_sent=1)
+    stats.adjust(user2.id, req_rx=1)
@@ -0,0 +1,141 @@
+import pytest
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import PermissionDenied
+
+from socialmedia.newsfeed import graph, votes
+from socialmedia.newsfeed.models import Relation
+from socialmedia.newsfeed.tests.factories import (
+    CommentFactory,
+    StatusFactory,
+    block,
+    follow,
+    request_follow,
+)
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_bulk_vote_reports_each_item(client_for, counts):
+    author, voter, stranger = UserFactory.create_batch(3)
+    follow(voter, author)
+    liked, disliked = StatusFactory.create_batch(2, user=author)
+    hidden = StatusFactory(user=stranger)
+
+    response = client_for(voter).post("/api/status/bulk-vote/", {"votes": [
+        {"id": liked.id, "up_vote": True},
+        {"id": disliked.id, "down_vote": True},
+        {"id": liked.id, "up_vote": True},
+        {"id": hidden.id, "up_vote": True},
+        {"id": 0, "up_vote": True},
+    ]}, format="json")
+
+    assert response.status_code == 200
+    results = response.data["response"]
+    assert [item["status"] for item in results] == ["success", "success", "error", "error", "error"]
+    assert results[2]["errors"] == ["You already liked the status."]
+    assert results[4]["errors"] == ["This status does not exist."]
+    assert counts(liked) == (1, 0)
+    assert counts(disliked) == (0, 1)
+    assert counts(hidden) == (0, 0)
+
+
+def test_bulk_vote_reports_api_and_database_errors_per_item(monkeypatch, client_for, counts):
+    author, voter = UserFactory.create_batch(2)
+    follow(voter, author)
+    denied, broken, fine = StatusFactory.create_batch(3, user=author)
+    cast = votes.cast
+
+    def failing_cast(target, user_id, kind):
+        if target.id == denied.id:
+            raise PermissionDenied("Voting is closed.")
+        if target.id == broken.id:
+            cast(target, user_id, kind)
+            raise IntegrityError("duplicate key")
+        return cast(target, user_id, kind)
+
+    monkeypatch.setattr(votes, "cast", failing_cast)
+    response = client_for(voter).post("/api/status/bulk-vote/", {
+        "votes": [{"id": status.id, "up_vote": True} for status in (denied, broken, fine)]
+    }, format="json")
+
+    assert response.status_code == 200
+    results = response.data["response"]
+    assert [item["status"] for item in results] == ["error", "error", "success"]
+    assert results[0]["errors"] == "Voting is closed."
+    assert results[1]["errors"] == ["This item could not be saved."]
+    # the failed item's savepoint is rolled back, the rest is kept
+    assert [counts(status) for status in (denied, broken, fine)] == [(0, 0), (0, 0), (1, 0)]
+
+
+def test_bulk_comment_vote(client_for, counts):
+    author, voter = UserFactory.create_batch(2)
+    follow(voter, author)
+    comments = CommentFactory.create_batch(2, user=author, status=StatusFactory(user=author))
+
+    response = client_for(voter).post("/api/comment/bulk-vote/", {
+        "votes": [{"id": comment.id, "down_vote": True} for comment in comments]
+    }, format="json")
+
+    assert [item["status"] for item in response.data["response"]] == ["success", "success"]
+    assert [counts(comment) for comment in comments] == [(0, 1), (0, 1)]
+
+
+def test_bulk_vote_validates_with_set_based_queries(client_for):
+    voter = UserFactory()
+    statuses = [StatusFactory() for _ in range(6)]
+    client = client_for(voter)
+
+    def validation_queries(batch):
+        with CaptureQueriesContext(connection) as captured:
+            response = client.post("/api/status/bulk-vote/", {
+                "votes": [{"id": status.id, "up_vote": True} for status in batch]
+            }, format="json")
+        assert {item["status"] for item in response.data["response"]} == {"error"}
+        return [query for query in captured.captured_queries if "SAVEPOINT" not in query["sql"]]
+
+    assert len(validation_queries(statuses)) == len(validation_queries(statuses[:2]))
+
+
+def test_bulk_relations_apply_in_order(client_for):
+    user, requester, target, blocker, other = UserFactory.create_batch(5)
+    request_follow(requester, user)
+    block(blocker, user)
+
+    response = client_for(user).post("/api/userrelationdetail/bulk/", {"operations": [
+        {"action": "accept", "user2": requester.id},
+        {"action": "follow", "user2": target.id},
+        {"action": "follow", "user2": target.id},
+        {"action": "follow", "user2": blocker.id},
+        {"action": "block", "user2": other.id},
+        {"action": "unblock", "user2": other.id},
+        {"action": "follow", "user2": 0},
+    ]}, format="json")
+
+    assert response.status_code == 200
+    results = response.data["response"]
+    assert [item["status"] for item in results] == [
+        "success", "success", "error", "error", "success", "success", "error",
+    ]
+    assert results[2]["errors"] == {"non_field_errors": ["You already sent request to this user."]}
+    assert graph.is_following(requester.id, user.id)
+    assert graph.has_requested(user.id, target.id)
+    assert not Relation.objects.filter(src=user, dst=other).exists()
+
+
+def test_bulk_rejects_unknown_actions_and_oversized_batches(settings, client_for):
+    settings.NEWSFEED_BULK_MAX_ITEMS = 1
+    user, other = UserFactory.create_batch(2)
+    client = client_for(user)
+
+    response = client.post("/api/userrelationdetail/bulk/", {
+        "operations": [{"action": "poke", "user2": other.id}]
+    }, format="json")
+    assert response.status_code == 400
+
+    response = client.post("/api/userrelationdetail/bulk/", {
+        "operations": [{"action": "follow", "user2": other.id}] * 2
+    }, format="json")
+    assert response.status_code == 400
+    assert not graph.has_requested(user.id, other.id)
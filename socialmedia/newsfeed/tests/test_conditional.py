@@ -0,0 +1,103 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from socialmedia.newsfeed import payloads, timeline
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_status_detail_revalidates(django_capture_on_commit_callbacks, client_for):
+    author, voter = UserFactory.create_batch(2)
+    follow(voter, author)
+    status = StatusFactory(user=author)
+    client = client_for(voter)
+
+    response = client.get(f"/api/status/{status.id}/")
+    tag = response["ETag"]
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f"/api/status/{status.id}/", HTTP_IF_NONE_MATCH=tag)
+    assert response.status_code == 304
+    assert not [query for query in context.captured_queries if "newsfeed_" in query["sql"]]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.put(f"/api/status/{status.id}/vote/", {"up_vote": True})
+    response = client.get(f"/api/status/{status.id}/", HTTP_IF_NONE_MATCH=tag)
+    assert response.status_code == 200
+    assert response["ETag"] != tag
+
+
+def test_news_feed_revalidates_on_new_posts_and_comment_votes(django_capture_on_commit_callbacks, client_for):
+    reader, author = UserFactory.create_batch(2)
+    follow(reader, author)
+    status = StatusFactory(user=author)
+    comment = CommentFactory(status=status, user=author)
+    timeline.rebuild(reader)
+    client = client_for(reader)
+
+    tag = client.get("/api/news/")["ETag"]
+    assert client.get("/api/news/", HTTP_IF_NONE_MATCH=tag).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.put(f"/api/comment/{comment.id}/vote/", {"up_vote": True})
+    response = client.get("/api/news/", HTTP_IF_NONE_MATCH=tag)
+    assert response.status_code == 200
+    assert response.data["results"][0]["comment_list"][0]["like"] == 1
+    tag = response["ETag"]
+
+    timeline.push_status(StatusFactory(user=author))
+    assert client.get("/api/news/", HTTP_IF_NONE_MATCH=tag).status_code == 200
+
+
+def test_list_etag_depends_on_the_page(client_for):
+    user = UserFactory()
+    StatusFactory.create_batch(3, user=user)
+    client = client_for(user)
+
+    first = client.get("/api/mywall/", {"page_size": 2})
+    second = client.get(first.data["next"])
+
+    assert first["ETag"] != second["ETag"]
+    assert client.get(first.data["next"], HTTP_IF_NONE_MATCH=second["ETag"]).status_code == 304
+
+
+def test_evicted_generation_never_reuses_a_tag(django_capture_on_commit_callbacks, client_for):
+    user = UserFactory()
+    status = StatusFactory(user=user)
+    client = client_for(user)
+    before = client.get(f"/api/status/{status.id}/")["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        client.put(f"/api/status/{status.id}/vote/", {"up_vote": True})
+    tag = client.get(f"/api/status/{status.id}/")["ETag"]
+
+    # the counter is lost and the status changes again, back to its first state
+    cache.delete(payloads._generation_key("status", status.id))
+    with django_capture_on_commit_callbacks(execute=True):
+        client.put(f"/api/status/{status.id}/vote/", {"up_vote": True})
+
+    response = client.get(f"/api/status/{status.id}/", HTTP_IF_NONE_MATCH=f"{before}, {tag}")
+    assert response.status_code == 200
+    assert response["ETag"] not in (before, tag)
+
+
+class DeadCache:
+    """A cache whose backend is down, as django-redis reports it under IGNORE_EXCEPTIONS."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def test_no_tag_without_generations(monkeypatch, client_for):
+    user = UserFactory()
+    status = StatusFactory(user=user)
+    client = client_for(user)
+    tag = client.get(f"/api/status/{status.id}/")["ETag"]
+    monkeypatch.setattr(payloads, "cache", DeadCache())
+
+    response = client.get(f"/api/status/{status.id}/", HTTP_IF_NONE_MATCH=tag)
+    assert response.status_code == 200
+    assert "ETag" not in response
+    assert response.data["id"] == status.id
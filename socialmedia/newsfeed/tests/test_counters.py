@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+
+from socialmedia.newsfeed import votes
+from socialmedia.newsfeed.api.serializers import CommentUpdateSerializer
+from socialmedia.newsfeed.models import Comment, Status
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def comment_count(status):
+    return Status.objects.get(id=status.id).comments
+
+
+def reply_count(comment):
+    return Comment.objects.get(id=comment.id).comments_on_comment
+
+
+def test_comment_and_reply_counters_through_the_api(client_for):
+    user = UserFactory()
+    status = StatusFactory(user=user)
+    client = client_for(user)
+
+    response = client.post(
+        "/api/comment/", {"status": status.id, "base_comment": "", "comment_text": "first", "comment_photo": ""}
+    )
+    assert response.status_code == 201
+    root_id = response.data["response"]["id"]
+    response = client.post(
+        "/api/comment/", {"status": "", "base_comment": root_id, "comment_text": "reply", "comment_photo": ""}
+    )
+    assert response.status_code == 201
+
+    assert comment_count(status) == 2
+    assert reply_count(Comment(id=root_id)) == 1
+
+    response = client.delete(f"/api/comment/{root_id}/")
+    assert response.status_code == 204
+    assert comment_count(status) == 0
+
+
+def test_deleting_a_nested_reply_subtracts_its_whole_subtree(reply):
+    root = CommentFactory()
+    child = reply(root)
+    reply(reply(child))
+    reply(root)
+    assert comment_count(root.status) == 5
+
+    Comment.objects.get(id=child.id).delete()
+
+    assert comment_count(root.status) == 2
+    assert reply_count(root) == 1
+
+
+def test_editing_a_stale_comment_keeps_counters_and_thread_fields(reply, counts):
+    root = CommentFactory()
+    stale = Comment.objects.get(id=root.id)
+    reply(reply(root))
+    votes.cast(root, UserFactory().id, votes.LIKE)
+
+    serializer = CommentUpdateSerializer(
+        stale, data={"comment_text": "edited"}, context={"request": SimpleNamespace(user=root.user)}
+    )
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+
+    saved = Comment.objects.get(id=root.id)
+    assert (saved.comment_text, saved.comments_on_comment, saved.descendants) == ("edited", 1, 2)
+    assert saved.path == root.path
+    assert counts(root) == (1, 0)
@@ -0,0 +1,81 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+
+from socialmedia.newsfeed import graph
+from socialmedia.newsfeed.models import Relation, UserRelationDetail
+from socialmedia.newsfeed.tests.factories import block, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_predicates(django_assert_num_queries):
+    first, second, third = UserFactory.create_batch(3)
+    follow(first, second)
+    block(third, first)
+
+    with django_assert_num_queries(1):
+        assert graph.is_following(first.id, second.id)
+    with django_assert_num_queries(1):
+        assert graph.is_blocked_either_way(first.id, third.id)
+    assert not graph.is_following(second.id, first.id)
+    assert not graph.is_blocked_either_way(first.id, second.id)
+    assert list(graph.followers_of(second.id)) == [first.id]
+    assert list(graph.followees_of(first.id)) == [second.id]
+    assert graph.blocked_either_way(first.id) == {third.id}
+
+
+def test_follow_request_flow_writes_edges(client_for):
+    user, user2 = UserFactory.create_batch(2)
+
+    response = client_for(user).post("/api/userrelationdetail/follow/", {"user2": user2.id})
+    assert response.status_code == 201
+    assert graph.has_requested(user.id, user2.id)
+
+    response = client_for(user2).post("/api/userrelationdetail/accept/", {"user2": user.id})
+    assert response.status_code == 201
+    assert graph.is_following(user.id, user2.id)
+    assert not graph.has_requested(user.id, user2.id)
+    assert UserRelationDetail.objects.filter(user=user, following_list=user2).exists()
+
+    response = client_for(user2).post("/api/userrelationdetail/remove_follower/", {"user2": user.id})
+    assert response.status_code == 204
+    assert not graph.is_following(user.id, user2.id)
+    assert not UserRelationDetail.objects.filter(user=user, following_list=user2).exists()
+
+
+def test_follow_rejected_when_blocked(client_for):
+    user, user2 = UserFactory.create_batch(2)
+    block(user2, user)
+
+    response = client_for(user).post("/api/userrelationdetail/follow/", {"user2": user2.id})
+
+    assert response.status_code == 400
+    assert not graph.has_requested(user.id, user2.id)
+
+
+def test_cannot_follow_yourself(client_for):
+    user = UserFactory()
+
+    response = client_for(user).post("/api/userrelationdetail/follow/", {"user2": user.id})
+
+    assert response.status_code == 400
+
+
+def test_copy_relations_migration():
+    first, second, third = UserFactory.create_batch(3)
+    UserRelationDetail.objects.create(user=first, following_list=second)
+    UserRelationDetail.objects.create(user=second, follower_list=first)
+    UserRelationDetail.objects.create(user=third, block_list=first)
+    UserRelationDetail.objects.create(user=second, req_rx=third)
+
+    migration = import_module("socialmedia.newsfeed.migrations.0027_copy_userrelationdetail_to_relation")
+    migration.copy_relations(apps, None)
+
+    assert set(Relation.objects.values_list("src", "kind", "dst")) == {
+        (first.id, Relation.FOLLOW, second.id),
+        (third.id, Relation.BLOCK, first.id),
+        (third.id, Relation.REQUEST, second.id),
+    }
@@ -0,0 +1,89 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from socialmedia.newsfeed import images
+from socialmedia.newsfeed.models import MediaBlob, Status
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def photo(size=(1200, 800), name="photo.jpg"):
+    image = Image.new("RGB", size, (200, 40, 40))
+    exif = Image.Exif()
+    exif[0x0110] = "Secret Camera"  # Model
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+def test_process_builds_exif_free_renditions():
+    status = StatusFactory(status_photo=photo())
+
+    assert images.process(status)
+
+    status.refresh_from_db()
+    # the orientation tag was applied before resizing
+    assert (status.photo_width, status.photo_height) == (800, 1200)
+    assert len(status.photo_blurhash) == 28
+    thumb = status.photo_renditions["thumb"]
+    assert (thumb["width"], thumb["height"]) == (213, 320)
+    assert status.photo_renditions["large"]["height"] == 1200
+    for entry in status.photo_renditions.values():
+        for extension, _, _ in images.FORMATS:
+            with Status._meta.get_field("status_photo").storage.open(entry[extension]) as rendition:
+                assert not Image.open(rendition).getexif()
+
+
+def test_renditions_are_shared_and_reference_counted():
+    first, second = StatusFactory(status_photo=photo()), StatusFactory(status_photo=photo())
+    images.process(first)
+    images.process(second)
+    images.process(second)
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    names = images.rendition_names(first.photo_renditions)
+    assert names == images.rendition_names(second.photo_renditions)
+    assert set(MediaBlob.objects.filter(name__in=names).values_list("refs", flat=True)) == {2}
+
+    second.delete()
+    assert set(MediaBlob.objects.filter(name__in=names).values_list("refs", flat=True)) == {1}
+
+
+def test_comment_without_photo_is_skipped():
+    assert not images.process(CommentFactory())
+
+
+def test_blurhash_of_a_flat_image():
+    assert images.blurhash(Image.new("RGB", (10, 10), (255, 255, 255)), components=(1, 1)) == "00TSUA"
+
+
+def test_upload_is_processed_after_commit(django_capture_on_commit_callbacks, client_for):
+    user = UserFactory()
+    client = client_for(user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(
+            "/api/status/", {"status_text": "", "status_photo": photo()}, format="multipart"
+        )
+
+    assert response.status_code == 201
+    assert response.data["response"]["photo"] is None
+    status_id = response.data["response"]["id"]
+    assert Status.objects.get(id=status_id).photo_renditions
+
+    response = client.get(f"/api/status/{status_id}/")
+    renditions = response.data["photo"]["renditions"]
+    assert set(renditions) == {"thumb", "medium", "large"}
+    assert renditions["thumb"]["jpeg"].endswith(".jpeg")
@@ -0,0 +1,130 @@
+import random
+from datetime import timedelta
+
+import pytest
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.utils import timezone
+
+from socialmedia.newsfeed.models import (
+    Comment,
+    CommentVoteTracker,
+    Relation,
+    Status,
+    StatusVoteTracker,
+    TimelineEntry,
+    UserRelationDetail,
+)
+from socialmedia.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+WORDS = ["coffee", "morning", "city", "music", "weekend", "friends", "travel", "sunset", "book", "dinner"]
+RELATION_FIELDS = {
+    Relation.FOLLOW: [("following_list", False), ("follower_list", True)],
+    Relation.BLOCK: [("block_list", False)],
+    Relation.REQUEST: [("req_sent", False), ("req_rx", True)],
+}
+
+
+def sample_pairs(rng, left, right, count):
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((rng.choice(left), rng.choice(right)))
+    return sorted(pairs)
+
+
+def seed(rng):
+    """A few thousand rows per table, spread over users and statuses the way a live site's are."""
+    now = timezone.now()
+    users = [user.id for user in User.objects.bulk_create(
+        User(username=f"member{number}", password="") for number in range(300)
+    )]
+    statuses = [status.id for status in Status.objects.bulk_create(
+        Status(
+            user_id=rng.choice(users),
+            status_text=" ".join(rng.sample(WORDS, 4) + (["garden"] if number % 100 == 0 else [])),
+            created_at=now - timedelta(minutes=number),
+        )
+        for number in range(2000)
+    )]
+    roots = Comment.objects.bulk_create(
+        Comment(
+            status_id=rng.choice(statuses),
+            user_id=rng.choice(users),
+            comment_text=" ".join(rng.sample(WORDS, 3) + (["garden"] if number % 100 == 0 else [])),
+            created_at=now - timedelta(minutes=number),
+        )
+        for number in range(3000)
+    )
+    replies = Comment.objects.bulk_create(
+        Comment(status_id=parent.status_id, base_comment=parent, user_id=rng.choice(users), comment_text="same here")
+        for parent in rng.sample(roots, 1000)
+    )
+    Status.objects.update(search_vector=SearchVector("status_text"))
+    Comment.objects.update(search_vector=SearchVector("comment_text"))
+
+    StatusVoteTracker.objects.bulk_create(
+        StatusVoteTracker(status_id=status, user_id=user, vote=True)
+        for status, user in sample_pairs(rng, statuses, users, 4000)
+    )
+    comment_ids = [comment.id for comment in roots + replies]
+    CommentVoteTracker.objects.bulk_create(
+        CommentVoteTracker(comment_id=comment, user_id=user, vote=True)
+        for comment, user in sample_pairs(rng, comment_ids, users, 4000)
+    )
+    relations = [
+        (src, rng.choice([Relation.FOLLOW] * 8 + [Relation.BLOCK, Relation.REQUEST]), dst)
+        for src, dst in sample_pairs(rng, users, users, 4000) if src != dst
+    ]
+    Relation.objects.bulk_create(Relation(src_id=src, kind=kind, dst_id=dst) for src, kind, dst in relations)
+    UserRelationDetail.objects.bulk_create(
+        UserRelationDetail(**{"user_id": dst if mirrored else src, f"{field}_id": src if mirrored else dst})
+        for src, kind, dst in relations for field, mirrored in RELATION_FIELDS[kind]
+    )
+    TimelineEntry.objects.bulk_create(
+        TimelineEntry(owner_id=owner, status_id=status) for owner, status in sample_pairs(rng, users, statuses, 8000)
+    )
+    with connection.cursor() as cursor:
+        for model in (User, Status, Comment, StatusVoteTracker, CommentVoteTracker, Relation, UserRelationDetail,
+                      TimelineEntry):
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+    return relations, statuses
+
+
+def hot_queries(relations, statuses):
+    """``(queryset, index)`` for each hot lookup, with arguments taken from the seeded rows."""
+    src, _, dst = next(relation for relation in relations if relation[1] == Relation.FOLLOW)
+    details = [
+        (UserRelationDetail.objects.filter(**{"user": row.user_id, field: getattr(row, f"{field}_id")}),
+         f"newsfeed_relationdetail_user_{field}")
+        for field in ("following_list", "follower_list", "block_list", "req_rx", "req_sent")
+        for row in [UserRelationDetail.objects.filter(**{f"{field}__isnull": False}).first()]
+    ]
+    vote = StatusVoteTracker.objects.first()
+    comment_vote = CommentVoteTracker.objects.first()
+    parent = Comment.objects.filter(base_comment__isnull=False).first().base_comment_id
+    return details + [
+        (StatusVoteTracker.objects.filter(status=vote.status_id, user=vote.user_id),
+         "newsfeed_statusvotetracker_status_user"),
+        (CommentVoteTracker.objects.filter(comment=comment_vote.comment_id, user=comment_vote.user_id),
+         "newsfeed_commentvotetracker_comment_user"),
+        (Comment.objects.filter(status=statuses[0]).order_by("-created_at", "-id")[:3], "newsfeed_comment_status_time"),
+        (Comment.objects.filter(base_comment=parent), "newsfeed_comment_base_comment_id"),
+        (Relation.objects.filter(src=src, kind=Relation.FOLLOW, dst=dst), "newsfeed_relation_src_kind_dst"),
+        (Relation.objects.filter(dst=dst, kind=Relation.FOLLOW), "newsfeed_relation_dst_kind_src"),
+        (TimelineEntry.objects.filter(owner=src, status_id__gt=statuses[len(statuses) // 2]),
+         "newsfeed_timelineentry_owner_status"),
+        (Status.objects.filter(search_vector=SearchQuery("garden")), "newsfeed_status_search"),
+        (Comment.objects.filter(search_vector=SearchQuery("garden")), "newsfeed_comment_search"),
+    ]
+
+
+def test_hot_queries_use_their_index():
+    # one seeded graph for every query: realistic row counts and fresh
+    # statistics, so the plan is the one the planner would pick in production
+    queries = hot_queries(*seed(random.Random(0)))
+
+    misses = [(index, plan) for queryset, index in queries for plan in [queryset.explain()] if index not in plan]
+
+    assert misses == []
@@ -0,0 +1,74 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from socialmedia.newsfeed.models import MediaBlob, Status
+from socialmedia.newsfeed.tasks import collect_media
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory
+from socialmedia.utils.content_storage import ContentAddressedFileSystemStorage
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def upload(color=(0, 120, 200), name="meme.PNG"):
+    buffer = BytesIO()
+    Image.new("RGB", (40, 40), color).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+def storage():
+    return Status._meta.get_field("status_photo").storage
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    backend = ContentAddressedFileSystemStorage(location=str(tmp_path))
+
+    first = backend.save("upload_image/a.PNG", upload())
+    second = backend.save("upload_image/b.png", upload())
+    other = backend.save("upload_image/c.png", upload(color=(1, 2, 3)))
+
+    assert first == second
+    assert first.startswith("upload_image/") and first.endswith(".png")
+    assert other != first
+    assert len(list((tmp_path / "upload_image").rglob("*.png"))) == 2
+
+
+def test_references_span_statuses_and_comments():
+    status = StatusFactory(status_photo=upload())
+    comment = CommentFactory(comment_photo=upload(name="repost.png"))
+
+    assert status.status_photo.name == comment.comment_photo.name
+    assert MediaBlob.objects.get(name=status.status_photo.name).refs == 2
+
+    status.delete()
+    blob = MediaBlob.objects.get(name=comment.comment_photo.name)
+    assert (blob.refs, blob.released_at) == (1, None)
+
+
+def test_garbage_collection_respects_the_grace_period(settings):
+    status = StatusFactory(status_photo=upload())
+    name = status.status_photo.name
+    status.delete()
+
+    assert collect_media() == 0
+    assert storage().exists(name)
+
+    settings.NEWSFEED_MEDIA_GC_GRACE = 0
+    assert collect_media() == 1
+    assert not storage().exists(name)
+    assert not MediaBlob.objects.filter(name=name).exists()
+
+
+def test_referenced_files_survive_collection(settings):
+    settings.NEWSFEED_MEDIA_GC_GRACE = 0
+    status = StatusFactory(status_photo=upload())
+
+    assert collect_media() == 0
+    assert storage().exists(status.status_photo.name)
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def walk(client, url, **params):
+    ids = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.data["results"]]
+        if not response.data["next"]:
+            return ids, response
+        response = client.get(response.data["next"])
+
+
+def test_pages_break_ties_on_id(client_for):
+    user = UserFactory()
+    now = timezone.now()
+    statuses = [StatusFactory(user=user, created_at=now) for _ in range(5)]
+    older = StatusFactory(user=user, created_at=now - timedelta(minutes=1))
+
+    ids, _ = walk(client_for(user), "/api/status/", page_size=2)
+
+    assert ids == [status.id for status in reversed(statuses)] + [older.id]
+
+
+def test_inserts_between_pages_do_not_shift_the_walk(client_for):
+    user = UserFactory()
+    statuses = StatusFactory.create_batch(4, user=user)
+    client = client_for(user)
+
+    first = client.get("/api/mywall/", {"page_size": 2})
+    StatusFactory(user=user)
+    second = client.get(first.data["next"])
+
+    ids = [item["id"] for item in first.data["results"] + second.data["results"]]
+    assert ids == [status.id for status in reversed(statuses)]
+    assert second.data["next"] is None
+
+
+def test_previous_link_returns_the_earlier_page(client_for):
+    user = UserFactory()
+    CommentFactory.create_batch(5, user=user)
+    client = client_for(user)
+
+    first = client.get("/api/comment/", {"page_size": 2})
+    second = client.get(first.data["next"])
+    back = client.get(second.data["previous"])
+
+    assert [item["id"] for item in back.data["results"]] == [item["id"] for item in first.data["results"]]
+    assert back.data["previous"] is None
+
+
+def test_invalid_cursor_is_not_found(client_for):
+    response = client_for(UserFactory()).get("/api/status/", {"cursor": "bm9wZQ=="})
+
+    assert response.status_code == 404
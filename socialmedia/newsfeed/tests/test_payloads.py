@@ -0,0 +1,79 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from socialmedia.newsfeed import payloads
+from socialmedia.newsfeed.models import Status
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def table_queries(queries):
+    return [query["sql"] for query in queries if "newsfeed_" in query["sql"]]
+
+
+def test_hot_status_is_served_from_the_cache(django_capture_on_commit_callbacks, client_for):
+    user = UserFactory()
+    status = StatusFactory(user=user, status_text="before")
+    client = client_for(user)
+    client.get(f"/api/status/{status.id}/")
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f"/api/status/{status.id}/")
+    assert response.data["status_text"] == "before"
+    assert table_queries(context.captured_queries) == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.put(f"/api/status/{status.id}/", {"status_text": "after"})
+    assert client.get(f"/api/status/{status.id}/").data["status_text"] == "after"
+
+
+def test_votes_and_comments_invalidate(django_capture_on_commit_callbacks, client_for):
+    author, voter = UserFactory.create_batch(2)
+    follow(voter, author)
+    status = StatusFactory(user=author)
+    comment = CommentFactory(user=author, status=status)
+    client = client_for(voter)
+    client.get(f"/api/status/{status.id}/")
+    client.get(f"/api/comment/{comment.id}/")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.put(f"/api/status/{status.id}/vote/", {"up_vote": True})
+        CommentFactory(status=status, base_comment=comment)
+
+    assert client.get(f"/api/status/{status.id}/").data["like"] == 1
+    assert client.get(f"/api/status/{status.id}/").data["comments"] == 2
+    assert client.get(f"/api/comment/{comment.id}/").data["comments_on_comment"] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Status.objects.get(id=status.id).delete()
+    assert client.get(f"/api/status/{status.id}/").status_code == 404
+
+
+def test_payload_built_during_a_change_is_not_reused():
+    request = APIRequestFactory().get("/")
+    builds = []
+
+    def build():
+        builds.append(1)
+        payloads._bump("status", [1])
+        return {"version": len(builds)}
+
+    assert payloads.read_through(Status, 1, request, build) == {"version": 1}
+    assert payloads.read_through(Status, 1, request, lambda: {"version": 2}) == {"version": 2}
+    assert payloads.read_through(Status, 1, request, build) == {"version": 2}
+
+
+def test_waiters_fall_back_to_building_when_the_lock_holder_stalls(monkeypatch):
+    monkeypatch.setattr(payloads, "WAIT_STEPS", 1)
+    monkeypatch.setattr(payloads, "WAIT_INTERVAL", 0)
+    request = APIRequestFactory().get("/")
+    cache.add("newsfeed:payload:status:7:lock", 1)
+
+    assert payloads.read_through(Status, 7, request, lambda: {"id": 7}) == {"id": 7}
+    # the stalled holder still owns the lock
+    assert cache.get("newsfeed:payload:status:7:lock") == 1
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from django.utils import timezone
+
+from socialmedia.newsfeed import ranking, timeline, votes
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def post(author, **kwargs):
+    status = StatusFactory(user=author, **kwargs)
+    timeline.push_status(status)
+    return status
+
+
+def test_score_decays_with_age_and_grows_with_engagement():
+    scores = ranking.score(
+        age_hours=np.array([0.0, 24.0, 0.0, 0.0]),
+        likes=np.array([0.0, 0.0, 10.0, 0.0]),
+        dislikes=np.array([0.0, 0.0, 0.0, 0.0]),
+        comments=np.array([0.0, 0.0, 0.0, 0.0]),
+        affinity=np.array([0.0, 0.0, 0.0, 5.0]),
+    )
+
+    assert scores[0] == pytest.approx(4 * scores[1])
+    assert scores[2] > scores[0]
+    assert scores[3] > scores[0]
+
+
+def test_top_keeps_the_best_and_breaks_ties_by_recency():
+    ids = np.array([1, 2, 3, 4, 5])
+    scores = np.array([0.5, 0.9, 0.1, 0.9, 0.3])
+
+    assert ranking.top(ids, scores, 3) == [4, 2, 1]
+    assert ranking.top(ids, scores, 10) == [4, 2, 1, 5, 3]
+
+
+def test_top_only_sorts_the_k_best_of_thousands(monkeypatch):
+    size = 5000
+    generator = np.random.default_rng(0)
+    ids = np.arange(size)
+    # rounded, so plenty of ties cross the cut-off
+    scores = ranking.score(*[generator.random(size) * 100 for _ in range(5)]).round(1)
+    sorted_lengths = []
+    lexsort = np.lexsort
+
+    def counting_lexsort(keys):
+        sorted_lengths.append(len(keys[0]))
+        return lexsort(keys)
+
+    monkeypatch.setattr(np, "lexsort", counting_lexsort)
+    chosen = ranking.top(ids, scores, 300)
+
+    # a full sort would order all 5000
+    assert len(sorted_lengths) == 1 and sorted_lengths[0] < 500
+    assert chosen == sorted(range(size), key=lambda i: (-scores[i], -i))[:300]
+
+
+def test_ranking_queries_do_not_grow_with_the_timeline(django_assert_num_queries):
+    viewer = UserFactory()
+    for author in UserFactory.create_batch(4):
+        follow(viewer, author)
+        for status in [post(author) for _ in range(5)]:
+            CommentFactory(user=viewer, status=status)
+
+    # timeline candidates and the viewer's likes and comments per author
+    with django_assert_num_queries(3):
+        assert len(ranking.rank(viewer)) == 20
+
+
+def test_ranked_news_feed(django_assert_num_queries, client_for):
+    viewer, friend, other = UserFactory.create_batch(3)
+    follow(viewer, friend)
+    follow(viewer, other)
+    stale = post(friend, created_at=timezone.now() - timedelta(days=3), like=50)
+    plain = post(other)
+    favourite = post(friend)
+    CommentFactory(user=viewer, status=stale)
+    votes.cast(stale, viewer.id, votes.LIKE)
+    client = client_for(viewer)
+
+    response = client.get("/api/news/", {"order": "ranked", "limit": 2})
+
+    assert response.status_code == 200
+    assert response.data["count"] == 3
+    assert [item["id"] for item in response.data["results"]] == [favourite.id, plain.id]
+    assert "offset=2" in response.data["next"]
+
+    # the ranked order is cached for the viewer, new statuses wait for it to expire
+    post(other)
+    with django_assert_num_queries(0):
+        assert ranking.ranked_ids(viewer) == [favourite.id, plain.id, stale.id]
+
+
+def test_unknown_order_is_rejected(client_for):
+    response = client_for(UserFactory()).get("/api/news/", {"order": "random"})
+
+    assert response.status_code == 400
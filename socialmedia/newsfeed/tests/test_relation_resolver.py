@@ -0,0 +1,84 @@
+import pytest
+from django.test import RequestFactory
+
+from socialmedia.newsfeed import graph
+from socialmedia.newsfeed.api.serializers import (
+    CommentVotesUpdateSerializer,
+    UserFollowSerializer,
+)
+from socialmedia.newsfeed.tests.factories import (
+    CommentFactory,
+    StatusFactory,
+    block,
+    follow,
+    request_follow,
+)
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_resolver_loads_all_edges_in_one_query(django_assert_num_queries):
+    viewer, first, second, third = UserFactory.create_batch(4)
+    follow(viewer, first)
+    follow(second, viewer)
+    block(third, viewer)
+    request_follow(viewer, third)
+
+    resolver = graph.RelationResolver(viewer.id)
+    with django_assert_num_queries(1):
+        resolver.load([first.id, second.id, third.id])
+        assert resolver.follows(first.id)
+        assert not resolver.follows(second.id)
+        assert resolver.is_followed_by(second.id)
+        assert resolver.is_blocked_by(third.id)
+        assert resolver.is_blocked_either_way(third.id)
+        assert not resolver.has_blocked(third.id)
+        assert resolver.has_requested(third.id)
+
+
+def test_resolver_forget_reloads():
+    viewer, other = UserFactory.create_batch(2)
+    resolver = graph.RelationResolver(viewer.id)
+    assert not resolver.follows(other.id)
+
+    follow(viewer, other)
+    assert not resolver.follows(other.id)
+    resolver.forget(other.id)
+    assert resolver.follows(other.id)
+
+
+def test_resolver_is_memoized_per_request(rf: RequestFactory):
+    request = rf.get("/fake-url/")
+    request.user = UserFactory()
+
+    assert graph.resolver_for(request) is graph.resolver_for(request)
+
+
+def test_follow_validation_is_one_query(rf: RequestFactory, django_assert_num_queries):
+    user, user2 = UserFactory.create_batch(2)
+    request = rf.post("/fake-url/")
+    request.user = user
+
+    serializer = UserFollowSerializer(data={"user2": user2.id}, context={"request": request})
+    with django_assert_num_queries(1):
+        assert serializer.is_valid()
+
+
+def test_comment_vote_checks_are_one_query(rf: RequestFactory, django_assert_num_queries):
+    voter, status_author, base_author, author = UserFactory.create_batch(4)
+    for followee in (status_author, base_author, author):
+        follow(voter, followee)
+    status = StatusFactory(user=status_author)
+    base_comment = CommentFactory(status=status, user=base_author)
+    comment = CommentFactory(status=status, base_comment=base_comment, user=author)
+    comment = type(comment).objects.select_related("status", "base_comment").get(id=comment.id)
+    request = rf.put("/fake-url/")
+    request.user = voter
+
+    serializer = CommentVotesUpdateSerializer(
+        comment, data={"up_vote": None, "down_vote": None}, partial=True, context={"request": request}
+    )
+    with django_assert_num_queries(1):
+        assert not serializer.is_valid()
+    assert serializer.errors["non_field_errors"] == ["Either like it or not."]
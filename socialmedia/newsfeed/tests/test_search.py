@@ -0,0 +1,76 @@
+import pytest
+
+from socialmedia.newsfeed import search
+from socialmedia.newsfeed.models import Status
+from socialmedia.newsfeed.tests.factories import (
+    CommentFactory,
+    StatusFactory,
+    block,
+    follow,
+)
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def found(queryset):
+    return list(queryset.values_list("id", flat=True))
+
+
+def test_status_search_ranks_visible_matches():
+    viewer, friend, stranger, blocker = UserFactory.create_batch(4)
+    follow(viewer, friend)
+    follow(viewer, blocker)
+    block(blocker, viewer)
+    best = StatusFactory(user=friend, status_text="Gardens, gardening and more gardens")
+    own = StatusFactory(user=viewer, status_text="My garden in spring")
+    StatusFactory(user=friend, status_text="Nothing to see here")
+    StatusFactory(user=stranger, status_text="A stranger's garden")
+    StatusFactory(user=blocker, status_text="Garden of a blocker")
+
+    assert found(search.statuses(viewer, "garden")) == [best.id, own.id]
+    assert found(search.statuses(viewer, '"in spring"')) == [own.id]
+    assert found(search.statuses(viewer, "garden -spring")) == [best.id]
+
+
+def test_search_vector_follows_text_updates():
+    user = UserFactory()
+    status = StatusFactory(user=user, status_text="old words")
+
+    status.status_text = "fresh words"
+    status.save()
+    assert found(search.statuses(user, "fresh")) == [status.id]
+    assert found(search.statuses(user, "old")) == []
+
+    # saves that leave the text out don't recompute the vector
+    Status.objects.filter(id=status.id).update(status_text="ignored")
+    status.refresh_from_db()
+    status.save(update_fields=["like"])
+    assert found(search.statuses(user, "fresh")) == [status.id]
+
+
+def test_comment_search_checks_the_status_author_too():
+    viewer, friend, stranger = UserFactory.create_batch(3)
+    follow(viewer, friend)
+    visible = CommentFactory(user=friend, status=StatusFactory(user=friend), comment_text="lovely photo")
+    CommentFactory(user=friend, status=StatusFactory(user=stranger), comment_text="lovely view")
+
+    assert found(search.comments(viewer, "lovely")) == [visible.id]
+
+
+def test_search_endpoint(client_for):
+    user = UserFactory()
+    status = StatusFactory(user=user, status_text="searching for answers")
+    comment = CommentFactory(user=user, status=status, comment_text="answers found")
+    client = client_for(user)
+
+    response = client.get("/api/search/", {"q": "answer"})
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+    assert [item["id"] for item in response.data["results"]] == [status.id]
+
+    response = client.get("/api/search/", {"q": "answer", "type": "comment"})
+    assert [item["id"] for item in response.data["results"]] == [comment.id]
+
+    assert client.get("/api/search/").status_code == 400
+    assert client.get("/api/search/", {"q": "x", "type": "user"}).status_code == 400
@@ -0,0 +1,82 @@
+import pytest
+
+from socialmedia.newsfeed.models import UserStats
+from socialmedia.newsfeed.tests.factories import StatusFactory, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def counters(user):
+    return UserStats.objects.filter(user=user).values(
+        "statuses", "followers", "followings", "blocks", "req_rx", "req_sent"
+    ).get()
+
+
+def test_stats_row_created_with_user():
+    assert counters(UserFactory()) == {
+        "statuses": 0, "followers": 0, "followings": 0, "blocks": 0, "req_rx": 0, "req_sent": 0,
+    }
+
+
+def test_status_counter_follows_create_and_delete():
+    user = UserFactory()
+    status = StatusFactory(user=user)
+    StatusFactory(user=user)
+    assert counters(user)["statuses"] == 2
+
+    status.delete()
+    assert counters(user)["statuses"] == 1
+
+
+def test_relation_counters_follow_the_graph(client_for):
+    user, user2 = UserFactory.create_batch(2)
+
+    client_for(user).post("/api/userrelationdetail/follow/", {"user2": user2.id})
+    assert counters(user)["req_sent"] == 1
+    assert counters(user2)["req_rx"] == 1
+
+    client_for(user2).post("/api/userrelationdetail/accept/", {"user2": user.id})
+    assert counters(user) == {
+        "statuses": 0, "followers": 0, "followings": 1, "blocks": 0, "req_rx": 0, "req_sent": 0,
+    }
+    assert counters(user2)["followers"] == 1
+    assert counters(user2)["req_rx"] == 0
+
+    client_for(user).post("/api/userrelationdetail/unfollow/", {"user2": user2.id})
+    assert counters(user)["followings"] == 0
+    assert counters(user2)["followers"] == 0
+
+    client_for(user).post("/api/userrelationdetail/block/", {"user2": user2.id})
+    assert counters(user)["blocks"] == 1
+    client_for(user).post("/api/userrelationdetail/unblock/", {"user2": user2.id})
+    assert counters(user)["blocks"] == 0
+
+
+def test_relation_list_is_paginated_with_constant_queries(django_assert_max_num_queries, client_for):
+    viewer = UserFactory()
+    for _ in range(5):
+        follow(UserFactory(), UserFactory())
+
+    # one page query and one stats query, wrapped in the ATOMIC_REQUESTS savepoint
+    with django_assert_max_num_queries(4):
+        response = client_for(viewer).get("/api/userrelationdetail/", {"page_size": 4})
+
+    assert response.status_code == 200
+    assert len(response.data["results"]) == 4
+    assert response.data["next"]
+    row = response.data["results"][0]
+    assert [entry["id"] for entry in row["user_list"]] == [
+        UserStats.objects.get(user__username=row["user"]).user_id,
+        row["follower_list"],
+    ]
+    assert row["user_list"][0]["no_of_followers"] == 1
+
+
+def test_stats_action_lists_every_user(client_for):
+    users = UserFactory.create_batch(3)
+
+    response = client_for(users[0]).get("/api/userrelationdetail/stats/")
+
+    assert response.status_code == 200
+    assert {entry["id"] for entry in response.data["results"]} == {user.id for user in users}
@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core import signing
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from socialmedia.newsfeed import pubsub, stream, votes
+from socialmedia.newsfeed.tasks import fan_out_status
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def scope_for(query):
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": stream.PATH,
+        "query_string": query.encode(),
+        "headers": [],
+    }
+
+
+def open_stream(query, action, expected):
+    """Run the stream for ``query``, call ``action`` once connected and collect ``expected`` events."""
+    async def scenario():
+        sent = []
+        hang_up = asyncio.Event()
+
+        async def receive():
+            await hang_up.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        async def wait_for(count):
+            while len(sent) < count:
+                await asyncio.sleep(0.01)
+
+        connection = asyncio.ensure_future(stream.application(scope_for(query), receive, send))
+        await asyncio.wait_for(wait_for(2), 5)
+        if sent[0]["status"] != 200:
+            await connection
+            return sent
+        await sync_to_async(action)()
+        await asyncio.wait_for(wait_for(2 + expected), 5)
+        hang_up.set()
+        await asyncio.wait_for(connection, 5)
+        return sent
+
+    return async_to_sync(scenario)()
+
+
+def events(sent):
+    result = []
+    for message in sent[2:]:
+        event, data = message["body"].decode().strip().split("\n")
+        result.append((event.split(": ", 1)[1], json.loads(data.split(": ", 1)[1])))
+    return result
+
+
+def test_local_backend_delivers_to_subscribers_of_the_channel():
+    backend = pubsub.LocalBackend()
+
+    async def scenario():
+        messages = backend.subscribe(["status:1"])
+        first = asyncio.ensure_future(messages.__anext__())
+        await asyncio.sleep(0)
+        backend.publish(["status:2"], "ignored")
+        backend.publish(["status:1", "status:2"], "hello")
+        received = await asyncio.wait_for(first, 5)
+        await messages.aclose()
+        return received
+
+    assert async_to_sync(scenario)() == "hello"
+    assert backend._subscribers == {}
+
+
+def test_stream_sends_timeline_vote_and_comment_events(django_capture_on_commit_callbacks, client_for):
+    author, viewer, voter = UserFactory.create_batch(3)
+    follow(viewer, author)
+    follow(voter, author)
+    watched = StatusFactory(user=author)
+    client = client_for(viewer)
+    response = client.post("/api/stream/ticket/")
+    assert response.status_code == 201
+    ticket = response.data["response"]["ticket"]
+
+    def activity():
+        with django_capture_on_commit_callbacks(execute=True):
+            fan_out_status(StatusFactory(user=author).id)
+            votes.cast(watched, voter.id, votes.LIKE)
+            CommentFactory(status=watched, user=voter)
+
+    sent = open_stream(f"ticket={ticket}&status={watched.id}", activity, 3)
+
+    assert sent[0]["headers"][0] == (b"content-type", b"text/event-stream")
+    kinds = [event for event, _ in events(sent)]
+    assert kinds == ["timeline", "vote", "comment"]
+    assert events(sent)[1][1] == {"model": "status", "id": watched.id, "like": 1}
+    assert events(sent)[2][1]["status"] == watched.id
+
+
+def test_stream_only_accepts_fresh_tickets(settings):
+    user = UserFactory()
+    ticket = stream.ticket(user)
+    # the API token itself is never accepted in the URL
+    assert open_stream(f"token={Token.objects.create(user=user).key}", None, 0)[0]["status"] == 401
+    assert open_stream(f"ticket={ticket}x", None, 0)[0]["status"] == 401
+    assert open_stream(f"ticket={signing.dumps(user.id)}", None, 0)[0]["status"] == 401
+
+    settings.NEWSFEED_STREAM_TICKET_MAX_AGE = -1
+    assert open_stream(f"ticket={ticket}", None, 0)[0]["status"] == 401
+
+
+def test_tickets_are_only_issued_to_authenticated_users():
+    assert APIClient().post("/api/stream/ticket/").status_code in (401, 403)
@@ -0,0 +1,78 @@
+import pytest
+
+from socialmedia.newsfeed import suggestions
+from socialmedia.newsfeed.models import FollowSuggestion
+from socialmedia.newsfeed.tests.factories import block, follow, request_follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def stored(user):
+    return list(
+        FollowSuggestion.objects.filter(user=user).order_by("-score", "suggested").values_list("suggested", "score")
+    )
+
+
+@pytest.fixture
+def network():
+    """``viewer`` follows a and b; both follow c, b follows d, and a follows e, f and g."""
+    viewer, a, b, c, d, e, f, g = UserFactory.create_batch(8)
+    follow(viewer, a)
+    follow(viewer, b)
+    for followee in (c, e, f, g):
+        follow(a, followee)
+    for followee in (c, d, viewer):
+        follow(b, followee)
+    return viewer, a, b, c, d, e, f, g
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+def test_scores_count_mutual_followees_whatever_the_chunk_size(network, chunk_size):
+    viewer, a, b, c, d, e, f, g = network
+
+    suggestions.compute(chunk_size=chunk_size, top_k=3)
+
+    # already followed users and the viewer themselves are never suggested
+    assert stored(viewer) == [(c.id, 2), (d.id, 1), (e.id, 1)]
+    assert stored(b) == [(a.id, 1)]
+    assert stored(c) == []
+
+
+def test_requests_and_blocks_are_excluded(network):
+    viewer, a, b, c, d, e, f, g = network
+    request_follow(viewer, d)
+    block(viewer, e)
+    block(f, viewer)
+
+    suggestions.compute()
+
+    assert stored(viewer) == [(c.id, 2), (g.id, 1)]
+
+
+def test_rerun_replaces_old_rows(network):
+    viewer, a, b, c, d, e, f, g = network
+    loner = UserFactory()
+    FollowSuggestion.objects.create(user=loner, suggested=viewer, score=5, computed_at="2020-01-01T00:00Z")
+    suggestions.compute()
+    suggestions.compute()
+
+    assert len(stored(viewer)) == 5
+    assert stored(loner) == []
+
+
+def test_suggestions_endpoint_drops_users_followed_since(network, client_for):
+    viewer, a, b, c, d, e, f, g = network
+    suggestions.compute()
+    follow(viewer, c)
+    block(d, viewer)
+    client = client_for(viewer)
+
+    response = client.get("/api/userrelationdetail/suggestions/", {"limit": 2})
+    assert response.status_code == 200
+    assert response.data["response"] == [
+        {"id": e.id, "username": e.username, "name": e.name, "score": 1},
+        {"id": f.id, "username": f.username, "name": f.name, "score": 1},
+    ]
+
+    assert client.get("/api/userrelationdetail/suggestions/", {"limit": "x"}).status_code == 400
@@ -0,0 +1,103 @@
+import pytest
+from django.db import transaction
+from django.db.models.signals import pre_delete
+
+from socialmedia.newsfeed import threads
+from socialmedia.newsfeed.models import Comment
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def descendants(comment):
+    return Comment.objects.get(id=comment.id).descendants
+
+
+def test_paths_and_subtree_counts_on_insert(reply):
+    root = CommentFactory()
+    child = reply(root)
+    grandchild = reply(child)
+    sibling = reply(root)
+
+    assert grandchild.path == threads.segment(root.id) + threads.segment(child.id) + threads.segment(grandchild.id)
+    assert grandchild.depth == 2
+    assert threads.ancestor_ids(grandchild.path) == [root.id, child.id]
+    assert [descendants(comment) for comment in (root, child, grandchild, sibling)] == [3, 1, 0, 0]
+
+
+def test_subtree_is_in_thread_order_and_depth_limited(reply):
+    root = CommentFactory()
+    child = reply(root)
+    grandchild = reply(child)
+    sibling = reply(root)
+    CommentFactory(status=root.status)
+
+    assert list(threads.subtree(root)) == [root, child, grandchild, sibling]
+    assert list(threads.subtree(root, max_depth=1)) == [root, child, sibling]
+    assert list(threads.subtree(child)) == [child, grandchild]
+
+
+def test_deleting_a_subtree_shrinks_ancestors_once(reply):
+    root = CommentFactory()
+    child = reply(root)
+    reply(reply(child))
+    other = reply(root)
+
+    Comment.objects.get(id=child.id).delete()
+
+    assert descendants(root) == 1
+    assert list(threads.subtree(root)) == [root, other]
+
+
+def test_a_failed_delete_leaves_no_marks_behind(reply):
+    root = CommentFactory()
+    child = reply(root)
+    grandchild = reply(child)
+
+    def fail(sender, instance, **kwargs):
+        raise RuntimeError("delete refused")
+
+    pre_delete.connect(fail, sender=Comment)
+    try:
+        with pytest.raises(RuntimeError), transaction.atomic():
+            Comment.objects.get(id=child.id).delete()
+    finally:
+        pre_delete.disconnect(fail, sender=Comment)
+    assert descendants(root) == 2
+
+    Comment.objects.get(id=grandchild.id).delete()
+
+    assert [descendants(root), descendants(child)] == [1, 0]
+
+
+def test_thread_endpoint(client_for, reply):
+    user = UserFactory()
+    root = CommentFactory(user=user, status=StatusFactory(user=user))
+    child = reply(root)
+    reply(child)
+
+    response = client_for(user).get(f"/api/comment/{root.id}/thread/", {"depth": 1})
+
+    assert response.status_code == 200
+    assert [(item["id"], item["depth"]) for item in response.data] == [(root.id, 0), (child.id, 1)]
+    assert response.data[0]["descendants"] == 2
+
+    response = client_for(user).get(f"/api/comment/{root.id}/thread/", {"depth": "x"})
+    assert response.status_code == 400
+
+
+def test_replies_stop_at_the_deepest_path_that_fits(client_for):
+    user = UserFactory()
+    parent = CommentFactory(user=user)
+    for _ in range(threads.MAX_DEPTH):
+        parent = CommentFactory(status=parent.status, base_comment=parent, user=user)
+    parent.refresh_from_db()
+    assert parent.depth == threads.MAX_DEPTH
+    assert len(parent.path) <= Comment._meta.get_field("path").max_length
+
+    response = client_for(user).post(
+        "/api/comment/", {"status": "", "base_comment": parent.id, "comment_text": "deeper", "comment_photo": ""}
+    )
+    assert response.status_code == 400
+    assert response.data["non_field_errors"] == [f"Replies can't be nested more than {threads.MAX_DEPTH} levels deep."]
@@ -0,0 +1,172 @@
+import pytest
+
+from socialmedia.newsfeed import timeline
+from socialmedia.newsfeed.models import TimelineEntry
+from socialmedia.newsfeed.tests.factories import (
+    StatusFactory,
+    block,
+    follow,
+    request_follow,
+)
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def timeline_ids(user):
+    return list(timeline.statuses_for(user).values_list("id", flat=True))
+
+
+def test_create_status_fans_out_to_followers(django_capture_on_commit_callbacks, client_for):
+    author, follower, stranger = UserFactory.create_batch(3)
+    follow(follower, author)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client_for(author).post(
+            "/api/status/", {"status_text": "hello", "status_photo": ""}
+        )
+
+    assert response.status_code == 201
+    status_id = response.data["response"]["id"]
+    assert timeline_ids(author) == [status_id]
+    assert timeline_ids(follower) == [status_id]
+    assert timeline_ids(stranger) == []
+
+    response = client_for(follower).get("/api/news/")
+    assert [item["id"] for item in response.data["results"]] == [status_id]
+
+
+def test_push_status_skips_blocked_followers():
+    author, follower = UserFactory.create_batch(2)
+    follow(follower, author)
+    block(follower, author)
+
+    timeline.push_status(StatusFactory(user=author))
+
+    assert timeline_ids(follower) == []
+
+
+def test_accept_backfills_and_unfollow_removes(client_for):
+    author, follower = UserFactory.create_batch(2)
+    statuses = StatusFactory.create_batch(3, user=author)
+    request_follow(follower, author)
+
+    response = client_for(author).post("/api/userrelationdetail/accept/", {"user2": follower.id})
+    assert response.status_code == 201
+    assert timeline_ids(follower) == [s.id for s in reversed(statuses)]
+
+    response = client_for(follower).post("/api/userrelationdetail/unfollow/", {"user2": author.id})
+    assert response.status_code == 204
+    assert timeline_ids(follower) == []
+
+
+def test_block_removes_both_directions(client_for):
+    first, second = UserFactory.create_batch(2)
+    follow(first, second)
+    follow(second, first)
+    timeline.push_status(StatusFactory(user=first))
+    timeline.push_status(StatusFactory(user=second))
+
+    response = client_for(first).post("/api/userrelationdetail/block/", {"user2": second.id})
+
+    assert response.status_code == 201
+    assert not TimelineEntry.objects.filter(owner=first, status__user=second).exists()
+    assert not TimelineEntry.objects.filter(owner=second, status__user=first).exists()
+
+
+def test_status_delete_drops_entries():
+    author, follower = UserFactory.create_batch(2)
+    follow(follower, author)
+    status = StatusFactory(user=author)
+    timeline.push_status(status)
+
+    status.delete()
+
+    assert timeline_ids(follower) == []
+
+
+def test_trim_caps_timeline(settings):
+    settings.NEWSFEED_TIMELINE_LENGTH = 2
+    user = UserFactory()
+    statuses = StatusFactory.create_batch(4, user=user)
+    for status in statuses:
+        timeline.push_status(status)
+
+    assert timeline.trim() == 2
+    assert timeline_ids(user) == [statuses[3].id, statuses[2].id]
+
+
+def test_celebrity_statuses_are_pulled_not_pushed(settings):
+    settings.NEWSFEED_CELEBRITY_THRESHOLD = 2
+    celebrity, first, second, friend = UserFactory.create_batch(4)
+    follow(first, celebrity)
+    follow(second, celebrity)
+    follow(first, friend)
+
+    celebrity_status = StatusFactory(user=celebrity)
+    friend_status = StatusFactory(user=friend)
+    assert timeline.push_status(celebrity_status) == {celebrity.id}
+    timeline.push_status(friend_status)
+
+    assert not TimelineEntry.objects.filter(owner=first, status=celebrity_status).exists()
+    assert timeline_ids(first) == [friend_status.id, celebrity_status.id]
+    assert timeline_ids(second) == [celebrity_status.id]
+
+
+def test_blocked_celebrity_is_not_pulled(settings):
+    settings.NEWSFEED_CELEBRITY_THRESHOLD = 1
+    celebrity, follower = UserFactory.create_batch(2)
+    follow(follower, celebrity)
+    block(celebrity, follower)
+    timeline.push_status(StatusFactory(user=celebrity))
+
+    assert timeline_ids(follower) == []
+
+
+def test_since_id_returns_only_newer_statuses(settings, client_for):
+    settings.NEWSFEED_CELEBRITY_THRESHOLD = 2
+    user, friend, celebrity, other = UserFactory.create_batch(4)
+    follow(user, friend)
+    follow(user, celebrity)
+    follow(other, celebrity)
+    statuses = []
+    for author in (friend, celebrity, friend, celebrity, friend):
+        status = StatusFactory(user=author)
+        timeline.push_status(status)
+        statuses.append(status)
+    client = client_for(user)
+
+    response = client.get("/api/news/", {"since_id": statuses[1].id})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data["results"]] == [s.id for s in reversed(statuses[2:])]
+    assert response.data["newest_id"] == statuses[4].id
+    assert response.data["has_more"] is False
+
+    # more new statuses than fit: the oldest ones come first so polling forward skips nothing
+    response = client.get("/api/news/", {"since_id": statuses[0].id, "count": 2})
+    assert [item["id"] for item in response.data["results"]] == [statuses[2].id, statuses[1].id]
+    assert response.data["has_more"] is True
+
+    response = client.get("/api/news/", {"max_id": statuses[3].id, "count": 2})
+    assert [item["id"] for item in response.data["results"]] == [statuses[2].id, statuses[1].id]
+    assert response.data["has_more"] is True
+
+    response = client.get("/api/news/", {"since_id": statuses[4].id})
+    assert response.data["results"] == []
+    assert response.data["newest_id"] == statuses[4].id
+
+    assert client.get("/api/news/", {"since_id": "abc"}).status_code == 400
+
+
+def test_new_count(client_for):
+    user, friend = UserFactory.create_batch(2)
+    follow(user, friend)
+    statuses = StatusFactory.create_batch(3, user=friend)
+    for status in statuses:
+        timeline.push_status(status)
+    client = client_for(user)
+
+    response = client.get("/api/news/new-count/", {"since_id": statuses[0].id})
+    assert response.status_code == 200
+    assert response.data["response"] == {"count": 2, "capped": False}
+    assert client.get("/api/news/new-count/").status_code == 400
@@ -0,0 +1,81 @@
+import pytest
+
+from socialmedia.newsfeed import trending, votes
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory, block
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_backend(monkeypatch):
+    # pin the clock to one bucket so scores don't shift on a bucket boundary
+    monkeypatch.setattr(trending, "current_bucket", lambda: 1000)
+    trending._load.cache_clear()
+    yield
+    trending._load.cache_clear()
+
+
+def test_local_backend_decays_older_buckets():
+    backend = trending.LocalBackend()
+    backend.add(10, 1, 4, ttl=0)
+    backend.add(9, 2, 4, ttl=0)
+    backend.add(9, 3, 1, ttl=0)
+    backend.add(5, 4, 100, ttl=0)
+
+    assert backend.top({10: 1.0, 9: 0.5, 8: 0.25}, 2) == [(1, 4.0), (2, 2.0)]
+    assert backend.top({10: 1.0, 9: 0.5, 8: 0.25}, 2, offset=1) == [(2, 2.0), (3, 0.5)]
+    # buckets that left the window are dropped
+    assert 5 not in backend._buckets
+
+
+def test_votes_and_comments_feed_trending(django_capture_on_commit_callbacks):
+    liked, commented, quiet = StatusFactory.create_batch(3)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        votes.cast(liked, UserFactory().id, votes.LIKE)
+        votes.cast(liked, UserFactory().id, votes.LIKE)
+        CommentFactory(status=commented)
+        CommentFactory(status=commented)
+        withdrawn = UserFactory()
+        votes.cast(quiet, withdrawn.id, votes.LIKE)
+        votes.withdraw(quiet, withdrawn.id, votes.LIKE)
+
+    assert trending.top(10) == [(commented.id, 4.0), (liked.id, 2.0)]
+
+
+def test_trending_endpoint_hides_blocked_authors(django_capture_on_commit_callbacks, client_for):
+    viewer, blocker = UserFactory.create_batch(2)
+    hot, hidden, warm = StatusFactory(), StatusFactory(user=blocker), StatusFactory()
+    block(blocker, viewer)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for status, comments in ((hot, 3), (hidden, 5), (warm, 1)):
+            CommentFactory.create_batch(comments, status=status)
+
+    client = client_for(viewer)
+    response = client.get("/api/trending/")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data["response"]] == [hot.id, warm.id]
+
+    response = client.get("/api/trending/", {"limit": 1})
+    assert [item["id"] for item in response.data["response"]] == [hot.id]
+
+    assert client.get("/api/trending/", {"limit": "0"}).status_code == 400
+
+
+def test_hidden_statuses_are_paged_past(django_capture_on_commit_callbacks, django_assert_num_queries):
+    viewer, blocker = UserFactory.create_batch(2)
+    block(viewer, blocker)
+    hidden = StatusFactory.create_batch(5, user=blocker)
+    visible = StatusFactory.create_batch(2)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for rank, status in enumerate(hidden + visible):
+            CommentFactory.create_batch(10 - rank, status=status)
+
+    # the blocks, then pages of two: four hidden, then one hidden and the first visible one
+    with django_assert_num_queries(4):
+        assert trending.ids_for(viewer, 1) == [visible[0].id]
+    # the ranking runs out before three are found
+    assert trending.ids_for(viewer, 3) == [status.id for status in visible]
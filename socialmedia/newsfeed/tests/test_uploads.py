@@ -0,0 +1,88 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from rest_framework.test import APIClient
+
+from socialmedia.newsfeed import uploads
+from socialmedia.newsfeed.models import MediaBlob, Status, UploadSession
+from socialmedia.newsfeed.tasks import collect_media
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def png_bytes():
+    buffer = BytesIO()
+    Image.new("RGB", (64, 48), (10, 200, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def start_upload(client, content=None):
+    response = client.post("/api/uploads/", {"content_type": "image/png"})
+    assert response.status_code == 201
+    session = response.data["response"]
+    target = session["upload"]
+    assert target["method"] == "PUT"
+    if content is not None:
+        response = APIClient().generic(
+            "PUT", target["url"], content, content_type=target["headers"]["Content-Type"]
+        )
+        assert response.status_code == 200
+    return session["upload_key"]
+
+
+def test_status_from_a_direct_upload(django_capture_on_commit_callbacks, client_for):
+    user = UserFactory()
+    client = client_for(user)
+    key = start_upload(client, png_bytes())
+    staged = UploadSession.objects.get(key=key).name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post("/api/status/", {"status_text": "", "upload_key": key}, format="json")
+
+    assert response.status_code == 201
+    status = Status.objects.get(id=response.data["response"]["id"])
+    assert status.status_photo.name.startswith("upload_image/")
+    assert (status.photo_width, status.photo_height) == (64, 48)
+    assert not uploads.storage().exists(staged)
+    assert MediaBlob.objects.get(name=status.status_photo.name).refs == 1
+    assert not MediaBlob.objects.filter(name=staged).exists()
+
+    response = client.post("/api/status/", {"status_text": "again", "upload_key": key}, format="json")
+    assert response.status_code == 400
+
+
+def test_upload_must_be_finished_and_owned(client_for):
+    owner, other = UserFactory.create_batch(2)
+    key = start_upload(client_for(owner))
+
+    response = client_for(owner).post("/api/status/", {"status_text": "x", "upload_key": key}, format="json")
+    assert response.data["non_field_errors"] == ["The file has not been uploaded yet."]
+
+    response = client_for(other).post("/api/status/", {"status_text": "x", "upload_key": key}, format="json")
+    assert response.data["non_field_errors"] == ["This upload does not exist or has expired."]
+
+
+def test_local_put_requires_a_valid_signature(client_for):
+    key = start_upload(client_for(UserFactory()))
+
+    response = APIClient().generic("PUT", f"/api/uploads/{key}/content/?signature=forged", png_bytes())
+
+    assert response.status_code == 400
+
+
+def test_expired_sessions_are_cleaned_up(settings, client_for):
+    user = UserFactory()
+    key = start_upload(client_for(user), png_bytes())
+    staged = UploadSession.objects.get(key=key).name
+    UploadSession.objects.filter(key=key).update(expires_at="2000-01-01T00:00:00Z")
+
+    assert collect_media() == 1
+    assert not uploads.storage().exists(staged)
+    assert not UploadSession.objects.exists()
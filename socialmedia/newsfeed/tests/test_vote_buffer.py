@@ -0,0 +1,161 @@
+import pytest
+
+from socialmedia.newsfeed import vote_buffer, votes
+from socialmedia.newsfeed.models import Comment, Status
+from socialmedia.newsfeed.tasks import flush_vote_counters
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def write_behind(settings):
+    settings.NEWSFEED_VOTE_WRITE_BEHIND = True
+
+
+def test_votes_are_buffered_until_flushed(django_capture_on_commit_callbacks, counts):
+    status = StatusFactory()
+    voters = UserFactory.create_batch(3)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        votes.cast(status, voters[0].id, votes.LIKE)
+        votes.cast(status, voters[1].id, votes.LIKE)
+        votes.cast(status, voters[2].id, votes.DISLIKE)
+        votes.cast(status, voters[2].id, votes.LIKE)
+
+    assert counts(status) == (0, 0)
+    assert vote_buffer.pending(Status, [status.id]) == {status.id: {"like": 3, "dislike": 0}}
+
+    assert flush_vote_counters() == 1
+    assert counts(status) == (3, 0)
+    assert vote_buffer.pending(Status, [status.id]) == {}
+    assert flush_vote_counters() == 0
+
+
+def test_flush_batches_statuses_and_comments(django_capture_on_commit_callbacks, counts):
+    statuses = StatusFactory.create_batch(2)
+    comment = CommentFactory()
+    voter = UserFactory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for status in statuses:
+            votes.cast(status, voter.id, votes.LIKE)
+        votes.cast(comment, voter.id, votes.DISLIKE)
+
+    assert flush_vote_counters() == 3
+    assert [counts(status) for status in statuses] == [(1, 0), (1, 0)]
+    assert counts(comment) == (0, 1)
+
+
+def test_votes_after_a_flush_are_kept(django_capture_on_commit_callbacks, counts):
+    status = StatusFactory()
+    voters = UserFactory.create_batch(2)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        votes.cast(status, voters[0].id, votes.LIKE)
+    flush_vote_counters()
+    with django_capture_on_commit_callbacks(execute=True):
+        votes.cast(status, voters[1].id, votes.LIKE)
+        votes.withdraw(status, voters[0].id, votes.LIKE)
+
+    assert counts(status) == (1, 0)
+    flush_vote_counters()
+    assert counts(status) == (1, 0)
+    assert Status.objects.get(id=status.id).like == 1
+
+
+def test_read_serializers_overlay_pending_deltas(django_capture_on_commit_callbacks, client_for, counts):
+    author, voter = UserFactory.create_batch(2)
+    follow(voter, author)
+    status = StatusFactory(user=author)
+    comment = CommentFactory(user=author, status=status)
+    client = client_for(voter)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.put(f"/api/status/{status.id}/vote/", {"up_vote": True})
+        client.put(f"/api/comment/{comment.id}/vote/", {"down_vote": True})
+
+    assert counts(status) == (0, 0)
+    response = client.get(f"/api/status/{status.id}/")
+    assert (response.data["like"], response.data["dislike"]) == (1, 0)
+    response = client.get(f"/api/comment/{comment.id}/")
+    assert (response.data["like"], response.data["dislike"]) == (0, 1)
+
+    flush_vote_counters()
+    response = client.get(f"/api/status/{status.id}/")
+    assert (response.data["like"], response.data["dislike"]) == (1, 0)
+    assert Comment.objects.get(id=comment.id).dislike == 1
+
+
+class DeadCache:
+    """A cache whose backend is down, as django-redis reports it under IGNORE_EXCEPTIONS."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class EvictingCache:
+    """The default cache, except that the ``fail_at``-th decrement finds its key evicted."""
+
+    def __init__(self, fail_at):
+        self.cache = vote_buffer.cache
+        self.decrements = 0
+        self.fail_at = fail_at
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+    def decr(self, key, delta):
+        self.decrements += 1
+        if self.decrements == self.fail_at:
+            raise ValueError(f"Key '{key}' not found")
+        return self.cache.decr(key, delta)
+
+
+def test_votes_are_written_directly_when_the_cache_is_down(django_capture_on_commit_callbacks, monkeypatch, counts):
+    status = StatusFactory()
+    voter = UserFactory()
+    monkeypatch.setattr(vote_buffer, "cache", DeadCache())
+
+    with django_capture_on_commit_callbacks(execute=True):
+        votes.cast(status, voter.id, votes.LIKE)
+
+    assert counts(status) == (1, 0)
+
+
+def test_failed_take_restores_the_deltas_already_taken(django_capture_on_commit_callbacks, monkeypatch, counts):
+    statuses = StatusFactory.create_batch(2)
+    voter = UserFactory()
+    with django_capture_on_commit_callbacks(execute=True):
+        for status in statuses:
+            votes.cast(status, voter.id, votes.LIKE)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(vote_buffer, "cache", EvictingCache(fail_at=2))
+        with pytest.raises(ValueError):
+            flush_vote_counters()
+
+    assert [counts(status) for status in statuses] == [(0, 0), (0, 0)]
+    assert vote_buffer.pending(Status, [status.id for status in statuses]) == {
+        status.id: {"like": 1, "dislike": 0} for status in statuses
+    }
+    assert flush_vote_counters() == 2
+    assert [counts(status) for status in statuses] == [(1, 0), (1, 0)]
+
+
+def test_failed_take_of_the_second_field_restores_the_first(django_capture_on_commit_callbacks, monkeypatch, counts):
+    status = StatusFactory()
+    fan, critic = UserFactory.create_batch(2)
+    with django_capture_on_commit_callbacks(execute=True):
+        votes.cast(status, fan.id, votes.LIKE)
+        votes.cast(status, critic.id, votes.DISLIKE)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(vote_buffer, "cache", EvictingCache(fail_at=2))
+        with pytest.raises(ValueError):
+            flush_vote_counters()
+
+    assert vote_buffer.pending(Status, [status.id]) == {status.id: {"like": 1, "dislike": 1}}
+    assert flush_vote_counters() == 1
+    assert counts(status) == (1, 1)
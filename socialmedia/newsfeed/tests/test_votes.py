@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+from socialmedia.newsfeed import votes
+from socialmedia.newsfeed.api.serializers import StatusUpdateSerializer
+from socialmedia.newsfeed.models import Status, StatusVoteTracker
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_cast_flip_and_withdraw(counts):
+    status = StatusFactory()
+    voter = UserFactory()
+
+    assert votes.cast(status, voter.id, votes.LIKE)
+    assert counts(status) == (1, 0)
+    assert not votes.cast(status, voter.id, votes.LIKE)
+    assert counts(status) == (1, 0)
+
+    assert votes.cast(status, voter.id, votes.DISLIKE)
+    assert counts(status) == (0, 1)
+    assert StatusVoteTracker.objects.get(status=status, user=voter).vote is False
+
+    assert not votes.withdraw(status, voter.id, votes.LIKE)
+    assert votes.withdraw(status, voter.id, votes.DISLIKE)
+    assert counts(status) == (0, 0)
+    assert not StatusVoteTracker.objects.filter(status=status).exists()
+
+
+def test_stale_instances_do_not_lose_votes(counts):
+    status = StatusFactory()
+    first_copy = Status.objects.get(id=status.id)
+    second_copy = Status.objects.get(id=status.id)
+
+    votes.cast(first_copy, UserFactory().id, votes.LIKE)
+    votes.cast(second_copy, UserFactory().id, votes.LIKE)
+
+    assert counts(status) == (2, 0)
+
+
+def test_comment_votes(counts):
+    comment = CommentFactory()
+    voter = UserFactory()
+
+    votes.cast(comment, voter.id, votes.DISLIKE)
+
+    assert counts(comment) == (0, 1)
+
+
+def test_vote_endpoint(client_for, counts):
+    author, voter = UserFactory.create_batch(2)
+    follow(voter, author)
+    status = StatusFactory(user=author)
+    client = client_for(voter)
+
+    response = client.put(f"/api/status/{status.id}/vote/", {"up_vote": True})
+    assert response.status_code == 202
+    assert counts(status) == (1, 0)
+
+    response = client.put(f"/api/status/{status.id}/vote/", {"up_vote": True})
+    assert response.status_code == 400
+    assert response.data == ["You already liked the status."]
+
+    response = client.put(f"/api/status/{status.id}/vote/", {"up_vote": False})
+    assert response.status_code == 202
+    assert counts(status) == (0, 0)
+
+
+def test_withdraw_without_vote_is_a_no_op(client_for, counts):
+    author, voter = UserFactory.create_batch(2)
+    follow(voter, author)
+    comment = CommentFactory(user=author, status=StatusFactory(user=author))
+
+    response = client_for(voter).put(f"/api/comment/{comment.id}/vote/", {"down_vote": False})
+
+    assert response.status_code == 202
+    assert counts(comment) == (0, 0)
+
+
+def test_editing_a_stale_status_keeps_the_votes_cast_meanwhile(counts):
+    status = StatusFactory()
+    stale = Status.objects.get(id=status.id)
+    for voter in UserFactory.create_batch(5):
+        votes.cast(status, voter.id, votes.LIKE)
+
+    serializer = StatusUpdateSerializer(
+        stale, data={"status_text": "edited"}, context={"request": SimpleNamespace(user=status.user)}
+    )
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+
+    assert counts(status) == (5, 0)
+    assert Status.objects.get(id=status.id).status_text == "edited"
@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+
+from socialmedia.newsfeed import timeline
+from socialmedia.newsfeed.api.serializers import latest_comments
+from socialmedia.newsfeed.models import Comment
+from socialmedia.newsfeed.tests.factories import CommentFactory, StatusFactory, follow
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_wall_embeds_latest_comments(settings, client_for):
+    settings.NEWSFEED_WALL_COMMENTS = 2
+    user = UserFactory()
+    status = StatusFactory(user=user)
+    comments = CommentFactory.create_batch(3, status=status)
+    quiet = StatusFactory(user=user)
+
+    response = client_for(user).get("/api/mywall/")
+
+    rows = {row["id"]: row for row in response.data["results"]}
+    assert [comment["id"] for comment in rows[status.id]["comment_list"]] == [comments[2].id, comments[1].id]
+    assert rows[quiet.id]["comment_list"] == []
+
+    response = client_for(user).get(f"/api/mywall/{status.id}/")
+    assert len(response.data["comment_list"]) == 2
+
+
+@pytest.mark.parametrize("url", ["/api/mywall/", "/api/news/"])
+def test_feed_page_queries_do_not_grow_with_page_size(url, django_assert_max_num_queries, client_for):
+    user = UserFactory()
+    authors = UserFactory.create_batch(3)
+    for author in authors:
+        follow(user, author)
+    for author in authors + [user]:
+        for status in StatusFactory.create_batch(3, user=author):
+            CommentFactory.create_batch(2, status=status)
+    timeline.rebuild(user)
+
+    # ETag id page, page, comments prefetch, the (cached) celebrity lookup and
+    # the ATOMIC_REQUESTS savepoint pair
+    with django_assert_max_num_queries(6):
+        response = client_for(user).get(url, {"page_size": 20})
+
+    assert response.status_code == 200
+    assert len(response.data["results"]) >= 3
+    assert all(len(row["comment_list"]) == 2 for row in response.data["results"])
+
+
+def comment_rows_read(plan):
+    """Rows every node over newsfeed_comment in an EXPLAIN ANALYZE JSON plan read, kept or filtered out."""
+    read = 0
+    if plan.get("Relation Name") == "newsfeed_comment":
+        read += (plan["Actual Rows"] + plan.get("Rows Removed by Filter", 0)) * plan["Actual Loops"]
+    return read + sum(comment_rows_read(child) for child in plan.get("Plans", []))
+
+
+def test_latest_comments_stop_at_the_limit_on_viral_statuses():
+    viral, quiet = StatusFactory.create_batch(2)
+    others = StatusFactory.create_batch(20)
+    Comment.objects.bulk_create(
+        Comment(status=status, user=viral.user, comment_text="nice")
+        for status in [viral] * 2000 + others * 100
+    )
+    oldest, newest = CommentFactory.create_batch(2, status=quiet)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE newsfeed_comment")
+
+    comments = latest_comments([viral.id, quiet.id], 3)
+    assert [comment.id for comment in comments if comment.status_id == quiet.id] == [newest.id, oldest.id]
+    assert len([comment for comment in comments if comment.status_id == viral.id]) == 3
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {comments.raw_query}", comments.params)
+        plan = cursor.fetchone()[0][0]["Plan"]
+    # a correlated subquery per comment would read all 2000 of the viral status's
+    assert comment_rows_read(plan) <= 5
@@ -0,0 +1,99 @@
+"""
+Comment threads stored as materialized paths.
+
+Each comment's ``path`` is its ancestors' ids followed by its own, every id
+zero-padded to the same width, so a whole subtree is the prefix range
+``path LIKE '<root path>%'`` on the ``varchar_pattern_ops`` index and sorting
+by ``path`` yields the thread in reading order. ``descendants`` holds the size
+of each comment's subtree; the signal receivers keep it current.
+
+Every level adds a segment to ``path``, so threads are at most MAX_DEPTH
+replies deep, the deepest path that still fits the column.
+"""
+import threading
+
+from django.db.models import F
+
+from socialmedia.newsfeed import payloads
+from socialmedia.newsfeed.models import Comment
+
+SEGMENT_WIDTH = 10
+SEPARATOR = '/'
+# depth of the deepest comment whose path, one segment per level, fits Comment.path
+MAX_DEPTH = Comment._meta.get_field('path').max_length // (SEGMENT_WIDTH + len(SEPARATOR)) - 1
+
+
+class _Deleting(threading.local):
+    def __init__(self):
+        self.ids = set()
+        self.checked = True
+
+
+_deleting = _Deleting()
+
+
+def segment(comment_id):
+    return f'{comment_id:0{SEGMENT_WIDTH}d}{SEPARATOR}'
+
+
+def ancestor_ids(path):
+    """Ids of every ancestor encoded in ``path``, root first, excluding the comment itself."""
+    return [int(part) for part in path.split(SEPARATOR)[:-2]]
+
+
+def place(comment):
+    """Give a newly created comment its path and depth and grow its ancestors' subtrees."""
+    parent = comment.base_comment
+    comment.path = (parent.path if parent else '') + segment(comment.id)
+    comment.depth = parent.depth + 1 if parent else 0
+    Comment.objects.filter(id=comment.id).update(path=comment.path, depth=comment.depth)
+    ancestors = ancestor_ids(comment.path)
+    if ancestors:
+        Comment.objects.filter(id__in=ancestors).update(descendants=F('descendants') + 1)
+        payloads.invalidate(Comment, *ancestors)
+
+
+def subtree(root, max_depth=None):
+    """``root`` and its replies in thread order, at most ``max_depth`` levels below it."""
+    comments = Comment.objects.filter(path__startswith=root.path)
+    if max_depth is not None:
+        comments = comments.filter(depth__lte=root.depth + max_depth)
+    return comments.order_by('path')
+
+
+def mark_deleting(comment):
+    """Called before a delete; every comment in the cascade is marked before any row goes."""
+    _deleting.ids.add(comment.id)
+    _deleting.checked = False
+
+
+def _in_same_delete(comment_id):
+    """Whether ``comment_id`` goes in the delete whose post_delete signals are being sent."""
+    if comment_id not in _deleting.ids:
+        return False
+    if not _deleting.checked:
+        # a delete that raised or was rolled back never sent post_delete, so its
+        # marks are still here; their rows exist, while every row of the running
+        # delete is gone by now
+        _deleting.ids -= set(Comment.objects.filter(id__in=_deleting.ids).values_list('id', flat=True))
+        _deleting.checked = True
+    return comment_id in _deleting.ids
+
+
+def removed(comment):
+    """
+    Shrink the ancestors' subtrees once ``comment`` is deleted.
+
+    Only the topmost comment of a cascading delete adjusts its ancestors, by
+    its whole subtree at once, so removing a thread costs one UPDATE.
+    """
+    _deleting.ids.discard(comment.id)
+    if _in_same_delete(comment.base_comment_id):
+        return False
+    ancestors = ancestor_ids(comment.path)
+    if ancestors:
+        Comment.objects.filter(id__in=ancestors).update(
+            descendants=F('descendants') - (1 + comment.descendants)
+        )
+        payloads.invalidate(Comment, *ancestors)
+    return True
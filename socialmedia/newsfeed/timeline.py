@@ -0,0 +1,196 @@
+"""
+Materialized home timelines.
+
+Every user owns a list of status ids (``TimelineEntry`` rows) that is filled
+when a followee posts (fan-out-on-write) and patched incrementally when the
+follow graph changes, so reading the news feed is a single bounded lookup.
+
+Accounts with at least NEWSFEED_CELEBRITY_THRESHOLD followers are not pushed;
+their statuses are pulled at read time and merged into the pushed entries.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+
+from socialmedia.newsfeed import graph
+from socialmedia.newsfeed.models import Status, TimelineEntry, UserStats
+
+CELEBRITY_CACHE_KEY = 'newsfeed:celebrities'
+
+
+def timeline_length():
+    return settings.NEWSFEED_TIMELINE_LENGTH
+
+
+def celebrity_ids():
+    """Ids of the users whose statuses are pulled instead of pushed."""
+    ids = cache.get(CELEBRITY_CACHE_KEY)
+    if ids is None:
+        ids = set(
+            UserStats.objects.filter(followers__gte=settings.NEWSFEED_CELEBRITY_THRESHOLD)
+            .values_list('user_id', flat=True)
+        )
+        cache.set(CELEBRITY_CACHE_KEY, ids, settings.NEWSFEED_CELEBRITY_CACHE_TIMEOUT)
+    return ids
+
+
+def pulled_followees(user_id):
+    """Celebrities followed by ``user_id`` whose statuses must be pulled."""
+    celebrities = celebrity_ids()
+    if not celebrities:
+        return set()
+    followees = set(graph.followees_of(user_id).filter(dst__in=celebrities))
+    if not followees:
+        return followees
+    return followees - graph.blocked_either_way(user_id)
+
+
+def statuses_for(user):
+    """Statuses of ``user``'s home timeline, newest first."""
+    entries = (
+        TimelineEntry.objects.filter(owner=user)
+        .order_by('-status_id')
+        .values('status_id')[:timeline_length()]
+    )
+    pulled = pulled_followees(user.id)
+    if not pulled:
+        return Status.objects.filter(id__in=entries).order_by('-id')
+
+    latest = Status.objects.filter(user__in=pulled).order_by('-id').values('id')[:timeline_length()]
+    return Status.objects.filter(Q(id__in=entries) | Q(id__in=latest)).order_by('-id')
+
+
+def push_status(status):
+    """Fan a new status out to its author and every follower that may see it."""
+    if status.user_id in celebrity_ids():
+        recipients = {status.user_id}
+    else:
+        recipients = set(graph.followers_of(status.user_id)) - graph.blocked_either_way(status.user_id)
+        recipients.add(status.user_id)
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner_id=owner_id, status_id=status.id) for owner_id in recipients],
+        ignore_conflicts=True,
+    )
+    return recipients
+
+
+def add_followee(owner_id, followee_id):
+    """Backfill the latest statuses of a user that ``owner_id`` started following."""
+    if followee_id in celebrity_ids():
+        return
+    latest = (
+        Status.objects.filter(user=followee_id)
+        .order_by('-id')
+        .values_list('id', flat=True)[:timeline_length()]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner_id=owner_id, status_id=status_id) for status_id in latest],
+        ignore_conflicts=True,
+    )
+
+
+def remove_followee(owner_id, followee_id):
+    """Drop every status of ``followee_id`` from ``owner_id``'s timeline."""
+    TimelineEntry.objects.filter(owner=owner_id, status__user=followee_id).delete()
+
+
+def block(user_id, blocked_id):
+    remove_followee(user_id, blocked_id)
+    remove_followee(blocked_id, user_id)
+
+
+def unblock(user_id, unblocked_id):
+    if graph.is_following(user_id, unblocked_id):
+        add_followee(user_id, unblocked_id)
+    if graph.is_following(unblocked_id, user_id):
+        add_followee(unblocked_id, user_id)
+
+
+def rebuild(user):
+    """Recompute ``user``'s timeline from scratch (own statuses plus followees)."""
+    TimelineEntry.objects.filter(owner=user).delete()
+    latest = (
+        Status.objects.filter(Q(user=user) | Q(user__in=graph.followees_of(user.id)))
+        .exclude(user__in=graph.blocked_either_way(user.id))
+        .order_by('-id')
+        .values_list('id', flat=True)[:timeline_length()]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner=user, status_id=status_id) for status_id in latest]
+    )
+
+
+def trim():
+    """Delete the entries that fell off the end of every timeline."""
+    table = TimelineEntry._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {table} WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY owner_id ORDER BY status_id DESC
+                    ) AS position
+                    FROM {table}
+                ) ranked
+                WHERE ranked.position > %s
+            )
+            """,
+            [timeline_length()],
+        )
+        return cursor.rowcount
+
+
+def _pushed_between(user, since_id, max_id):
+    entries = TimelineEntry.objects.filter(owner=user)
+    if since_id is not None:
+        entries = entries.filter(status_id__gt=since_id)
+    if max_id is not None:
+        entries = entries.filter(status_id__lt=max_id)
+    return entries
+
+
+def _pulled_between(pulled, since_id, max_id):
+    statuses = Status.objects.filter(user__in=pulled)
+    if since_id is not None:
+        statuses = statuses.filter(id__gt=since_id)
+    if max_id is not None:
+        statuses = statuses.filter(id__lt=max_id)
+    return statuses
+
+
+def ids_between(user, since_id=None, max_id=None, limit=50):
+    """
+    Ids of ``user``'s timeline statuses with ``since_id < id < max_id``, newest first.
+
+    With ``since_id`` the ``limit`` oldest matches are returned, so a client
+    polling forward from its newest id never skips a status; otherwise the
+    ``limit`` newest ones. Both sides are range scans on (owner, status) and
+    (user, id), so the cost follows the number of ids returned, not the
+    length of the timeline.
+    """
+    prefix = '' if since_id is not None else '-'
+    order = f'{prefix}id'
+    entries = (
+        _pushed_between(user, since_id, max_id)
+        .order_by(f'{prefix}status_id')
+        .values('status_id')[:limit]
+    )
+    condition = Q(id__in=entries)
+    pulled = pulled_followees(user.id)
+    if pulled:
+        latest = _pulled_between(pulled, since_id, max_id).order_by(order).values('id')[:limit]
+        condition |= Q(id__in=latest)
+    ids = list(Status.objects.filter(condition).order_by(order).values_list('id', flat=True)[:limit])
+    return sorted(ids, reverse=True)
+
+
+def count_since(user, since_id, cap=None):
+    """How many statuses arrived in ``user``'s timeline after ``since_id``, counting at most ``cap``."""
+    cap = cap or timeline_length()
+    condition = Q(id__in=_pushed_between(user, since_id, None).order_by('status_id').values('status_id')[:cap])
+    pulled = pulled_followees(user.id)
+    if pulled:
+        condition |= Q(id__in=_pulled_between(pulled, since_id, None).order_by('id').values('id')[:cap])
+    return Status.objects.filter(condition)[:cap].count()
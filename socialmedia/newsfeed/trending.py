@@ -0,0 +1,150 @@
+"""
+Trending statuses, served by ``/api/trending/``.
+
+Likes and comments add to a per-status counter in the current time bucket
+(NEWSFEED_TRENDING_BUCKET seconds long). The trending score of a status is
+the sum of its counters over the last NEWSFEED_TRENDING_WINDOW buckets, each
+bucket weighted down by half every HALF_LIFE_BUCKETS buckets, so recent
+activity counts most and old activity drops out of the window entirely.
+
+With the Redis backend each bucket is a sorted set. The weighted union of
+the window is rebuilt at most every REFRESH_SECONDS with ZUNIONSTORE, so a
+read is a ZREVRANGE on that set, O(log n + N), and further pages are
+ZREVRANGEs further down the same set. ``LocalBackend`` keeps the
+buckets in process memory for tests and development.
+"""
+import functools
+import heapq
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from socialmedia.newsfeed import graph
+from socialmedia.newsfeed.models import Status
+
+KEY_PREFIX = 'newsfeed:trending'
+LIKE_WEIGHT = 1
+COMMENT_WEIGHT = 2
+HALF_LIFE_BUCKETS = 6
+REFRESH_SECONDS = 30
+
+
+class LocalBackend:
+    """Buckets held in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def add(self, bucket, status_id, amount, ttl):
+        with self._lock:
+            self._buckets.setdefault(bucket, Counter())[status_id] += amount
+
+    def top(self, weights, count, offset=0):
+        totals = Counter()
+        with self._lock:
+            for expired in [bucket for bucket in self._buckets if bucket < min(weights)]:
+                del self._buckets[expired]
+            for bucket, weight in weights.items():
+                for status_id, amount in self._buckets.get(bucket, {}).items():
+                    totals[status_id] += amount * weight
+        positive = ((status_id, score) for status_id, score in totals.items() if score > 0)
+        return heapq.nlargest(offset + count, positive, key=lambda item: (item[1], item[0]))[offset:]
+
+
+class RedisBackend:
+    """One sorted set per bucket in the Redis at NEWSFEED_TRENDING_URL."""
+
+    top_key = f'{KEY_PREFIX}:top'
+    fresh_key = f'{KEY_PREFIX}:top:fresh'
+
+    def __init__(self, url=None):
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.NEWSFEED_TRENDING_URL)
+
+    def _bucket_key(self, bucket):
+        return f'{KEY_PREFIX}:{bucket}'
+
+    def add(self, bucket, status_id, amount, ttl):
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.zincrby(self._bucket_key(bucket), amount, status_id)
+        pipeline.expire(self._bucket_key(bucket), ttl)
+        pipeline.execute()
+
+    def top(self, weights, count, offset=0):
+        if self.client.set(self.fresh_key, 1, nx=True, ex=REFRESH_SECONDS):
+            pipeline = self.client.pipeline()
+            pipeline.zunionstore(self.top_key, {self._bucket_key(bucket): weight for bucket, weight in weights.items()})
+            pipeline.zremrangebyscore(self.top_key, '-inf', 0)
+            pipeline.execute()
+        return [
+            (int(status_id), score)
+            for status_id, score in self.client.zrevrange(self.top_key, offset, offset + count - 1, withscores=True)
+        ]
+
+
+@functools.lru_cache()
+def _load(path):
+    return import_string(path)()
+
+
+def backend():
+    return _load(settings.NEWSFEED_TRENDING_BACKEND)
+
+
+def current_bucket():
+    return int(time.time()) // settings.NEWSFEED_TRENDING_BUCKET
+
+
+def _add(status_id, amount):
+    ttl = settings.NEWSFEED_TRENDING_BUCKET * (settings.NEWSFEED_TRENDING_WINDOW + 1)
+    backend().add(current_bucket(), status_id, amount, ttl)
+
+
+def record(status_id, amount):
+    """Add ``amount`` to ``status_id``'s trending counter once the current transaction commits."""
+    if status_id is not None and amount:
+        transaction.on_commit(lambda: _add(status_id, amount))
+
+
+def window_weights():
+    """``{bucket: weight}`` over the sliding window, the current bucket weighing 1."""
+    now = current_bucket()
+    return {
+        now - age: 0.5 ** (age / HALF_LIFE_BUCKETS)
+        for age in range(settings.NEWSFEED_TRENDING_WINDOW)
+    }
+
+
+def top(count, offset=0):
+    """``[(status_id, score), ...]`` of the ``count`` highest scores after the first ``offset``, best first."""
+    return backend().top(window_weights(), count, offset)
+
+
+def ids_for(user, count):
+    """Ids of the top ``count`` trending statuses ``user`` may see, best first."""
+    # statuses of blocked authors and deleted ones are dropped after each read,
+    # so pages of the ranking are read until enough are left or it runs out
+    blocked = graph.blocked_either_way(user.id)
+    page_size = count * 2
+    found, seen, offset = [], set(), 0
+    while len(found) < count:
+        page = top(page_size, offset)
+        offset += len(page)
+        # the Redis ranking may be rebuilt between pages and shift ids across them
+        ranked = [status_id for status_id, _ in page if status_id not in seen]
+        seen.update(ranked)
+        visible = set(
+            Status.objects.filter(id__in=ranked)
+            .exclude(user__in=blocked)
+            .values_list('id', flat=True)
+        )
+        found += [status_id for status_id in ranked if status_id in visible]
+        if len(page) < page_size:
+            break
+    return found[:count]
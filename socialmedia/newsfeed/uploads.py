@@ -0,0 +1,145 @@
+"""
+Direct-to-storage photo uploads.
+
+The client opens an ``UploadSession``, PUTs the bytes to the returned target
+and then creates a status or comment with the session's ``upload_key``, so
+photo bytes never pass through an app worker. On S3 the target is a
+presigned URL; storages that can't presign get a signed URL on
+``/api/uploads/<key>/content/`` instead. The staged file is moved to its
+content-addressed name later, by the photo task.
+"""
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from socialmedia.newsfeed import media, payloads
+from socialmedia.newsfeed.models import MediaBlob, Status, UploadSession
+
+STAGING_DIR = 'uploads'
+SIGNING_SALT = 'socialmedia.newsfeed.uploads'
+CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+}
+
+
+class UploadUnavailable(Exception):
+    pass
+
+
+def storage():
+    return Status._meta.get_field('status_photo').storage
+
+
+def open_session(user, content_type):
+    session = UploadSession(
+        user=user,
+        content_type=content_type,
+        expires_at=timezone.now() + timedelta(seconds=settings.NEWSFEED_UPLOAD_EXPIRY),
+    )
+    session.name = f'{STAGING_DIR}/{user.id}/{session.key}{CONTENT_TYPES[content_type]}'
+    session.save()
+    return session
+
+
+def target(session, request):
+    """Where and how the client uploads the bytes for ``session``."""
+    url = storage().presigned_put(session.name, session.content_type, settings.NEWSFEED_UPLOAD_EXPIRY)
+    if url is None:
+        signature = signing.dumps(str(session.key), salt=SIGNING_SALT)
+        path = reverse('api:upload-content', kwargs={'key': session.key})
+        url = request.build_absolute_uri(f'{path}?{urlencode({"signature": signature})}')
+    return {'url': url, 'method': 'PUT', 'headers': {'Content-Type': session.content_type}}
+
+
+def receive(key, signature, content):
+    """Store an upload sent to the signed local URL (the stand-in for a presigned PUT)."""
+    try:
+        signed_key = signing.loads(signature or '', salt=SIGNING_SALT, max_age=settings.NEWSFEED_UPLOAD_EXPIRY)
+    except signing.BadSignature:
+        raise UploadUnavailable("Invalid or expired upload signature.")
+    if signed_key != str(key):
+        raise UploadUnavailable("Invalid or expired upload signature.")
+    session = UploadSession.objects.filter(
+        key=key, claimed_at__isnull=True, expires_at__gt=timezone.now()
+    ).first()
+    if session is None:
+        raise UploadUnavailable("This upload does not exist or has expired.")
+    if len(content) > settings.NEWSFEED_UPLOAD_MAX_BYTES:
+        raise UploadUnavailable("The uploaded file is too large.")
+    backend = storage()
+    backend.delete(session.name)
+    backend.save_staged(session.name, ContentFile(content))
+
+
+def claim(user, key):
+    """Mark ``user``'s finished upload as used and return the staged file name."""
+    session = (
+        UploadSession.objects.select_for_update()
+        .filter(key=key, user=user, claimed_at__isnull=True, expires_at__gt=timezone.now())
+        .first()
+    )
+    if session is None:
+        raise UploadUnavailable("This upload does not exist or has expired.")
+    backend = storage()
+    if not backend.exists(session.name):
+        raise UploadUnavailable("The file has not been uploaded yet.")
+    if backend.size(session.name) > settings.NEWSFEED_UPLOAD_MAX_BYTES:
+        raise UploadUnavailable("The uploaded file is too large.")
+    session.claimed_at = timezone.now()
+    session.save(update_fields=['claimed_at'])
+    return session.name
+
+
+def adopt(instance):
+    """
+    Move a staged upload referenced by ``instance`` to its content-addressed name.
+
+    Runs on the worker before the renditions are built. Files that are not
+    images are dropped. Returns False when the row no longer has a photo.
+    """
+    field = instance.photo_field
+    photo = getattr(instance, field)
+    staged = photo.name
+    if not staged or not staged.startswith(f'{STAGING_DIR}/'):
+        return bool(staged)
+
+    backend = storage()
+    with backend.open(staged, 'rb') as source:
+        try:
+            Image.open(source).verify()
+        except (OSError, SyntaxError):
+            name = ''
+        else:
+            source.seek(0)
+            name = backend.save(photo.field.generate_filename(instance, staged.rsplit('/', 1)[-1]), source)
+
+    with transaction.atomic():
+        type(instance).objects.filter(id=instance.id).update(**{field: name})
+        MediaBlob.objects.filter(name=staged).delete()
+        media.retain(name)
+        payloads.invalidate(type(instance), instance.id)
+    backend.delete(staged)
+    setattr(instance, field, name)
+    return bool(name)
+
+
+def expire():
+    """Delete expired sessions and the staged files nobody claimed. Returns how many files."""
+    backend = storage()
+    expired = UploadSession.objects.filter(expires_at__lte=timezone.now())
+    count = 0
+    for session in expired.filter(claimed_at__isnull=True).iterator():
+        backend.delete(session.name)
+        count += 1
+    expired.delete()
+    return count
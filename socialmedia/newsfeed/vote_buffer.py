@@ -0,0 +1,234 @@
+"""
+Write-behind buffer for like/dislike counters.
+
+When NEWSFEED_VOTE_WRITE_BEHIND is on, the vote engine adds its counter deltas
+to the default cache instead of updating the hot ``Status``/``Comment`` row.
+The first delta for a target appends it to a journal; the periodic
+``flush_vote_counters`` task walks the journal and writes the accumulated
+deltas back with one batched UPDATE per model. Read serializers add the
+still pending deltas on top of the stored counters.
+
+A delta the cache can't take (Redis down, which django-redis reports as a
+None result under IGNORE_EXCEPTIONS) is written straight to the row with an
+F() update instead, so a failing cache costs the write-behind, never votes.
+
+Only the plain cache API (add/incr/get_many) is used, so the same code runs
+against django-redis in production and locmem in tests.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from socialmedia.newsfeed import payloads
+from socialmedia.newsfeed.models import Comment, Status
+
+KEY_PREFIX = 'newsfeed:votes'
+JOURNAL_SEQ_KEY = f'{KEY_PREFIX}:journal:seq'
+JOURNAL_HEAD_KEY = f'{KEY_PREFIX}:journal:head'
+FIELDS = ('like', 'dislike')
+
+logger = logging.getLogger(__name__)
+
+MODELS = {
+    'status': Status,
+    'comment': Comment,
+}
+
+
+def enabled():
+    return settings.NEWSFEED_VOTE_WRITE_BEHIND
+
+
+def _kind(model):
+    return model._meta.model_name
+
+
+def _delta_key(kind, target_id, field):
+    return f'{KEY_PREFIX}:{kind}:{target_id}:{field}'
+
+
+def _dirty_key(kind, target_id):
+    return f'{KEY_PREFIX}:{kind}:{target_id}:dirty'
+
+
+def _journal_key(seq):
+    return f'{KEY_PREFIX}:journal:{seq}'
+
+
+class CacheUnavailable(Exception):
+    pass
+
+
+def _incr(key, delta):
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout=None):
+            return delta
+        value = cache.incr(key, delta)
+    if value is None:
+        raise CacheUnavailable(key)
+    return value
+
+
+def _decr(key, delta):
+    # unlike _incr, never recreates an evicted key: there is nothing left to take
+    if cache.decr(key, delta) is None:
+        raise CacheUnavailable(key)
+
+
+def _mark_dirty(kind, target_id):
+    dirty_key = _dirty_key(kind, target_id)
+    added = cache.add(dirty_key, 1, timeout=None)
+    if added is None:
+        raise CacheUnavailable(dirty_key)
+    if added:
+        try:
+            seq = _incr(JOURNAL_SEQ_KEY, 1)
+            cache.set(_journal_key(seq), (kind, target_id), timeout=None)
+        except Exception:
+            # an orphaned dirty flag would keep later votes from journaling the target
+            cache.delete(dirty_key)
+            raise
+
+
+def _write_now(model, target_id, deltas):
+    model.objects.filter(id=target_id).update(**{field: F(field) + delta for field, delta in deltas.items()})
+    payloads.invalidate(model, target_id)
+
+
+def add(target, **deltas):
+    """Buffer counter deltas for ``target``, e.g. ``add(status, like=1)``."""
+    model = type(target)
+    kind = _kind(model)
+    unbuffered = {field: delta for field, delta in deltas.items() if delta}
+    buffered = {}
+    try:
+        for field, delta in list(unbuffered.items()):
+            _incr(_delta_key(kind, target.id, field), delta)
+            buffered[field] = unbuffered.pop(field)
+        _mark_dirty(kind, target.id)
+    except Exception:
+        logger.exception('Could not buffer vote counters of %s %s, writing them directly', kind, target.id)
+        # take back what went in, no flush would find it without a journal entry
+        for field, delta in buffered.items():
+            try:
+                _decr(_delta_key(kind, target.id, field), delta)
+                unbuffered[field] = delta
+            except Exception:
+                pass
+        if unbuffered:
+            _write_now(model, target.id, unbuffered)
+
+
+def pending(model, target_ids):
+    """``{target_id: {'like': n, 'dislike': n}}`` of the deltas not flushed yet."""
+    kind = _kind(model)
+    keys = {
+        _delta_key(kind, target_id, field): (target_id, field)
+        for target_id in target_ids
+        for field in FIELDS
+    }
+    result = {}
+    for key, value in cache.get_many(list(keys)).items():
+        if value:
+            target_id, field = keys[key]
+            result.setdefault(target_id, dict.fromkeys(FIELDS, 0))[field] = value
+    return result
+
+
+def overlay(model, data):
+    """Add pending deltas to serialized ``data`` (a dict with id/like/dislike)."""
+    if not enabled():
+        return data
+    deltas = pending(model, [data['id']]).get(data['id'])
+    if deltas:
+        for field in FIELDS:
+            data[field] += deltas[field]
+    return data
+
+
+def overlay_many(model, rows):
+    """``overlay`` for a list of serialized rows with a single cache round trip."""
+    if not enabled() or not rows:
+        return rows
+    deltas = pending(model, [row['id'] for row in rows])
+    for row in rows:
+        for field, delta in deltas.get(row['id'], {}).items():
+            row[field] += delta
+    return rows
+
+
+def _write(model, rows):
+    table = model._meta.db_table
+    quote = connection.ops.quote_name
+    values = ', '.join(['(%s, %s, %s)'] * len(rows))
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} AS target
+            SET {quote('like')} = target.{quote('like')} + delta.likes,
+                {quote('dislike')} = target.{quote('dislike')} + delta.dislikes
+            FROM (VALUES {values}) AS delta (id, likes, dislikes)
+            WHERE target.id = delta.id
+            """,
+            params,
+        )
+
+
+def flush():
+    """Write every buffered delta back to the database. Returns the targets flushed."""
+    start = cache.get(JOURNAL_HEAD_KEY, 0)
+    tail = cache.get(JOURNAL_SEQ_KEY, 0)
+    journal = cache.get_many([_journal_key(seq) for seq in range(start + 1, tail + 1)])
+
+    head = start
+    targets = set()
+    for seq in range(start + 1, tail + 1):
+        entry = journal.get(_journal_key(seq))
+        if entry is None:
+            # the writer incremented the sequence but has not stored the entry yet
+            break
+        targets.add(tuple(entry))
+        head = seq
+    if not targets:
+        return 0
+
+    # later votes re-journal their target, so nothing is lost between here and the decrements
+    cache.delete_many([_dirty_key(kind, target_id) for kind, target_id in targets])
+    # {kind: {target_id: deltas}}, each delta recorded as soon as it leaves the cache
+    taken = {}
+    try:
+        for (kind, target_id) in targets:
+            deltas = taken.setdefault(kind, {}).setdefault(target_id, dict.fromkeys(FIELDS, 0))
+            for field in FIELDS:
+                key = _delta_key(kind, target_id, field)
+                value = cache.get(key) or 0
+                if value:
+                    _decr(key, value)
+                    deltas[field] = value
+
+        with transaction.atomic():
+            for kind, by_target in taken.items():
+                rows = [
+                    (target_id, deltas['like'], deltas['dislike'])
+                    for target_id, deltas in by_target.items() if any(deltas.values())
+                ]
+                if rows:
+                    _write(MODELS[kind], rows)
+                    payloads.invalidate(MODELS[kind], *[row[0] for row in rows])
+    except Exception:
+        # the journal head didn't move, so the next flush revisits the targets not taken yet
+        for kind, by_target in taken.items():
+            for target_id, deltas in by_target.items():
+                if any(deltas.values()):
+                    add(MODELS[kind](id=target_id), **deltas)
+        raise
+
+    cache.delete_many([_journal_key(seq) for seq in range(start + 1, head + 1)])
+    cache.set(JOURNAL_HEAD_KEY, head, timeout=None)
+    return len(targets)
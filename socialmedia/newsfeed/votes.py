@@ -0,0 +1,95 @@
+"""
+Vote engine for statuses and comments.
+
+A vote is applied with at most two statements: an ``INSERT ... ON CONFLICT``
+upsert on the (target, user) unique tracker row, and an ``F()`` update of the
+target's like/dislike counters. Nothing is read and written back from Python,
+so concurrent voters cannot lose each other's updates.
+
+With NEWSFEED_VOTE_WRITE_BEHIND the counter update is handed to
+``vote_buffer`` once the transaction commits, leaving the hot row alone.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+
+from socialmedia.newsfeed import payloads, pubsub, trending, vote_buffer
+from socialmedia.newsfeed.models import (
+    Comment,
+    CommentVoteTracker,
+    Status,
+    StatusVoteTracker,
+)
+
+LIKE = True
+DISLIKE = False
+
+_TRACKERS = {
+    Status: (StatusVoteTracker, 'status'),
+    Comment: (CommentVoteTracker, 'comment'),
+}
+
+
+def _counter(vote):
+    return 'like' if vote == LIKE else 'dislike'
+
+
+def _apply_deltas(target, **deltas):
+    payloads.invalidate(type(target), target.id)
+    status_id = target.id
+    if isinstance(target, Comment):
+        # walls and news embed the comment counters under their status
+        payloads.invalidate(Status, target.status_id)
+        status_id = target.status_id
+    else:
+        trending.record(target.id, trending.LIKE_WEIGHT * deltas.get('like', 0))
+    pubsub.publish(
+        [pubsub.status_channel(status_id)], 'vote',
+        {'model': type(target)._meta.model_name, 'id': target.id, **deltas},
+    )
+    if vote_buffer.enabled():
+        transaction.on_commit(lambda: vote_buffer.add(target, **deltas))
+        return
+    type(target).objects.filter(id=target.id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+@transaction.atomic
+def cast(target, user_id, vote):
+    """
+    Record ``user_id``'s like or dislike on a status or comment.
+
+    Returns False when the user had already cast the same vote.
+    """
+    tracker, fk = _TRACKERS[type(target)]
+    table = tracker._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} ({fk}_id, user_id, vote) VALUES (%s, %s, %s)
+            ON CONFLICT ({fk}_id, user_id) DO UPDATE SET vote = EXCLUDED.vote
+            WHERE {table}.vote IS DISTINCT FROM EXCLUDED.vote
+            RETURNING (xmax = 0) AS inserted
+            """,
+            [target.id, user_id, vote],
+        )
+        row = cursor.fetchone()
+
+    if row is None:
+        return False
+    inserted, = row
+    if inserted:
+        _apply_deltas(target, **{_counter(vote): 1})
+    else:
+        _apply_deltas(target, **{_counter(vote): 1, _counter(not vote): -1})
+    return True
+
+
+@transaction.atomic
+def withdraw(target, user_id, vote):
+    """Remove ``user_id``'s like or dislike. Returns False when there was none."""
+    tracker, fk = _TRACKERS[type(target)]
+    deleted, _ = tracker.objects.filter(**{fk: target, 'user': user_id, 'vote': vote}).delete()
+    if deleted:
+        _apply_deltas(target, **{_counter(vote): -deleted})
+    return bool(deleted)
@@ -5,9 +5,11 @@ from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, UpdateMode
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, UpdateModelMixin, CreateModelMixin, DestroyModelMixin
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
+from .pagination import UserCursorPagination
 from .serializers import UserDetailSerializer, UserUpdateSerializer, UserCreateSerializer
 from socialmedia.newsfeed.models import Status
+from socialmedia.users import typeahead
 User = get_user_model()
 
 
@@ -19,6 +21,9 @@ class UserViewSet(RetrieveModelMixin,
                   GenericViewSet):
     queryset = User.objects.all()
     lookup_field = "username"
+    pagination_class = UserCursorPagination
+    typeahead_limit = 10
+    max_typeahead_limit = 50
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -43,7 +48,18 @@ class UserViewSet(RetrieveModelMixin,
     def get_queryset(self, *args, **kwargs):                                         # used in get_object
         return self.queryset.all()
 
-    # def list(self, request, *args, **kwargs):
+    def list(self, request, *args, **kwargs):
+        text = request.query_params.get("q")
+        if text is None:
+            return super().list(request, *args, **kwargs)
+
+        limit = request.query_params.get("limit", str(self.typeahead_limit))
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValidationError("limit must be a positive integer.")
+        ids = typeahead.suggest(request.user, text, min(int(limit), self.max_typeahead_limit))
+        users = User.objects.in_bulk(ids)
+        serializer = self.get_serializer([users[user_id] for user_id in ids if user_id in users], many=True)
+        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
 
     def get_object(self, *args, **kwargs):                                           # used in update
         self.queryset = self.get_queryset()
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+# Expression indexes matching the SQL of ``__istartswith`` (UPPER(col::text) LIKE
+# UPPER('abc%')); text_pattern_ops lets LIKE use them whatever the collation.
+# Django 3.2 can't declare an opclass on an expression index, hence RunSQL.
+PREFIX_INDEXES = (
+    ('users_user_username_prefix', 'username'),
+    ('users_user_name_prefix', 'name'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=f'CREATE INDEX {name} ON users_user (UPPER({column}::text) text_pattern_ops)',
+            reverse_sql=f'DROP INDEX {name}',
+        )
+        for name, column in PREFIX_INDEXES
+    ]
@@ -0,0 +1,102 @@
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from socialmedia.newsfeed.tests.factories import block, follow
+from socialmedia.users import typeahead
+from socialmedia.users.models import User
+from socialmedia.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    typeahead.cache.clear()
+    yield
+    typeahead.cache.clear()
+
+
+def test_followees_come_first_then_most_followed():
+    viewer = UserFactory(username="viewer", name="Viewer")
+    friend = UserFactory(username="annie", name="Annie")
+    popular = UserFactory(username="anna", name="Anna")
+    quiet = UserFactory(username="anders", name="Anders")
+    by_name = UserFactory(username="zed", name="Ann Zed")
+    UserFactory(username="bob", name="Bob")
+    for number in range(2):
+        follow(UserFactory(username=f"fan{number}", name="Fan"), popular)
+    follow(viewer, by_name)
+    follow(viewer, friend)
+
+    assert typeahead.suggest(viewer, "an", 10) == [friend.id, by_name.id, popular.id, quiet.id]
+    assert typeahead.suggest(viewer, " AN ", 2) == [friend.id, by_name.id]
+    assert typeahead.suggest(viewer, "", 10) == []
+
+
+def test_blocked_users_are_left_out():
+    viewer = UserFactory(username="viewer", name="Viewer")
+    blocked = UserFactory(username="carl", name="Carl")
+    blocker = UserFactory(username="carla", name="Carla")
+    shown = UserFactory(username="carlos", name="Carlos")
+    follow(viewer, blocked)
+    block(viewer, blocked)
+    block(blocker, viewer)
+
+    assert typeahead.suggest(viewer, "carl", 10) == [shown.id]
+
+
+def test_longer_prefixes_are_served_from_a_complete_cached_prefix(django_assert_num_queries):
+    viewer = UserFactory(username="viewer", name="Viewer")
+    dave, david = UserFactory(username="dave", name="Dave"), UserFactory(username="david", name="David")
+    typeahead.suggest(viewer, "dav", 10)
+
+    # only the viewer's blocks and followees are read, the ranking comes from the trie
+    with django_assert_num_queries(2):
+        assert typeahead.suggest(viewer, "davi", 10) == [david.id]
+    with django_assert_num_queries(2):
+        assert set(typeahead.suggest(viewer, "dav", 10)) == {dave.id, david.id}
+
+
+def test_prefix_trie_evicts_least_recently_used():
+    trie = typeahead.PrefixTrie(size=2)
+    trie.store("ab", True, [(1, "ABC", "")])
+    trie.store("xy", False, [(2, "XYZ", "")])
+    trie.lookup("ab")
+    trie.store("mn", True, [])
+
+    assert trie.lookup("abc") == ("ab", True, [(1, "ABC", "")])
+    assert trie.lookup("xy") is None
+    # incomplete entries only answer their own prefix
+    trie.store("xy", False, [(2, "XYZ", "")])
+    assert trie.lookup("xyz") is None
+
+
+@pytest.mark.parametrize("field, index", [
+    ("username", "users_user_username_prefix"),
+    ("name", "users_user_name_prefix"),
+])
+def test_prefix_lookup_uses_index(field, index):
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+    plan = User.objects.filter(**{f"{field}__istartswith": "ab"}).explain()
+
+    assert index in plan
+
+
+def test_user_list_endpoint():
+    viewer = UserFactory(username="viewer", name="Viewer")
+    erin = UserFactory(username="erin", name="Erin")
+    client = APIClient()
+    client.force_authenticate(viewer)
+
+    response = client.get("/api/users/", {"q": "er"})
+    assert response.status_code == 200
+    assert [user["username"] for user in response.data["results"]] == [erin.username]
+
+    response = client.get("/api/users/", {"page_size": 1})
+    assert [user["username"] for user in response.data["results"]] == [viewer.username]
+    assert response.data["next"]
+
+    assert client.get("/api/users/", {"q": "er", "limit": "0"}).status_code == 400
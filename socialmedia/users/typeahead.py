@@ -0,0 +1,152 @@
+"""
+Username/name typeahead for ``/api/users/?q=``.
+
+Matches are users whose username or name starts with the typed prefix (case
+insensitive), served by the UPPER(...) text_pattern_ops indexes. Users the
+caller follows come first, then everyone else by follower count.
+
+Short prefixes match a large share of all users, so ordering them by follower
+count is the expensive part. The global ranking of prefixes up to
+CACHED_PREFIX_LENGTH characters is kept in a per-process ``PrefixTrie``. When
+a cached prefix had few enough matches to be stored completely, longer
+prefixes below it are answered by filtering that list without a query. The
+caller's own followees are always read fresh, with a query bounded by how
+many people they follow.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+
+from socialmedia.newsfeed import graph
+from socialmedia.newsfeed.models import Relation
+
+User = get_user_model()
+
+CACHED_PREFIX_LENGTH = 3
+CANDIDATES = 50
+CACHE_SIZE = 10000
+CACHE_TIMEOUT = 300
+
+
+class PrefixTrie:
+    """
+    LRU-bounded cache of ranked matches keyed by prefix, one node per character.
+
+    An entry is ``(expires_at, complete, rows)`` where ``rows`` are
+    ``(id, USERNAME, NAME)`` best first and ``complete`` tells that they are
+    every match of the prefix, not just the top CANDIDATES.
+    """
+
+    def __init__(self, size=CACHE_SIZE, timeout=CACHE_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._root = {}
+        self._recent = OrderedDict()
+
+    def _node(self, prefix, create=False):
+        node = self._root
+        for character in prefix:
+            child = node.get(character)
+            if child is None:
+                if not create:
+                    return None
+                child = node[character] = {}
+            node = child
+        return node
+
+    def lookup(self, prefix):
+        """The entry of ``prefix`` or of its longest cached ancestor, as ``(cached_prefix, complete, rows)``."""
+        now = time.monotonic()
+        with self._lock:
+            for length in range(len(prefix), 0, -1):
+                node = self._node(prefix[:length])
+                entry = node and node.get(None)
+                if entry and entry[0] > now and (length == len(prefix) or entry[1]):
+                    self._recent.move_to_end(prefix[:length])
+                    return prefix[:length], entry[1], entry[2]
+        return None
+
+    def store(self, prefix, complete, rows):
+        with self._lock:
+            self._node(prefix, create=True)[None] = (time.monotonic() + self.timeout, complete, rows)
+            self._recent[prefix] = True
+            self._recent.move_to_end(prefix)
+            while len(self._recent) > self.size:
+                evicted, _ = self._recent.popitem(last=False)
+                self._node(evicted).pop(None, None)
+
+    def clear(self):
+        with self._lock:
+            self._root = {}
+            self._recent.clear()
+
+
+cache = PrefixTrie()
+
+
+def _matching(prefix):
+    return Q(username__istartswith=prefix) | Q(name__istartswith=prefix)
+
+
+def _rows(queryset):
+    return [
+        (user_id, username.upper(), (name or '').upper())
+        for user_id, username, name in queryset.values_list('id', 'username', 'name')
+    ]
+
+
+def _popular(prefix):
+    """``rows`` of the most followed users matching ``prefix``, from the trie when possible."""
+    if len(prefix) > CACHED_PREFIX_LENGTH:
+        found = cache.lookup(prefix[:CACHED_PREFIX_LENGTH])
+        if found is None or not found[1]:
+            return _query_popular(prefix)[1]
+    else:
+        found = cache.lookup(prefix)
+    if found is None:
+        complete, rows = _query_popular(prefix)
+        cache.store(prefix, complete, rows)
+        return rows
+    cached_prefix, _, rows = found
+    if cached_prefix == prefix:
+        return rows
+    return [row for row in rows if row[1].startswith(prefix) or row[2].startswith(prefix)]
+
+
+def _query_popular(prefix):
+    rows = _rows(
+        User.objects.filter(_matching(prefix))
+        .annotate(followers=Coalesce('stats__followers', 0))
+        .order_by('-followers', 'username')[:CANDIDATES + 1]
+    )
+    return len(rows) <= CANDIDATES, rows[:CANDIDATES]
+
+
+def _followees(user, prefix, limit):
+    followees = Relation.objects.filter(src=user.id, kind=Relation.FOLLOW).values('dst')
+    return list(
+        User.objects.filter(_matching(prefix), id__in=followees)
+        .order_by('username')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def suggest(user, text, limit):
+    """Ids of up to ``limit`` users matching ``text`` for ``user``: followees first, then by followers."""
+    prefix = text.strip().upper()
+    if not prefix:
+        return []
+    blocked = graph.blocked_either_way(user.id)
+    ids = [user_id for user_id in _followees(user, prefix, limit) if user_id not in blocked]
+    hidden = blocked | set(ids)
+    for user_id, _, _ in _popular(prefix):
+        if len(ids) >= limit:
+            break
+        if user_id not in hidden:
+            ids.append(user_id)
+    return ids
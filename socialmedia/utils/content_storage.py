@@ -0,0 +1,55 @@
+import hashlib
+import posixpath
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+
+class ContentAddressedStorageMixin:
+    """
+    Stores every file under the SHA-256 of its content.
+
+    The upload directory is kept and the file name becomes
+    ``<aa>/<sha256><ext>``, so saving bytes that are already stored returns
+    the existing name without writing them again.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def save_staged(self, name, content):
+        """Store ``content`` under ``name`` as-is, without content addressing."""
+        return super().save(name, content)
+
+    def presigned_put(self, name, content_type, expires_in):
+        """A URL the client can PUT ``name`` to directly, or None if the backend can't presign."""
+        return None
+
+    @staticmethod
+    def content_name(name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = posixpath.split(name.replace("\\", "/"))
+        extension = posixpath.splitext(filename)[1].lower()
+        hexdigest = digest.hexdigest()
+        return posixpath.join(directory, hexdigest[:2], f"{hexdigest}{extension}")
+
+
+class ContentAddressedFileSystemStorage(ContentAddressedStorageMixin, FileSystemStorage):
+    pass
+
+
+def photo_storage():
+    """Storage for status and comment photos, configured by NEWSFEED_PHOTO_STORAGE."""
+    return import_string(settings.NEWSFEED_PHOTO_STORAGE)()
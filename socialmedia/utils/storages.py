@@ -1,4 +1,7 @@
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+from socialmedia.utils.content_storage import ContentAddressedStorageMixin
 
 
 class StaticRootS3Boto3Storage(S3Boto3Storage):
@@ -9,3 +12,17 @@ class StaticRootS3Boto3Storage(S3Boto3Storage):
 class MediaRootS3Boto3Storage(S3Boto3Storage):
     location = "media"
     file_overwrite = False
+
+
+class ContentAddressedS3Boto3Storage(ContentAddressedStorageMixin, MediaRootS3Boto3Storage):
+    def presigned_put(self, name, content_type, expires_in):
+        return self.bucket.meta.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket.name,
+                "Key": self._normalize_name(clean_name(name)),
+                "ContentType": content_type,
+            },
+            ExpiresIn=expires_in,
+            HttpMethod="PUT",
+        )